@@ -0,0 +1,71 @@
+"""
+Messages/sec for day + hour bucketing: ISO timestamp parsing vs snowflake ids.
+
+    python benchmarks/bench_bucketing.py [--dir samples/coders] [--repeat 20]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import preprocess  # noqa: E402
+
+
+def load_messages(directory: Path):
+    pairs = []
+    for path in sorted(directory.glob("*.json")):
+        with path.open("r", encoding="utf-8") as f:
+            pairs.extend((m["id"], m["ts"]) for m in json.load(f)["messages"])
+    return pairs
+
+
+def iso_buckets(pairs, bucket_size_hours):
+    out = []
+    for _, ts_raw in pairs:
+        ts = preprocess.parse_timestamp(ts_raw)
+        out.append((ts.strftime("%Y-%m-%d"), ts.hour // bucket_size_hours * bucket_size_hours))
+    return out
+
+
+def snowflake_buckets(pairs, bucket_size_hours):
+    out = []
+    for msg_id, ts_raw in pairs:
+        day, hour = preprocess.time_bucket_key(preprocess.local_time_ms(msg_id, ts_raw), bucket_size_hours)
+        out.append((preprocess.day_label(day), hour))
+    return out
+
+
+def bench(fn, pairs, bucket_size_hours, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(pairs, bucket_size_hours)
+        best = min(best, time.perf_counter() - started)
+    return result, len(pairs) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark timestamp bucketing strategies")
+    parser.add_argument("--dir", type=Path, default=ROOT / "samples" / "coders")
+    parser.add_argument("--bucket-size", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pairs = load_messages(args.dir)
+    iso, iso_rate = bench(iso_buckets, pairs, args.bucket_size, args.repeat)
+    snow, snow_rate = bench(snowflake_buckets, pairs, args.bucket_size, args.repeat)
+    if iso != snow:
+        raise SystemExit("Bucket mismatch between ISO and snowflake paths")
+
+    print(f"{len(pairs):,} messages from {args.dir}")
+    print(f"iso parse : {iso_rate:>12,.0f} msg/s")
+    print(f"snowflake : {snow_rate:>12,.0f} msg/s ({snow_rate / iso_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
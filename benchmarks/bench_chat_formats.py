@@ -0,0 +1,68 @@
+"""
+I/O and memory of the chat file formats when building transcripts.
+
+    python benchmarks/bench_chat_formats.py [--dir samples/coders]
+
+Every sample day is rewritten as indented JSON, JSON Lines, and compressed JSON
+Lines. The script then reports size on disk, the time to load and format every
+transcript, and the peak Python heap (tracemalloc) for one day. Each format is
+read both the old way (load the whole file) and as a stream.
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bridge import chatfile  # noqa: E402
+from bridge.pipeline import format_messages  # noqa: E402
+
+SUFFIXES = [".json", ".jsonl", ".jsonl.gz"] + ([".jsonl.zst"] if chatfile.zstandard else [])
+
+
+def transcript(path: Path, stream: bool) -> str:
+    chat = chatfile.load_chat(path, stream=stream)
+    return format_messages(chat["messages"], chat["users"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare chat file formats")
+    parser.add_argument("--dir", type=Path, default=ROOT / "samples" / "coders")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sources = sorted(args.dir.glob("chat_*.json"))
+    largest = max(sources, key=lambda p: p.stat().st_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{len(sources)} days from {args.dir} (peak heap measured on {largest.name})")
+        print(f"{'format':<11} {'mode':<7} {'size MB':>8} {'read+format ms':>15} {'peak heap MB':>13}")
+        for suffix in SUFFIXES:
+            out_dir = Path(tmp) / suffix.strip(".")
+            out_dir.mkdir()
+            for src in sources:
+                chatfile.write_chat(out_dir / (src.name[: -len(".json")] + suffix), chatfile.load_chat(src))
+            files = sorted(out_dir.iterdir())
+            size = sum(p.stat().st_size for p in files)
+            for stream in (False, True):
+                best = float("inf")
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    for path in files:
+                        transcript(path, stream)
+                    best = min(best, time.perf_counter() - started)
+                big = out_dir / (largest.name[: -len(".json")] + suffix)
+                tracemalloc.start()
+                transcript(big, stream)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                mode = "stream" if stream else "load"
+                print(f"{suffix:<11} {mode:<7} {size / 1e6:>8.2f} {best * 1000:>15.1f} {peak / 1e6:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Prompt size of the plain transcript format vs bridge.compact on preprocessed days.
+
+    python benchmarks/bench_compact.py [--dir samples/coders] [--lang en]
+
+Sizes are estimated tokens (bridge.llm.estimate_tokens), the same measure the chunker
+budgets with, so the reduction carries over to chunks per day and prompt cost.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bridge import pipeline  # noqa: E402
+from bridge.chatfile import load_chat  # noqa: E402
+from bridge.compact import compact_transcript  # noqa: E402
+from bridge.llm import estimate_tokens  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure transcript compaction on chat files")
+    parser.add_argument("--dir", type=Path, default=ROOT / "samples" / "coders")
+    parser.add_argument("--lang", default="en")
+    args = parser.parse_args()
+
+    plain_total = compact_total = 0
+    print(f"{'day':<22} {'plain tok':>10} {'compact tok':>12} {'saved':>7}")
+    for path in sorted(args.dir.glob("chat_*.json")):
+        chat = load_chat(path)
+        plain = estimate_tokens(pipeline.format_messages(chat["messages"], chat["users"]), args.lang)
+        compact = estimate_tokens(compact_transcript(chat["messages"], chat["users"])[0], args.lang)
+        plain_total += plain
+        compact_total += compact
+        print(f"{path.stem:<22} {plain:>10,} {compact:>12,} {1 - compact / plain:>7.1%}")
+    print(f"{'total':<22} {plain_total:>10,} {compact_total:>12,} {1 - compact_total / plain_total:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
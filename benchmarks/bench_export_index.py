@@ -0,0 +1,54 @@
+"""
+Backfill one day from a large raw export: full streaming pass vs the byte-offset index.
+
+    python benchmarks/bench_export_index.py --messages 1000000 [--per-day 5000]
+
+Reports the one-off cost of building <export>.idx.json and the time to rewrite a
+single day from the middle of the export with and without it.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import preprocess  # noqa: E402
+from bench_preprocess_memory import write_synthetic_export  # noqa: E402
+from bridge.export_index import write_export_index  # noqa: E402
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark single-day extraction with the export offset index")
+    parser.add_argument("--messages", type=int, default=1_000_000, help="Number of synthetic messages")
+    parser.add_argument("--per-day", type=int, default=5000, help="Messages per day in the synthetic export")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export = Path(tmp) / "export.json"
+        write_synthetic_export(export, args.messages, args.per_day)
+        day = date(2024, 1, 1) + timedelta(days=args.messages // args.per_day // 2)
+        sinks = [preprocess.DailySink()]
+        print(f"Synthetic export: {args.messages:,} messages, {export.stat().st_size / 1e6:,.1f} MB; backfilling {day}")
+
+        full_s, _ = timed(lambda: preprocess.preprocess_export(export, Path(tmp) / "full", sinks))
+        index_s, index = timed(lambda: write_export_index(export))
+        day_s, result = timed(lambda: preprocess.preprocess_export(export, Path(tmp) / "day", sinks, dates=[day]))
+
+        print(f"{'full pass (all days)':<24} {full_s * 1000:>10.1f} ms")
+        print(f"{'build index (once)':<24} {index_s * 1000:>10.1f} ms  ({len(index['hours'])} hour runs)")
+        print(f"{'--date via index':<24} {day_s * 1000:>10.1f} ms  ({result['messages']} messages)")
+
+
+if __name__ == "__main__":
+    main()
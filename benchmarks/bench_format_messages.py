@@ -0,0 +1,64 @@
+"""
+Transcript formatting throughput: dateutil per message vs the memoized ISO fast path.
+
+    python benchmarks/bench_format_messages.py [--dir samples/coders] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import dateutil.parser
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bridge import exports, pipeline  # noqa: E402
+from bridge.chatfile import load_chat  # noqa: E402
+
+
+def dateutil_format(messages, users):
+    """The pre-fast-path formatter: one dateutil parse per message."""
+    lines = []
+    for msg in messages:
+        user = users.get(msg.get("uid"), {})
+        username = user.get("nickname") or user.get("name") or "Unknown User"
+        ts_raw = msg.get("ts")
+        try:
+            ts = dateutil.parser.parse(ts_raw).strftime("%H:%M")
+        except Exception:
+            ts = ts_raw or ""
+        lines.append(f"{username} ({ts}): {msg.get('content', '')}")
+    return "\n".join(lines)
+
+
+def best_of(repeat, fn, chats):
+    best = float("inf")
+    for _ in range(repeat):
+        exports._hhmm_cache.clear()  # measure cold caches on every run
+        started = time.perf_counter()
+        out = [fn(chat["messages"], chat["users"]) for chat in chats]
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark format_messages timestamp handling")
+    parser.add_argument("--dir", type=Path, default=ROOT / "samples" / "coders", help="Folder of chat_*.json files")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    chats = [load_chat(path) for path in sorted(args.dir.glob("chat_*.json"))]
+    total = sum(len(chat["messages"]) for chat in chats)
+    print(f"{len(chats)} days, {total:,} messages from {args.dir}")
+
+    old_s, old = best_of(args.repeat, dateutil_format, chats)
+    new_s, new = best_of(args.repeat, pipeline.format_messages, chats)
+    assert old == new, "fast path changed the transcript"
+    print(f"{'dateutil':<10} {old_s * 1000:>9.1f} ms  {total / old_s:>12,.0f} msg/s")
+    print(f"{'fast path':<10} {new_s * 1000:>9.1f} ms  {total / new_s:>12,.0f} msg/s ({old_s / new_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Compare peak RSS and wall time of the streaming preprocessor against the old
+``json.load`` path on a synthetic DiscordChatExporter export.
+
+    python benchmarks/bench_preprocess_memory.py --messages 1000000
+
+Each mode runs in its own subprocess so peak RSS is measured independently.
+"""
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import preprocess  # noqa: E402
+
+DISCORD_EPOCH_MS = 1420070400000
+
+
+def write_synthetic_export(path: Path, num_messages: int, messages_per_day: int, num_users: int = 2000) -> None:
+    """Write an export shaped like DiscordChatExporter output, one message at a time."""
+    rng = random.Random(42)
+    tz = timezone(timedelta(hours=-8))
+    start = datetime(2024, 1, 1, tzinfo=tz)
+    step = timedelta(seconds=86400 / messages_per_day)
+    header = {
+        "guild": {"id": "1", "name": "Synthetic"},
+        "channel": {"id": "100", "type": "GuildTextChat", "category": "Bench", "name": "bench", "topic": None},
+        "dateRange": {"after": None, "before": None},
+        "exportedAt": start.isoformat(),
+    }
+    with path.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(header, indent=2)[:-2])
+        f.write(',\n  "messages": [\n')
+        for i in range(num_messages):
+            ts = start + step * i
+            uid = str(100000 + rng.randrange(num_users))
+            snowflake = (int(ts.timestamp() * 1000) - DISCORD_EPOCH_MS) << 22 | i % 4096
+            message = {
+                "id": str(snowflake),
+                "type": "Default",
+                "timestamp": ts.isoformat(timespec="milliseconds"),
+                "timestampEdited": None,
+                "isPinned": False,
+                "content": "lorem ipsum dolor sit amet " * rng.randint(1, 6),
+                "author": {
+                    "id": uid,
+                    "name": f"user{uid}",
+                    "nickname": f"User {uid}",
+                    "isBot": False,
+                    "roles": [{"id": "1", "name": "Member"}],
+                },
+                "attachments": [],
+                "reactions": [],
+                "mentions": [],
+            }
+            if i:
+                f.write(",\n")
+            f.write("    ")
+            f.write(json.dumps(message))
+        f.write(f'\n  ],\n  "messageCount": {num_messages}\n}}\n')
+
+
+def legacy_simplify(input_file, output_dir):
+    """The pre-streaming implementation: json.load the whole export, then group by day."""
+    with open(input_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    channel_info = preprocess.extract_channel_info(data["channel"])
+    channel_output_path = Path(output_dir) / str(channel_info["id"])
+    channel_output_path.mkdir(parents=True, exist_ok=True)
+    user_map = {}
+    daily_messages = defaultdict(list)
+    for message in data.get("messages", []):
+        day = preprocess.parse_timestamp(message["timestamp"]).strftime("%Y-%m-%d")
+        cleaned_msg = preprocess.clean_message(message, user_map)
+        if cleaned_msg["content"]:
+            daily_messages[day].append(cleaned_msg)
+    for day, messages in daily_messages.items():
+        output_data = {"channel": channel_info, "date": day, "users": user_map, "messages": messages}
+        preprocess.write_chat_file(channel_output_path / f"chat_{day}.json", output_data)
+    return len(daily_messages)
+
+
+MODES = {
+    "legacy": legacy_simplify,
+    "stream": preprocess.simplify_chat_export,
+}
+
+
+def run_child(mode: str, input_file: str, output_dir: str) -> None:
+    files = MODES[mode](input_file, output_dir)
+    # ru_maxrss is KiB on Linux
+    print(json.dumps({"files": files, "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark streaming vs json.load preprocessing")
+    parser.add_argument("--messages", type=int, default=1_000_000, help="Number of synthetic messages")
+    parser.add_argument("--per-day", type=int, default=5000, help="Messages per day in the synthetic export")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "INPUT", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export = Path(tmp) / "export.json"
+        write_synthetic_export(export, args.messages, args.per_day)
+        size_mb = export.stat().st_size / 1e6
+        print(f"Synthetic export: {args.messages:,} messages, {size_mb:,.1f} MB")
+        print(f"{'mode':<8} {'files':>6} {'wall s':>8} {'peak RSS MB':>12}")
+        for mode in args.modes:
+            out_dir = Path(tmp) / f"out-{mode}"
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", mode, str(export), str(out_dir)],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            elapsed = time.perf_counter() - started
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{mode:<8} {stats['files']:>6} {elapsed:>8.2f} {stats['maxrss_kb'] / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
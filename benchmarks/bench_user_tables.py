@@ -0,0 +1,100 @@
+"""
+Disk size and load time of the user table layouts on already simplified files.
+
+    python benchmarks/bench_user_tables.py [--dir samples/coders] [--bucket-size 4]
+
+The sample day files carry the channel-wide user map, so they are re-bucketed
+into daily and N-hour files and written once per layout:
+  channel  - full channel map in every file (previous behaviour)
+  bucket   - only the participants of each file
+  sidecar  - no map in the files, one shared users.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import preprocess  # noqa: E402
+from bridge import chatfile  # noqa: E402
+
+
+def load_samples(directory: Path):
+    channel, users, messages = None, {}, []
+    for path in sorted(directory.glob("chat_*.json")):
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        channel = data["channel"]
+        users.update(data["users"])
+        messages.extend(data["messages"])
+    return channel, users, messages
+
+
+def buckets(messages, sink):
+    grouped = defaultdict(list)
+    for msg in messages:
+        grouped[sink.key(preprocess.local_time_ms(msg["id"], msg["ts"]))].append(msg)
+    return grouped
+
+
+def write_layout(out_dir: Path, layout: str, channel, users, grouped, sink) -> None:
+    out_dir.mkdir(parents=True)
+    for key, msgs in grouped.items():
+        data = {"channel": channel, **sink.metadata(key)}
+        if layout == "channel":
+            data["users"] = users
+        elif layout == "bucket":
+            data["users"] = preprocess.bucket_users(msgs, users)
+        data["messages"] = msgs
+        preprocess.write_chat_file(out_dir / sink.file_name(key), data)
+    if layout == "sidecar":
+        preprocess.write_users_sidecar(out_dir, users)
+
+
+def measure(out_dir: Path, repeat: int):
+    size = sum(p.stat().st_size for p in out_dir.iterdir())
+    files = sorted(p for p in out_dir.glob("chat_*.json"))
+    best = float("inf")
+    for _ in range(repeat):
+        chatfile._sidecar_cache.clear()
+        started = time.perf_counter()
+        for path in files:
+            chatfile.load_chat(path)
+        best = min(best, time.perf_counter() - started)
+    return len(files), size, best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare user table layouts")
+    parser.add_argument("--dir", type=Path, default=ROOT / "samples" / "coders")
+    parser.add_argument("--bucket-size", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    channel, users, messages = load_samples(args.dir)
+    print(f"{len(messages):,} messages, {len(users):,} users from {args.dir}")
+    sinks = [preprocess.DailySink(), preprocess.HourlySink(args.bucket_size)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for sink in sinks:
+            grouped = buckets(messages, sink)
+            print(f"\n[{sink.name}] {'layout':<8} {'files':>6} {'size MB':>9} {'load ms':>9}")
+            baseline = None
+            for layout in ("channel", "bucket", "sidecar"):
+                out_dir = Path(tmp) / sink.name / layout
+                write_layout(out_dir, layout, channel, users, grouped, sink)
+                files, size, elapsed = measure(out_dir, args.repeat)
+                baseline = baseline or (size, elapsed)
+                print(
+                    f"{'':<{len(sink.name) + 3}}{layout:<8} {files:>6} {size / 1e6:>9.2f} {elapsed * 1000:>9.1f}"
+                    f"  ({1 - size / baseline[0]:.0%} smaller, {1 - elapsed / baseline[1]:.0%} faster)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Shared, pooled async HTTP client for the providers' ``analyze_async``.
+
+httpx is optional. With it installed, every provider on an event loop shares one
+``httpx.AsyncClient`` per loop (keep-alive, bounded connections, one timeout policy),
+so a fan-out of many transcripts runs concurrently without a thread per call.
+Without it, get_async_client returns None and providers fall back to running their
+synchronous ``analyze`` in ``asyncio.to_thread``.
+"""
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HTTPPoolConfig:
+    max_connections: int = 10
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0  # seconds an idle connection is kept open
+    timeout: float = 120.0  # seconds per request (read); connecting gets 10s
+
+
+_config = HTTPPoolConfig()
+_clients: Dict[int, Any] = {}
+_lock = threading.Lock()
+_warned_missing_httpx = False
+
+
+def configure_http_pool(config: HTTPPoolConfig) -> None:
+    """Limits for clients created from now on (existing loops keep theirs until closed)."""
+    global _config
+    _config = config
+
+
+def http_pool_config() -> HTTPPoolConfig:
+    return _config
+
+
+def async_http_available() -> bool:
+    return httpx is not None
+
+
+def get_async_client() -> Optional[Any]:
+    """The pooled AsyncClient of the running event loop, created on first use; None without httpx."""
+    global _warned_missing_httpx
+    if httpx is None:
+        if not _warned_missing_httpx:
+            _warned_missing_httpx = True
+            logger.warning("httpx is not installed; async LLM requests fall back to one thread per call")
+        return None
+    key = id(asyncio.get_running_loop())
+    with _lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed:
+            client = _clients[key] = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=_config.max_connections,
+                    max_keepalive_connections=_config.max_keepalive_connections,
+                    keepalive_expiry=_config.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(_config.timeout, connect=10.0),
+            )
+    return client
+
+
+async def aclose_client() -> None:
+    """Close the running loop's pooled client (call before the loop ends)."""
+    with _lock:
+        client = _clients.pop(id(asyncio.get_running_loop()), None)
+    if client is not None:
+        await client.aclose()
+
+
+def run_async(awaitable: Awaitable[T]) -> T:
+    """asyncio.run for synchronous callers, closing the loop's pooled client afterwards."""
+
+    async def main() -> T:
+        try:
+            return await awaitable
+        finally:
+            await aclose_client()
+
+    return asyncio.run(main())
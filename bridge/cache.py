@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from bridge.llm import (
+    PROMPT_VERSION,
+    LLMAnalysis,
+    LLMProvider,
+    analysis_from_dict,
+    analysis_to_dict,
+    analyze_async,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30
+PRUNE_EVERY = 50  # writes between eviction passes
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Ignore line-ending and trailing-whitespace differences when hashing."""
+    return "\n".join(line.rstrip() for line in transcript.strip().splitlines())
+
+
+def cache_key(
+    transcript: str,
+    provider: str,
+    model: str,
+    lang: str,
+    prompt_version: str = PROMPT_VERSION,
+    context: str = "",
+) -> str:
+    """context is any extra prompt input (e.g. a previous analysis); empty keeps plain keys unchanged."""
+    parts = [prompt_version, provider.lower(), model, lang, normalize_transcript(transcript)]
+    if context:
+        parts.append(context)
+    payload = json.dumps(parts)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    On-disk, content-addressed store of LLMAnalysis results.
+
+    Entries live in <directory>/<key[:2]>/<key>.json. Reads refresh an entry's mtime,
+    so eviction (entries older than max_age_days, then the least recently used ones
+    until the cache fits in max_bytes) keeps what is still being re-rendered.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.prune()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[LLMAnalysis]:
+        path = self._path(key)
+        try:
+            analysis = analysis_from_dict(json.loads(path.read_text(encoding="utf-8"))["analysis"])
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Missing, unreadable, foreign or partial entries are misses, not errors.
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return analysis
+
+    def put(self, key: str, analysis: LLMAnalysis, meta: Optional[Dict[str, Any]] = None) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        record = {"analysis": analysis_to_dict(analysis), "meta": meta or {}, "createdAt": time.time()}
+        tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+        with self._lock:
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """Apply the age and size limits; returns the number of entries removed."""
+        if not self.directory.exists():
+            return 0
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*/*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()  # least recently used first
+            removed = 0
+            total = sum(size for _, size, _ in entries)
+            cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days else None
+            for mtime, size, path in entries:
+                too_old = cutoff is not None and mtime < cutoff
+                too_big = self.max_bytes is not None and total > self.max_bytes
+                if not (too_old or too_big):
+                    continue
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            if removed:
+                logger.debug("Evicted %d cached analyses from %s", removed, self.directory)
+            return removed
+
+
+class CachedProvider(LLMProvider):
+    """LLMProvider wrapper that answers repeated (transcript, provider, model, lang) requests from the cache."""
+
+    def __init__(self, provider: LLMProvider, cache: AnalysisCache, provider_name: Optional[str] = None):
+        self.provider = provider
+        self.cache = cache
+        self.provider_name = provider_name or type(provider).__name__
+        self.model = getattr(provider, "model", "")
+
+    def _key(self, transcript: str, metadata: Optional[Dict[str, Any]]) -> str:
+        metadata = metadata or {}
+        lang = metadata.get("lang", "en")
+        previous = metadata.get("previous_analysis")
+        context = json.dumps(analysis_to_dict(previous), sort_keys=True) if previous is not None else ""
+        if metadata.get("rollup"):
+            # Rollups use their own prompt; never share entries with a daily transcript.
+            context = json.dumps(["rollup", context])
+        return cache_key(transcript, self.provider_name, self.model, lang, context=context)
+
+    def _meta(self, metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {"provider": self.provider_name, "model": self.model, "lang": (metadata or {}).get("lang", "en")}
+
+    def analyze(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        key = self._key(transcript, metadata)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        analysis = self.provider.analyze(transcript, metadata=metadata)
+        self.cache.put(key, analysis, self._meta(metadata))
+        return analysis
+
+    async def analyze_async(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        key = self._key(transcript, metadata)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        analysis = await analyze_async(self.provider, transcript, metadata)
+        self.cache.put(key, analysis, self._meta(metadata))
+        return analysis
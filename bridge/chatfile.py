@@ -0,0 +1,120 @@
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, TextIO, Tuple
+
+from bridge.exports import iter_export
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+USERS_SIDECAR = "users.json"
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+CHAT_SUFFIXES = (".json",) + JSONL_SUFFIXES
+
+_sidecar_cache: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+
+
+def chat_suffix(path: Path) -> str:
+    """The chat format suffix of a file name ('' if it is not a chat file)."""
+    name = path.name
+    for suffix in sorted(CHAT_SUFFIXES, key=len, reverse=True):
+        if name.endswith(suffix):
+            return suffix
+    return ""
+
+
+def _open_text(path: Path, mode: str) -> TextIO:
+    suffix = chat_suffix(path)
+    if suffix.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if suffix.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("zstandard package is required for .zst chat files")
+        raw = open(path, mode + "b")
+        if mode == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def load_users_sidecar(directory: Path) -> Dict[str, Any]:
+    """Shared user table written by `preprocess.py --users sidecar`, cached per directory."""
+    path = directory / USERS_SIDECAR
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _sidecar_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with path.open("r", encoding="utf-8") as f:
+        users = json.load(f)
+    _sidecar_cache[path] = (mtime, users)
+    return users
+
+
+def _iter_jsonl_messages(fp: TextIO) -> Iterator[Dict[str, Any]]:
+    with fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _iter_json_messages(events: Iterator[Tuple[str, Any]], first: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield first
+    for key, value in events:
+        if key == "message":
+            yield value
+
+
+def load_chat(path: Path, stream: bool = False) -> Dict[str, Any]:
+    """
+    Load a simplified chat file (indented ``.json`` or compact ``.jsonl[.gz|.zst]``),
+    resolving whichever user table layout it uses: an embedded ``users`` map
+    (per-file or channel-wide) or a ``users.json`` sidecar in the same directory.
+
+    With ``stream=True`` the header is read eagerly and ``messages`` is a lazy
+    iterator, so callers can format a transcript without holding the message list.
+    """
+    if chat_suffix(path) in JSONL_SUFFIXES:
+        fp = _open_text(path, "r")
+        chat_data = json.loads(fp.readline() or "{}")
+        messages = _iter_jsonl_messages(fp)
+        chat_data["messages"] = messages if stream else list(messages)
+    elif stream:
+        # The simplified JSON layout puts channel/date/users before messages.
+        chat_data = {}
+        events = iter_export(path)
+        for key, value in events:
+            if key == "message":
+                chat_data["messages"] = _iter_json_messages(events, value)
+                break
+            chat_data[key] = value
+        chat_data.setdefault("messages", iter(()))
+    else:
+        with path.open("r", encoding="utf-8") as f:
+            chat_data = json.load(f)
+    if "users" not in chat_data:
+        chat_data["users"] = load_users_sidecar(path.parent)
+    return chat_data
+
+
+def write_chat(path: Path, chat_data: Dict[str, Any]) -> None:
+    """Write a chat file in the format given by its suffix (see load_chat)."""
+    if chat_suffix(path) in JSONL_SUFFIXES:
+        header = {k: v for k, v in chat_data.items() if k != "messages"}
+        with _open_text(path, "w") as f:
+            f.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+            for message in chat_data.get("messages", []):
+                f.write(json.dumps(message, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+    else:
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(chat_data, f, indent=2, ensure_ascii=False)
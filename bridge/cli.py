@@ -1,25 +1,170 @@
 import argparse
-import json
+import glob
 import logging
+import sys
+from datetime import date
 from pathlib import Path
-from typing import Iterable, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from bridge.config import load_config, load_env_file
+from bridge.aio import configure_http_pool
+from bridge.cache import AnalysisCache, CachedProvider
+from bridge.chatfile import USERS_SIDECAR, chat_suffix, load_chat
+from bridge.config import AppConfig, load_config, load_env_file, schedule_window
 from bridge.emailer import send_email
-from bridge.pipeline import run_pipeline
+from bridge.incremental import IncrementalState
+from bridge.llm import PROMPT_OVERHEAD_TOKENS, chunk_token_budget, estimate_tokens, model_context_window
+from bridge.pipeline import (
+    RENDERERS,
+    analysis_to_markdown,
+    format_messages,
+    load_analysis_sidecar,
+    run_pipeline,
+    sidecar_path,
+    write_analysis_sidecar,
+)
 from bridge.providers import create_provider
+from bridge.retry import ThrottledProvider
+from bridge.rollup import collect_daily_analyses, rollup_analyses, rollup_transcript
+from bridge.store import MessageStore, date_range_ms
+from bridge.streaming import STREAM_STATS, StreamProgress
 
 logger = logging.getLogger(__name__)
 
+INCREMENTAL_DIR = ".incremental"  # per-(channel, date) state under OUTPUT_DIR
+
 
 def collect_inputs(path: Path) -> Iterable[Path]:
     if path.is_dir():
-        for file in sorted(path.glob("*.json")):
-            yield file
+        for file in sorted(path.iterdir()):
+            if file.name.startswith(".") or file.name == USERS_SIDECAR:
+                continue  # preprocess state and user table sidecars
+            if file.is_file() and chat_suffix(file):
+                yield file
     else:
         yield path
 
 
+def collect_ingest_inputs(patterns: Iterable[str]) -> List[Path]:
+    """Files, directories (searched recursively for chat files) and glob patterns to ingest."""
+    inputs: List[Path] = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            for sub in sorted(p for p in path.rglob("*") if p.is_dir()) + [path]:
+                inputs.extend(collect_inputs(sub))
+        elif glob.has_magic(pattern):
+            inputs.extend(Path(p) for p in sorted(glob.glob(pattern, recursive=True)))
+        else:
+            inputs.append(path)
+    return list(dict.fromkeys(p for p in inputs if not p.is_dir()))
+
+
+def ingest_main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bridge.cli ingest",
+        description="Load raw exports or preprocessed chat files into a SQLite message store",
+    )
+    parser.add_argument("inputs", nargs="+", help="Export/chat files, folders, or glob patterns")
+    parser.add_argument("--db", required=True, type=Path, help="SQLite database to create or update")
+    parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    total = 0
+    with MessageStore(args.db) as store:
+        for input_path in collect_ingest_inputs(args.inputs):
+            try:
+                count = store.ingest_file(input_path)
+            except (ValueError, KeyError) as exc:
+                logger.warning("Skipping %s: %s", input_path, exc)
+                continue
+            total += count
+            logger.debug("Ingested %s (%d messages)", input_path, count)
+    logger.info("Stored %d messages in %s", total, args.db)
+
+
+def collect_sidecars(patterns: Iterable[str]) -> List[Path]:
+    """Sidecar files, directories (searched recursively, skipping hidden ones) and glob patterns."""
+    paths: List[Path] = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            paths.extend(
+                p
+                for p in sorted(path.rglob("*.json"))
+                if not any(part.startswith(".") for part in p.relative_to(path).parts)
+            )
+        elif glob.has_magic(pattern):
+            paths.extend(Path(p) for p in sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(path)
+    return list(dict.fromkeys(paths))
+
+
+def render_main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bridge.cli render",
+        description="Re-render reports from saved analysis sidecars (no LLM provider needed)",
+    )
+    parser.add_argument("inputs", nargs="+", help="Sidecar .json files, folders, or glob patterns")
+    parser.add_argument("--format", choices=sorted(RENDERERS), default="md", help="Output format (default: md)")
+    parser.add_argument("--out-dir", type=Path, help="Where to write the reports (default: next to each sidecar)")
+    parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    render = RENDERERS[args.format]
+    count = 0
+    for path in collect_sidecars(args.inputs):
+        try:
+            record = load_analysis_sidecar(path)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.debug("Skipping %s: %s", path, exc)
+            continue
+        channel_name = (record.get("channel") or {}).get("name", "Unknown")
+        out_path = (args.out_dir or path.parent) / f"{path.stem}.{args.format}"
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(render(record["analysis"], channel_name, record.get("date", "")), encoding="utf-8")
+        count += 1
+        logger.debug("Rendered %s -> %s", path, out_path)
+    logger.info("Rendered %d report(s) as %s", count, args.format)
+
+
+def _date_window(args: argparse.Namespace, cfg: AppConfig) -> Tuple[date, date]:
+    if args.since:
+        first = date.fromisoformat(args.since)
+        last = date.fromisoformat(args.until) if args.until else first
+    else:
+        first, last = schedule_window(cfg.schedule_type, cfg.timezone)
+    if last < first:
+        raise ValueError(f"--until {last} is before --since {first}")
+    return first, last
+
+
+def iter_store_chats(args: argparse.Namespace, cfg: AppConfig) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """One chat per selected channel, covering the requested dates (or the schedule window)."""
+    first, last = _date_window(args, cfg)
+    start_ms, end_ms = date_range_ms(first, last, cfg.timezone)
+    label = first.isoformat() if first == last else f"{first.isoformat()}_{last.isoformat()}"
+    store = MessageStore(args.db)
+    try:
+        for channel in store.resolve_channels(args.channel):
+            if not store.count_messages(channel["id"], start_ms, end_ms):
+                logger.info("No messages for %s on %s", channel.get("name", channel["id"]), label)
+                continue
+            yield f"{args.db}:{channel['id']}", store.load_chat(channel, start_ms, end_ms, label)
+    finally:
+        store.close()
+
+
+def iter_file_chats(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for input_path in collect_inputs(path):
+        if not input_path.exists():
+            logger.warning("Skipping missing input %s", input_path)
+            continue
+        yield str(input_path), load_chat(input_path, stream=True)
+
+
 def build_subject(files: List[Path], cfg_name: str | None = None) -> str:
     base = "Discord Bridge Report"
     if cfg_name:
@@ -30,52 +175,218 @@ def build_subject(files: List[Path], cfg_name: str | None = None) -> str:
     return base
 
 
-def main() -> None:
+def largest_prompt_tokens(
+    chats: Iterable[Tuple[str, Dict[str, Any]]], max_chunk_tokens: int, max_input_tokens: Optional[int], lang: str
+) -> int:
+    """Estimated tokens of the largest request a run sends: the biggest day, capped by the chunk budget."""
+    cap = min(max_chunk_tokens, max_input_tokens or max_chunk_tokens)
+    largest = 0
+    for _, chat_data in chats:
+        tokens = estimate_tokens(format_messages(chat_data.get("messages", []), chat_data.get("users")), lang)
+        largest = max(largest, min(tokens, cap))
+        if largest == cap:
+            break
+    return largest + PROMPT_OVERHEAD_TOKENS
+
+
+def build_provider(
+    cfg: AppConfig, use_cache: bool = True, prompt_tokens: Optional[Callable[[], int]] = None
+) -> Tuple[Any, Optional[AnalysisCache]]:
+    """
+    The configured provider with retries and rate limiting, wrapped in the on-disk
+    analysis cache unless disabled (cache hits do not count against the rate limit).
+
+    Providers that can warm up (Ollama) start loading their model in the background
+    here. Those that size their context per run (Ollama without LLM_CONTEXT_WINDOW) are
+    first sized with prompt_tokens(), the run's largest prompt, so the warm-up loads the
+    same num_ctx every request uses.
+    """
+    configure_http_pool(cfg.llm.http)
+    provider = create_provider(cfg.llm)
+    if prompt_tokens is not None and getattr(provider, "num_ctx", 0) is None:  # not sized yet
+        provider.size_context(prompt_tokens())
+    warm_up = getattr(provider, "warm_up", None)
+    if warm_up is not None:
+        warm_up()
+    provider = ThrottledProvider(provider, cfg.llm.provider, cfg.llm.rate_limit, cfg.llm.retry)
+    cache = None
+    if cfg.llm.cache_dir and use_cache:
+        cache = AnalysisCache(
+            cfg.llm.cache_dir,
+            max_bytes=cfg.llm.cache_max_mb * 1024 * 1024,
+            max_age_days=cfg.llm.cache_max_age_days,
+        )
+        provider = CachedProvider(provider, cache, provider_name=cfg.llm.provider)
+    return provider, cache
+
+
+def email_reports(cfg: AppConfig, processed: List[Path], attachments: List[Tuple[str, bytes, str]]) -> None:
+    if not attachments:
+        logger.warning("No attachments generated; skipping email.")
+        return
+
+    subject = build_subject(processed)
+    body = f"Discord Bridge processed {len(processed)} file(s). See attachments for details."
+    send_email(cfg.smtp, subject, body, attachments=attachments)
+    logger.info("Report email sent to %s", ", ".join(cfg.smtp.to_emails))
+
+
+def rollup_main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bridge.cli rollup",
+        description="Build weekly/monthly reports from the saved daily analyses",
+    )
+    parser.add_argument("--dir", type=Path, help="Folder with daily reports and sidecars (default: OUTPUT_DIR)")
+    parser.add_argument("--channel", action="append", default=[], help="Channel id or name (default: all)")
+    parser.add_argument("--since", help="First date YYYY-MM-DD (default: SCHEDULE_TYPE window)")
+    parser.add_argument("--until", help="Last date YYYY-MM-DD, inclusive (default: --since)")
+    parser.add_argument("--config", type=Path, default=Path(".env"), help="Path to .env file")
+    parser.add_argument("--no-email", action="store_true", help="Do not send email, only generate Markdown")
+    parser.add_argument("--dry-run", action="store_true", help="Run without email or file writing")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the LLM (ignore and do not fill the cache)")
+    parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    load_env_file(args.config)
+    cfg = load_config()
+    first, last = _date_window(args, cfg)
+    label = f"{first.isoformat()}_{last.isoformat()}"
+    groups = collect_daily_analyses(args.dir or cfg.output_dir, first, last, args.channel)
+    if not groups:
+        logger.warning("No daily analyses between %s and %s", first, last)
+        return
+
+    def rollup_prompt_tokens() -> int:
+        return PROMPT_OVERHEAD_TOKENS + max(
+            estimate_tokens(rollup_transcript(group["channel"].get("name", "channel"), group["days"]), cfg.lang)
+            for group in groups
+        )
+
+    provider, cache = build_provider(
+        cfg, use_cache=not (args.no_cache or args.dry_run), prompt_tokens=rollup_prompt_tokens
+    )
+    processed: List[Path] = []
+    attachments = []
+    for group in groups:
+        channel = group["channel"]
+        name = channel.get("name", "channel")
+        analysis = rollup_analyses(group["days"], provider, name, metadata={"lang": cfg.lang, "channel": channel})
+        markdown = analysis_to_markdown(analysis, name, label)
+        out_path = cfg.output_dir / f"{name}_{label}.md"
+        if not args.dry_run:
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            out_path.write_text(markdown, encoding="utf-8")
+            write_analysis_sidecar(sidecar_path(out_path), analysis, channel, label)
+        processed.append(out_path)
+        attachments.append((out_path.name, markdown.encode("utf-8"), "text/markdown"))
+        logger.info(
+            "Rolled up %d day(s) of %s -> %s (~%d input tokens)",
+            len(group["days"]),
+            name,
+            out_path,
+            estimate_tokens(rollup_transcript(name, group["days"]), cfg.lang),
+        )
+
+    if cache is not None:
+        logger.info("LLM cache: %d hits, %d misses (%s)", cache.hits, cache.misses, cache.directory)
+    stream_summary = STREAM_STATS.summary()
+    if stream_summary:
+        logger.info("LLM streaming: %s", stream_summary)
+    if args.dry_run or args.no_email:
+        return
+    email_reports(cfg, processed, attachments)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "ingest":
+        ingest_main(argv[1:])
+        return
+    if argv and argv[0] == "render":
+        render_main(argv[1:])
+        return
+    if argv and argv[0] == "rollup":
+        rollup_main(argv[1:])
+        return
+
     parser = argparse.ArgumentParser(description="Run Discord Bridge summary + email workflow")
-    parser.add_argument("-i", "--input", required=True, type=Path, help="Input JSON file or folder")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-i", "--input", type=Path, help="Input JSON file or folder")
+    source.add_argument("--db", type=Path, help="SQLite message store built with `bridge.cli ingest`")
+    parser.add_argument("--channel", action="append", default=[], help="Channel id or name to report on (--db; default: all)")
+    parser.add_argument("--since", help="First local date YYYY-MM-DD (--db; default: SCHEDULE_TYPE window)")
+    parser.add_argument("--until", help="Last local date YYYY-MM-DD, inclusive (--db; default: --since)")
     parser.add_argument("--config", type=Path, default=Path(".env"), help="Path to .env file")
     parser.add_argument("--no-email", action="store_true", help="Do not send email, only generate Markdown")
     parser.add_argument("--dry-run", action="store_true", help="Run without email or file writing")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the LLM (ignore and do not fill the cache)")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only analyze messages added since the last run of each channel/date and merge them into its analysis",
+    )
+    parser.add_argument(
+        "--no-compact",
+        action="store_true",
+        help="Send plain `name (HH:MM): content` transcripts instead of the compact format",
+    )
     parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
     load_env_file(args.config)
     cfg = load_config()
 
-    provider = create_provider(cfg.llm)
+    max_chunk_tokens = chunk_token_budget(model_context_window(cfg.llm.model, cfg.llm.context_window))
+
+    def chats() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return iter_store_chats(args, cfg) if args.db else iter_file_chats(args.input)
+
+    provider, cache = build_provider(
+        cfg,
+        use_cache=not (args.no_cache or args.dry_run),
+        prompt_tokens=lambda: largest_prompt_tokens(chats(), max_chunk_tokens, cfg.llm.max_input_tokens, cfg.lang),
+    )
+    state = IncrementalState(cfg.output_dir / INCREMENTAL_DIR) if args.incremental and not args.dry_run else None
 
     processed: List[Path] = []
     attachments = []
 
-    for input_path in collect_inputs(args.input):
-        if not input_path.exists():
-            logger.warning("Skipping missing input %s", input_path)
-            continue
-        with input_path.open("r", encoding="utf-8") as f:
-            chat_data = json.load(f)
+    for source_name, chat_data in chats():
         out_path = cfg.output_dir / f"{chat_data.get('channel', {}).get('name','channel')}_{chat_data.get('date','')}.md"
+        metadata: Dict[str, Any] = {"lang": cfg.lang}
+        if cfg.llm.stream:
+            metadata["on_stream"] = StreamProgress(
+                source_name, lambda name, chars: logger.debug("%s: %d characters streamed", name, chars)
+            )
         markdown = run_pipeline(
             chat_data,
             provider,
             None if args.dry_run else out_path,
-            metadata={"lang": cfg.lang},
+            metadata=metadata,
+            max_chunk_tokens=max_chunk_tokens,
+            max_concurrency=cfg.llm.max_concurrency,
+            progress=lambda done, total: logger.debug("%s: chunk %d/%d analyzed", source_name, done, total),
+            state=state,
+            compact=not args.no_compact,
+            max_input_tokens=cfg.llm.max_input_tokens,
+            role_weights=cfg.llm.role_weights,
         )
         processed.append(out_path)
         attachments.append((out_path.name, markdown.encode("utf-8"), "text/markdown"))
-        logger.info("Processed %s -> %s", input_path, out_path)
+        logger.info("Processed %s -> %s", source_name, out_path)
 
-    if args.dry_run or args.no_email:
-        return
+    if cache is not None:
+        logger.info("LLM cache: %d hits, %d misses (%s)", cache.hits, cache.misses, cache.directory)
+    stream_summary = STREAM_STATS.summary()
+    if stream_summary:
+        logger.info("LLM streaming: %s", stream_summary)
 
-    if not attachments:
-        logger.warning("No attachments generated; skipping email.")
+    if args.dry_run or args.no_email:
         return
-
-    subject = build_subject(processed)
-    body = f"Discord Bridge processed {len(processed)} file(s). See attachments for details."
-    send_email(cfg.smtp, subject, body, attachments=attachments)
-    logger.info("Report email sent to %s", ", ".join(cfg.smtp.to_emails))
+    email_reports(cfg, processed, attachments)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+Compact transcript format for LLM prompts.
+
+Compared with ``bridge.pipeline.format_messages`` (``name (HH:MM): content`` per
+message), a compact transcript:
+
+- merges consecutive messages from the same author into one turn,
+- prints ``HH:MM`` only when the minute changes,
+- replaces long display names with short handles (``U1``, ``U2``, ...) when that saves
+  characters, listed in a ``Speakers:`` legend at the top,
+- collapses long URLs to ``<url:host>`` and fenced code blocks to ``<code: N lines>``,
+- drops messages that are only emoji.
+
+Handles are assigned per transcript, so ``U1`` is a different person in every chunk.
+compact_transcript returns its handle map along with the text, and expand_aliases
+puts the real names back into the chunk's analysis before analyses are merged.
+"""
+import re
+import unicodedata
+from dataclasses import fields, replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bridge.exports import format_hhmm
+from bridge.llm import LLMAnalysis
+
+URL_MAX_LENGTH = 40
+ALIAS_MIN_LENGTH = 8
+
+_CODE_BLOCK = re.compile(r"```[^\n`]*\n?(.*?)```", re.DOTALL)
+_URL = re.compile(r"https?://([^/\s>]+)[^\s>]*")
+_CUSTOM_EMOJI = re.compile(r"<a?(:\w+:)\d+>")
+_EMOJI_CATEGORIES = {"So", "Sk", "Mn", "Me", "Cf", "Zs"}
+_ALIAS = re.compile(r"\bU\d+\b")
+
+
+def _collapse_code(match: "re.Match[str]") -> str:
+    lines = match.group(1).strip("\n").count("\n") + 1
+    return f"<code: {lines} line{'s' if lines != 1 else ''}>"
+
+
+def _collapse_url(match: "re.Match[str]") -> str:
+    url = match.group(0)
+    return url if len(url) <= URL_MAX_LENGTH else f"<url:{match.group(1)}>"
+
+
+def is_emoji_only(text: str) -> bool:
+    """True for messages made only of emoji (unicode or Discord custom) and whitespace."""
+    text = _CUSTOM_EMOJI.sub("", text).strip()
+    return all(unicodedata.category(ch) in _EMOJI_CATEGORIES for ch in text)
+
+
+def compact_content(content: str) -> str:
+    content = _CODE_BLOCK.sub(_collapse_code, content)
+    content = _URL.sub(_collapse_url, content)
+    content = _CUSTOM_EMOJI.sub(r"\1", content)
+    return "\n  ".join(line.rstrip() for line in content.strip().splitlines() if line.strip())
+
+
+def _display_name(users: Dict[str, Any], uid: Optional[str]) -> str:
+    user = users.get(uid, {})
+    return user.get("nickname") or user.get("name") or "Unknown User"
+
+
+def _turns(messages: Iterable[Dict[str, Any]]) -> List[Tuple[Optional[str], str, List[str]]]:
+    """(uid, HH:MM of the first message, contents) for each run of same-author messages."""
+    turns: List[Tuple[Optional[str], str, List[str]]] = []
+    for msg in messages:
+        content = msg.get("content", "")
+        if is_emoji_only(content):
+            continue
+        uid = msg.get("uid")
+        if turns and turns[-1][0] == uid:
+            turns[-1][2].append(compact_content(content))
+        else:
+            turns.append((uid, format_hhmm(msg.get("ts")), [compact_content(content)]))
+    return turns
+
+
+def _aliases(turns: List[Tuple[Optional[str], str, List[str]]], users: Dict[str, Any]) -> Dict[str, str]:
+    """Handles for the names where the legend costs less than repeating the name."""
+    counts: Dict[str, int] = {}
+    for uid, _, _ in turns:
+        name = _display_name(users, uid)
+        counts[name] = counts.get(name, 0) + 1
+    aliases: Dict[str, str] = {}
+    for name, count in counts.items():
+        alias = f"U{len(aliases) + 1}"
+        legend_cost = len(name) + len(alias) + 3  # "U1=name, "
+        if len(name) >= ALIAS_MIN_LENGTH and count * (len(name) - len(alias)) > legend_cost:
+            aliases[name] = alias
+    return aliases
+
+
+def compact_transcript(
+    messages: Iterable[Dict[str, Any]], users: Optional[Dict[str, Any]]
+) -> Tuple[str, Dict[str, str]]:
+    """Format messages as a compact transcript (see module docstring); returns (text, {handle: name})."""
+    users = users or {}
+    turns = _turns(messages)
+    aliases = _aliases(turns, users)
+    lines: List[str] = []
+    if aliases:
+        lines.append("Speakers: " + ", ".join(f"{alias}={name}" for name, alias in aliases.items()))
+    last_minute = None
+    for uid, hhmm, contents in turns:
+        name = _display_name(users, uid)
+        prefix = ""
+        if hhmm != last_minute:
+            prefix = f"{hhmm} "
+            last_minute = hhmm
+        lines.append(f"{prefix}{aliases.get(name, name)}: " + "\n  ".join(contents))
+    return "\n".join(lines), {alias: name for name, alias in aliases.items()}
+
+
+def expand_aliases(analysis: LLMAnalysis, aliases: Dict[str, str]) -> LLMAnalysis:
+    """Replace the handles of one compact transcript (U1, U2, ...) with real names in every text field."""
+    if not aliases:
+        return analysis
+
+    def expand(text: str) -> str:
+        return _ALIAS.sub(lambda m: aliases.get(m.group(0), m.group(0)), text)
+
+    def expand_item(item: Any) -> Any:
+        values = {f.name: getattr(item, f.name) for f in fields(item)}
+        return replace(item, **{k: expand(v) for k, v in values.items() if isinstance(v, str)})
+
+    return LLMAnalysis(
+        summary=expand(analysis.summary),
+        faq=[expand_item(q) for q in analysis.faq],
+        help_interactions=[expand_item(h) for h in analysis.help_interactions],
+        action_items=[expand_item(a) for a in analysis.action_items],
+    )
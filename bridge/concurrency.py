@@ -0,0 +1,77 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def bounded_map(
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    max_concurrency: int = 1,
+    on_result: Optional[Callable[[int, R], None]] = None,
+) -> List[R]:
+    """
+    Apply fn to every item with at most max_concurrency calls in flight.
+
+    Results come back in input order regardless of completion order, so merges stay
+    deterministic. on_result(index, result) runs in the calling thread as each call
+    finishes (for progress reporting). The first exception is re-raised after the
+    calls already running have finished.
+    """
+    if max_concurrency <= 1 or len(items) <= 1:
+        results = []
+        for index, item in enumerate(items):
+            result = fn(item)
+            if on_result:
+                on_result(index, result)
+            results.append(result)
+        return results
+
+    results: List[Optional[R]] = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(items))) as pool:
+        futures = {pool.submit(fn, item): index for index, item in enumerate(items)}
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                if on_result:
+                    on_result(index, results[index])
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return results  # type: ignore[return-value]
+
+
+async def bounded_gather(
+    fn: Callable[[T], Awaitable[R]],
+    items: Sequence[T],
+    max_concurrency: int = 1,
+    on_result: Optional[Callable[[int, R], None]] = None,
+) -> List[R]:
+    """
+    Async bounded_map: await fn(item) for every item with at most max_concurrency in
+    flight on the running event loop (no threads). Results keep input order; the first
+    exception cancels the calls still pending and is re-raised.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(index: int, item: T) -> R:
+        async with semaphore:
+            result = await fn(item)
+        if on_result:
+            on_result(index, result)
+        return result
+
+    tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(items)]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
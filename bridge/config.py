@@ -1,8 +1,15 @@
 import json
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from bridge.aio import HTTPPoolConfig
+from bridge.concurrency import DEFAULT_MAX_CONCURRENCY
+from bridge.relevance import role_weights_from_env
+from bridge.retry import RateLimit, RetryPolicy
 
 
 @dataclass
@@ -27,6 +34,18 @@ class LLMConfig:
     model: str
     api_key: Optional[str] = None
     base_url: Optional[str] = None
+    context_window: Optional[int] = None  # tokens; None = look up by model name
+    max_input_tokens: Optional[int] = None  # per channel/day; None = send every message
+    role_weights: Optional[Dict[str, float]] = None  # relevance weight by role substring; None = defaults
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    http: HTTPPoolConfig = field(default_factory=HTTPPoolConfig)  # async provider connection pool
+    retry: RetryPolicy = field(default_factory=RetryPolicy)  # 429/5xx/timeout retries
+    rate_limit: RateLimit = field(default_factory=RateLimit)  # client-side throttle of provider + model
+    stream: bool = False  # stream completions (providers that support it) and stop at the closing brace
+    keep_alive: Optional[str] = None  # Ollama: how long the model stays loaded ("30m", "-1"); None = server default
+    cache_dir: Optional[Path] = None  # None disables the analysis cache
+    cache_max_mb: int = 256
+    cache_max_age_days: int = 30
 
 
 @dataclass
@@ -66,6 +85,35 @@ def _parse_bool(value: str) -> bool:
     return value.strip().lower() in ("1", "true", "yes", "on")
 
 
+_CACHE_OFF = {"", "0", "false", "no", "off", "none"}
+
+
+def _cache_dir(output_dir: Path) -> Optional[Path]:
+    """LLM_CACHE_DIR: unset -> <output_dir>/.llm_cache; empty or "off" -> None (cache disabled)."""
+    raw = os.environ.get("LLM_CACHE_DIR")
+    if raw is None:
+        return output_dir / ".llm_cache"
+    if raw.strip().lower() in _CACHE_OFF:
+        return None
+    return Path(raw)
+
+
+def schedule_window(schedule_type: str, timezone: str, now: Optional[datetime] = None) -> Tuple[date, date]:
+    """
+    Inclusive (first, last) local dates a scheduled run reports on:
+    daily -> yesterday, weekly -> the 7 days before today, monthly -> the previous calendar month.
+    """
+    today = (now or datetime.now(ZoneInfo(timezone))).astimezone(ZoneInfo(timezone)).date()
+    if schedule_type == "daily":
+        return today - timedelta(days=1), today - timedelta(days=1)
+    if schedule_type == "weekly":
+        return today - timedelta(days=7), today - timedelta(days=1)
+    if schedule_type == "monthly":
+        last = today.replace(day=1) - timedelta(days=1)
+        return last.replace(day=1), last
+    raise ValueError(f"SCHEDULE_TYPE '{schedule_type}' has no implicit date window; pass explicit dates")
+
+
 def load_env_file(path: Path) -> None:
     """
     Minimal .env loader to avoid extra deps. Existing env vars take precedence.
@@ -83,6 +131,62 @@ def load_env_file(path: Path) -> None:
             os.environ[key] = value
 
 
+def parse_lang(raw: str) -> str:
+    """
+    Language code of a LANG value, so a system locale ("ko_KR.UTF-8") reads as "ko".
+    """
+    return raw.strip().split(".", 1)[0].replace("-", "_").split("_", 1)[0].lower()
+
+
+def env_number(key: str, default: Any = None, integer: bool = False) -> Any:
+    """
+    A positive number from the environment (an int when integer is set).
+    Returns default when the variable is unset or blank; raises ValueError when it is invalid.
+    """
+    raw = os.environ.get(key, "").strip()
+    if not raw:
+        return default
+    kind = "integer" if integer else "number"
+    try:
+        value = int(raw) if integer else float(raw)
+    except ValueError:
+        raise ValueError(f"{key} must be a positive {kind}; got '{raw}'")
+    if value <= 0:
+        raise ValueError(f"{key} must be a positive {kind}; got '{raw}'")
+    return value
+
+
+def max_concurrency_from_env(default: int = DEFAULT_MAX_CONCURRENCY) -> int:
+    """LLM_MAX_CONCURRENCY: how many LLM requests may be in flight at once."""
+    return env_number("LLM_MAX_CONCURRENCY", default, integer=True)
+
+
+def http_pool_config_from_env() -> HTTPPoolConfig:
+    """LLM_HTTP_MAX_CONNECTIONS and LLM_HTTP_TIMEOUT (seconds)."""
+    connections = env_number("LLM_HTTP_MAX_CONNECTIONS", HTTPPoolConfig.max_connections, integer=True)
+    return HTTPPoolConfig(
+        max_connections=connections,
+        max_keepalive_connections=connections,
+        timeout=env_number("LLM_HTTP_TIMEOUT", HTTPPoolConfig.timeout),
+    )
+
+
+def retry_policy_from_env() -> RetryPolicy:
+    """LLM_RETRY_MAX_ATTEMPTS (1 disables retries) and LLM_RETRY_MAX_SECONDS."""
+    return RetryPolicy(
+        max_attempts=env_number("LLM_RETRY_MAX_ATTEMPTS", RetryPolicy.max_attempts, integer=True),
+        max_total=env_number("LLM_RETRY_MAX_SECONDS", RetryPolicy.max_total),
+    )
+
+
+def rate_limit_from_env() -> RateLimit:
+    """LLM_REQUESTS_PER_MINUTE and LLM_TOKENS_PER_MINUTE for the configured provider and model."""
+    return RateLimit(
+        requests_per_minute=env_number("LLM_REQUESTS_PER_MINUTE"),
+        tokens_per_minute=env_number("LLM_TOKENS_PER_MINUTE"),
+    )
+
+
 def _require(keys: List[str]) -> Tuple[List[str], dict]:
     missing = []
     values = {}
@@ -199,7 +303,7 @@ def load_config() -> AppConfig:
     if missing_sections:
         raise ValueError(f"Missing config keys: {missing_sections}")
 
-    lang = paths_vals["LANG"].strip().lower()
+    lang = parse_lang(paths_vals["LANG"])
     allowed_langs = {"en", "ko"}
     if lang not in allowed_langs:
         raise ValueError(f"LANG must be one of {', '.join(sorted(allowed_langs))}; got '{lang}'")
@@ -242,6 +346,18 @@ def load_config() -> AppConfig:
         model=llm_vals["LLM_MODEL"],
         api_key=api_key,
         base_url=os.environ.get("LLM_BASE_URL") or None,
+        context_window=env_number("LLM_CONTEXT_WINDOW", integer=True),
+        max_input_tokens=env_number("LLM_MAX_INPUT_TOKENS", integer=True),
+        role_weights=role_weights_from_env(),
+        max_concurrency=max_concurrency_from_env(),
+        http=http_pool_config_from_env(),
+        retry=retry_policy_from_env(),
+        rate_limit=rate_limit_from_env(),
+        stream=_parse_bool(os.environ.get("LLM_STREAM", "false")),
+        keep_alive=os.environ.get("LLM_KEEP_ALIVE") or None,
+        cache_dir=_cache_dir(output_dir),
+        cache_max_mb=env_number("LLM_CACHE_MAX_MB", 256, integer=True),
+        cache_max_age_days=env_number("LLM_CACHE_MAX_AGE_DAYS", 30, integer=True),
     )
 
     app_cfg = AppConfig(
@@ -0,0 +1,235 @@
+"""
+Byte-offset index over the ``messages`` array of a DiscordChatExporter export.
+
+The index records, for every run of consecutive messages that share a local hour,
+the byte range ``[start, end)`` that the run occupies in the file. Extracting a day
+(or an N-hour window) then seeks to those ranges and decodes only them, instead of
+streaming the whole export.
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from bridge.exports import DAY_MS, HOUR_MS, local_time_ms
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx.json"
+
+# Everything up to the next bracket outside a string, in one (unrolled) regex match.
+_TO_BRACKET = re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.DOTALL)
+_STRING_TAIL = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_SCALAR_END = re.compile(rb"[,}]")
+# DiscordChatExporter writes id, type and timestamp before any nested object.
+_MESSAGE_ID = re.compile(rb'"id"\s*:\s*"(\d+)"')
+_MESSAGE_TS = re.compile(rb'"timestamp"\s*:\s*"([^"]+)"')
+
+
+def index_path(export: Union[str, Path]) -> Path:
+    return Path(f"{export}{INDEX_SUFFIX}")
+
+
+def _skip_string(buf: Any, pos: int) -> int:
+    """Offset just past the closing quote of the string whose opening quote is at pos - 1."""
+    match = _STRING_TAIL.match(buf, pos)
+    if match is None:
+        raise ValueError("Malformed export: unterminated string")
+    return match.end()
+
+
+def _value_end(buf: Any, pos: int) -> int:
+    """Offset just past the JSON object/array starting at pos."""
+    depth = 0
+    size = len(buf)
+    while True:
+        pos = _TO_BRACKET.match(buf, pos).end()
+        if pos >= size:
+            raise ValueError("Malformed export: unexpected end of file")
+        if buf[pos] in b"[{":
+            depth += 1
+        else:
+            depth -= 1
+        pos += 1
+        if depth == 0:
+            return pos
+
+
+def _find_top_level(buf: Any, key: bytes) -> Tuple[int, Optional[Any]]:
+    """
+    Offset of the value of a top-level key plus the decoded ``channel`` seen on the way.
+
+    Only top-level keys are compared, so a message whose content mentions "messages"
+    cannot be mistaken for the array.
+    """
+    pos = _WHITESPACE.match(buf, 0).end()
+    if buf[pos : pos + 1] != b"{":
+        raise ValueError("Malformed export: expected a JSON object")
+    pos += 1
+    channel = None
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if buf[pos : pos + 1] != b'"':
+            raise ValueError(f"Malformed export: no top-level {key.decode()!r}")
+        end = _skip_string(buf, pos + 1)
+        name = buf[pos + 1 : end - 1]
+        pos = _WHITESPACE.match(buf, end).end() + 1  # ':'
+        pos = _WHITESPACE.match(buf, pos).end()
+        if name == key:
+            return pos, channel
+        if buf[pos : pos + 1] in (b"{", b"["):
+            value_end = _value_end(buf, pos)
+        elif buf[pos : pos + 1] == b'"':
+            value_end = _skip_string(buf, pos + 1)
+        else:
+            value_end = _SCALAR_END.search(buf, pos).start()
+        if name == b"channel":
+            channel = json.loads(buf[pos:value_end])
+        pos = _WHITESPACE.match(buf, value_end).end() + 1  # ',' or '}'
+
+
+def build_export_index(export: Union[str, Path]) -> Dict[str, Any]:
+    """Scan a memory-mapped export and return its hour-run index (see module docstring)."""
+    export = Path(export)
+    stat = export.stat()
+    runs: List[List[int]] = []
+    channel = None
+    if stat.st_size:
+        with open(export, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            pos, channel = _find_top_level(buf, b"messages")
+            if buf[pos : pos + 1] != b"[":
+                raise ValueError("Malformed export: 'messages' is not an array")
+            runs = _hour_runs(buf, pos + 1)
+    return {
+        "version": INDEX_VERSION,
+        "size": stat.st_size,
+        "mtimeNs": stat.st_mtime_ns,
+        "channel": channel,
+        "hours": runs,
+    }
+
+
+def _message_spans(buf: Any, pos: int) -> Iterator[Tuple[int, int]]:
+    """(start, end) byte offsets of every element of the messages array opening at pos."""
+    first = _WHITESPACE.match(buf, pos).end()
+    if buf[first : first + 1] != b"{":
+        return
+    newline = buf.rfind(b"\n", pos, first)
+    if newline >= 0:
+        # Indented export: a newline plus the first element's indentation only ever
+        # precedes an element of the array (strings cannot hold raw newlines), so
+        # elements are found with one C-level scan instead of tracking brackets.
+        element = re.compile(re.escape(buf[newline:first]) + rb"\{")
+        starts = [first] + [match.end() - 1 for match in element.finditer(buf, first)]
+        for start, following in zip(starts, starts[1:]):
+            yield start, buf.rfind(b"}", start, following) + 1
+        yield starts[-1], _value_end(buf, starts[-1])
+        return
+    while buf[first : first + 1] == b"{":
+        end = _value_end(buf, first)
+        yield first, end
+        first = _WHITESPACE.match(buf, end).end()
+        if buf[first : first + 1] == b",":
+            first = _WHITESPACE.match(buf, first + 1).end()
+
+
+def _hour_runs(buf: Any, pos: int) -> List[List[int]]:
+    runs: List[List[int]] = []
+    for start, end in _message_spans(buf, pos):
+        hour = _message_hour(buf, start, end)
+        if runs and runs[-1][0] == hour:
+            runs[-1][2] = end
+        else:
+            runs.append([hour, start, end])
+    return runs
+
+
+def _message_hour(buf: Any, start: int, end: int) -> int:
+    """Local hour number (local_time_ms // HOUR_MS) of the message stored at buf[start:end]."""
+    id_match = _MESSAGE_ID.search(buf, start, end)
+    ts_match = _MESSAGE_TS.search(buf, start, end)
+    if id_match and ts_match:
+        message_id, timestamp = id_match.group(1).decode(), ts_match.group(1).decode()
+    else:
+        message = json.loads(buf[start:end])
+        message_id, timestamp = message["id"], message["timestamp"]
+    return local_time_ms(message_id, timestamp) // HOUR_MS
+
+
+def write_export_index(export: Union[str, Path]) -> Dict[str, Any]:
+    index = build_export_index(export)
+    path = index_path(export)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+    return index
+
+
+def load_export_index(export: Union[str, Path], build: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    The saved index of an export, rebuilt when missing or when the export changed
+    since it was written (size or mtime). Returns None if it is stale and build is False.
+    """
+    path = index_path(export)
+    stat = Path(export).stat()
+    if path.exists():
+        index = json.loads(path.read_text(encoding="utf-8"))
+        if (
+            index.get("version") == INDEX_VERSION
+            and index.get("size") == stat.st_size
+            and index.get("mtimeNs") == stat.st_mtime_ns
+        ):
+            return index
+    return write_export_index(export) if build else None
+
+
+def day_hours(day: date) -> range:
+    """Local hour numbers covered by one calendar day."""
+    first = (day - date(1970, 1, 1)).days * (DAY_MS // HOUR_MS)
+    return range(first, first + DAY_MS // HOUR_MS)
+
+
+def iter_export_hours(
+    export: Union[str, Path],
+    hours: Iterable[int],
+    index: Optional[Dict[str, Any]] = None,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    ``iter_export``-compatible events (``channel``, then ``message``s) for the messages
+    whose local hour is in ``hours``, read by seeking to the indexed byte ranges.
+    """
+    index = index or load_export_index(export)
+    wanted = set(hours)
+    if index["channel"] is not None:
+        yield "channel", index["channel"]
+    with open(export, "rb") as f:
+        for hour, start, end in index["hours"]:
+            if hour not in wanted:
+                continue
+            f.seek(start)
+            # Messages of one run are separated by commas, so the range is an array body.
+            for message in json.loads(b"[" + f.read(end - start) + b"]"):
+                yield "message", message
+
+
+def iter_export_days(export: Union[str, Path], days: Iterable[date]) -> Iterator[Tuple[str, Any]]:
+    hours = [hour for day in days for hour in day_hours(day)]
+    return iter_export_hours(export, hours)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build byte-offset indexes for DiscordChatExporter exports")
+    parser.add_argument("exports", nargs="+", type=Path, help="Export JSON files")
+    args = parser.parse_args(argv)
+    for export in args.exports:
+        index = write_export_index(export)
+        days = {hour // (DAY_MS // HOUR_MS) for hour, _, _ in index["hours"]}
+        print(f"{export}: {len(index['hours'])} hour runs over {len(days)} days -> {index_path(export)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import json
+import logging
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple, Union
+
+import dateutil.parser
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # characters read per refill
+DISCORD_EPOCH_MS = 1420070400000
+DAY_MS = 86_400_000
+HOUR_MS = 3_600_000
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_offset_cache: Dict[str, int] = {}
+_day_label_cache: Dict[int, str] = {}
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_ISO_MINUTE = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}")
+_HHMM_CACHE_LIMIT = 100_000
+_hhmm_cache: Dict[str, str] = {}
+
+
+class _ExportStream:
+    """Buffered cursor over a JSON text file that decodes one value at a time."""
+
+    def __init__(self, fp: TextIO, chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.fp.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        # Drop the consumed prefix so the buffer never grows past one value + one chunk.
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed export: expected '{char}' but found '{found or 'EOF'}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_export(
+    input_file: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Stream a DiscordChatExporter JSON file without loading it into memory.
+
+    Yields ``(key, value)`` for each top-level field in file order, except that the
+    ``messages`` array is expanded into one ``("message", message)`` pair per entry.
+    DiscordChatExporter writes ``guild``/``channel`` before ``messages``, so consumers
+    see the channel metadata before the first message.
+    """
+    with open(input_file, "r", encoding="utf-8") as fp:
+        stream = _ExportStream(fp, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            if not isinstance(key, str):
+                raise ValueError("Malformed export: top-level keys must be strings")
+            stream.expect(":")
+            if key == "messages" and stream.peek() == "[":
+                stream.pos += 1
+                if stream.peek() == "]":
+                    stream.pos += 1
+                else:
+                    while True:
+                        yield "message", stream.value()
+                        sep = stream.peek()
+                        stream.pos += 1
+                        if sep == "]":
+                            break
+                        if sep != ",":
+                            raise ValueError(f"Malformed export: unexpected '{sep or 'EOF'}' in messages array")
+            else:
+                yield key, stream.value()
+            sep = stream.peek()
+            stream.pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise ValueError(f"Malformed export: unexpected '{sep or 'EOF'}' after '{key}'")
+
+
+def snowflake_to_ms(snowflake: Union[str, int]) -> int:
+    """Creation time (ms since the Unix epoch, UTC) encoded in a Discord snowflake id."""
+    return (int(snowflake) >> 22) + DISCORD_EPOCH_MS
+
+
+def read_export_channel(input_file: Union[str, Path]) -> Any:
+    """Return the ``channel`` object of an export, reading only as far as it appears."""
+    for key, value in iter_export(input_file):
+        if key == "channel":
+            return value
+        if key == "message":
+            break
+    return None
+
+
+def parse_timestamp(timestamp_str: str) -> datetime:
+    """Parse timestamp with variable precision in fractional seconds."""
+    try:
+        # First try standard ISO format
+        return datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            # Handle variable precision in fractional seconds
+            date_part, tz_part = timestamp_str.rsplit("-", 1)
+            # Ensure consistent precision for fractional seconds
+            if "." in date_part:
+                base, frac = date_part.rsplit(".", 1)
+                # Pad to 6 digits (microseconds)
+                frac = frac.ljust(6, "0")
+                date_part = f"{base}.{frac}"
+            # Reassemble with timezone
+            normalized_timestamp = f"{date_part}-{tz_part}"
+            return datetime.fromisoformat(normalized_timestamp)
+        except Exception as e:
+            logger.error("Error parsing timestamp '%s': %s", timestamp_str, e)
+            raise
+
+
+def timestamp_offset_ms(timestamp_str: str) -> Optional[int]:
+    """UTC offset of an ISO timestamp in ms, read from its suffix; None if it has none."""
+    if timestamp_str.endswith("Z"):
+        return 0
+    suffix = timestamp_str[-6:]
+    offset = _offset_cache.get(suffix)
+    if offset is None:
+        if len(suffix) != 6 or suffix[0] not in "+-" or suffix[3] != ":":
+            return None
+        try:
+            offset = (int(suffix[1:3]) * 60 + int(suffix[4:6])) * 60_000
+        except ValueError:
+            return None
+        if suffix[0] == "-":
+            offset = -offset
+        _offset_cache[suffix] = offset
+    return offset
+
+
+def day_label(day_index: int) -> str:
+    """'YYYY-MM-DD' for a day number counted from 1970-01-01."""
+    label = _day_label_cache.get(day_index)
+    if label is None:
+        label = _day_label_cache[day_index] = date.fromordinal(_EPOCH_ORDINAL + day_index).isoformat()
+    return label
+
+
+def local_time_ms(message_id: Union[str, int], timestamp_str: str) -> int:
+    """
+    Message time in ms since the epoch, on the wall clock of its own timestamp.
+
+    The time comes from the snowflake id plus the timestamp's UTC offset, which avoids
+    a full ISO parse per message. Ids that are not snowflakes (or disagree with the
+    timestamp's date) fall back to parse_timestamp.
+    """
+    offset = timestamp_offset_ms(timestamp_str)
+    if offset is not None:
+        try:
+            local_ms = snowflake_to_ms(message_id) + offset
+        except (TypeError, ValueError):
+            local_ms = None
+        if local_ms is not None and day_label(local_ms // DAY_MS) == timestamp_str[:10]:
+            return local_ms
+    ts = parse_timestamp(timestamp_str)
+    return (ts.replace(tzinfo=None) - _EPOCH) // timedelta(milliseconds=1)
+
+
+def utc_time_ms(message_id: Union[str, int], timestamp_str: str) -> int:
+    """Message time in ms since the Unix epoch (UTC); see local_time_ms."""
+    offset = timestamp_offset_ms(timestamp_str)
+    if offset is None:
+        return int(parse_timestamp(timestamp_str).timestamp() * 1000)
+    return local_time_ms(message_id, timestamp_str) - offset
+
+
+def clean_message(message: Dict[str, Any], user_map: Dict[str, Any]) -> Dict[str, Any]:
+    """Create minimal message format, omitting null/empty fields."""
+    user_id = message["author"]["id"]
+
+    # Add user to map if not exists, only including non-empty fields
+    if user_id not in user_map:
+        user_data = {}
+        if name := message["author"].get("name"):
+            user_data["name"] = name
+        if nickname := message["author"].get("nickname"):
+            user_data["nickname"] = nickname
+        if roles := [r["name"] for r in message["author"].get("roles", []) if r.get("name")]:
+            user_data["roles"] = roles
+        if message["author"].get("isBot"):
+            user_data["isBot"] = True
+
+        user_map[user_id] = user_data
+
+    # Build message dict only with non-null values
+    msg = {
+        "id": message["id"],
+        "ts": message["timestamp"],
+        "uid": user_id,
+        "content": message["content"],
+    }
+
+    # Only add optional fields if they have values
+    if message_type := message.get("type"):
+        if message_type != "Default":  # Don't include if it's Default
+            msg["type"] = message_type
+
+    if edited := message.get("timestampEdited"):
+        msg["edited"] = edited
+
+    if mentions := [m["id"] for m in message.get("mentions", []) if m.get("id")]:
+        msg["mentions"] = mentions
+
+    if ref := (message.get("reference") or {}).get("messageId"):
+        msg["ref"] = ref
+
+    if reactions := message.get("reactions"):
+        cleaned_reactions = [{"emoji": r["emoji"].get("name"), "count": r["count"]} for r in reactions]
+        if cleaned_reactions:
+            msg["reactions"] = cleaned_reactions
+
+    return msg
+
+
+def extract_channel_info(channel: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the channel fields the simplified files need."""
+    channel_info = {"id": channel["id"]}
+    if name := channel.get("name"):
+        channel_info["name"] = name
+    if topic := channel.get("topic"):
+        channel_info["topic"] = topic
+    if category := channel.get("category"):
+        channel_info["category"] = category
+    return channel_info
+
+
+def format_hhmm(ts_raw: Optional[str]) -> str:
+    """
+    ``HH:MM`` of a message timestamp on its own clock, as
+    ``dateutil.parser.parse(ts).strftime("%H:%M")`` would print it.
+
+    ISO-8601 timestamps carry the wall-clock minute at a fixed position, so the result
+    is memoized per ``YYYY-MM-DDTHH:MM`` prefix; anything else goes through dateutil.
+    """
+    if not ts_raw:
+        return ""
+    prefix = ts_raw[:16]
+    hhmm = _hhmm_cache.get(prefix)
+    if hhmm is not None:
+        return hhmm
+    if not _ISO_MINUTE.fullmatch(prefix):
+        try:
+            return dateutil.parser.parse(ts_raw).strftime("%H:%M")
+        except Exception:
+            return ts_raw
+    if len(_hhmm_cache) >= _HHMM_CACHE_LIMIT:
+        _hhmm_cache.clear()
+    hhmm = _hhmm_cache[prefix] = prefix[11:]
+    return hhmm
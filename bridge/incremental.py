@@ -0,0 +1,75 @@
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from bridge.llm import LLMAnalysis, analysis_from_dict, analysis_to_dict
+
+_UNSAFE = re.compile(r"[^\w.-]+")
+
+
+def message_sequence(message: Dict[str, Any]) -> Optional[int]:
+    """Numeric (snowflake) id of a message; None when it has no usable id."""
+    try:
+        return int(message.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+
+class NewMessages:
+    """
+    Iterate over the messages whose id is greater than ``after`` while recording the
+    largest id seen, so the stream can be consumed lazily by the chunker.
+
+    Messages without a numeric id cannot be placed relative to ``after`` and are
+    always treated as new.
+    """
+
+    def __init__(self, messages: Iterable[Dict[str, Any]], after: Optional[int] = None):
+        self.messages = messages
+        self.after = after
+        self.last_id = after
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for message in self.messages:
+            seq = message_sequence(message)
+            if seq is not None:
+                if self.after is not None and seq <= self.after:
+                    continue
+                if self.last_id is None or seq > self.last_id:
+                    self.last_id = seq
+            self.count += 1
+            yield message
+
+
+class IncrementalState:
+    """
+    Last analyzed message id and the analysis so far, per (channel, date).
+
+    Entries live in <directory>/<channel>/<date>.json, so re-running a day that is still
+    growing only sends the messages that arrived since the previous run.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+
+    def _path(self, channel: str, date: str) -> Path:
+        return self.directory / _UNSAFE.sub("_", channel) / f"{_UNSAFE.sub('_', date)}.json"
+
+    def get(self, channel: str, date: str) -> Optional[Tuple[int, LLMAnalysis]]:
+        try:
+            data = json.loads(self._path(channel, date).read_text(encoding="utf-8"))
+            return int(data["lastMessageId"]), analysis_from_dict(data["analysis"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, channel: str, date: str, last_message_id: int, analysis: LLMAnalysis) -> None:
+        path = self._path(channel, date)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        record = {"lastMessageId": str(last_message_id), "analysis": analysis_to_dict(analysis)}
+        tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
@@ -1,6 +1,22 @@
-from dataclasses import dataclass
+import asyncio
+import json
+from dataclasses import asdict, dataclass
 from typing import List, Protocol, Optional, Dict, Any
 
+# Bump when provider prompts change in a way that should invalidate cached analyses.
+PROMPT_VERSION = "3"
+
+# Rough characters per token for budget estimates, per LANG. Hangul text packs far
+# fewer characters into a token than English does.
+CHARS_PER_TOKEN: Dict[str, float] = {"en": 4.0, "ko": 1.5}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str, lang: str = "en", chars_per_token: Optional[float] = None) -> int:
+    """Cheap token estimate from the character count (no tokenizer dependency)."""
+    ratio = chars_per_token or CHARS_PER_TOKEN.get(lang, DEFAULT_CHARS_PER_TOKEN)
+    return int(len(text) / ratio) + 1
+
 
 @dataclass
 class ChatQuestion:
@@ -31,6 +47,139 @@ class LLMAnalysis:
     action_items: List[ActionItem]
 
 
+def analysis_to_dict(analysis: LLMAnalysis) -> Dict[str, Any]:
+    return asdict(analysis)
+
+
+def analysis_from_dict(data: Dict[str, Any]) -> LLMAnalysis:
+    return LLMAnalysis(
+        summary=data.get("summary", ""),
+        faq=[ChatQuestion(**item) for item in data.get("faq", [])],
+        help_interactions=[ChatHelp(**item) for item in data.get("help_interactions", [])],
+        action_items=[ActionItem(**item) for item in data.get("action_items", [])],
+    )
+
+
+def previous_analysis_prompt(previous: Optional[LLMAnalysis]) -> str:
+    """
+    Prompt section for incremental runs: the analysis of the messages already seen,
+    to be placed before the transcript of the new ones. Empty when there is none.
+    """
+    if previous is None:
+        return ""
+    return (
+        "Earlier messages of this conversation were already analyzed as below. Return summary as an "
+        "updated summary of the whole conversation (the previous summary revised with what the new "
+        "transcript adds), not only the new part. For faq, help_interactions and action_items, report "
+        "only new items and do not repeat the ones listed here.\n"
+        f"Previous analysis:\n{json.dumps(analysis_to_dict(previous), ensure_ascii=False)}\n\n"
+    )
+
+
+def rollup_prompt(transcript: str, lang: str = "en") -> str:
+    """
+    Prompt for bridge.rollup (metadata["rollup"]): the transcript is one summary per day,
+    and only a condensed summary of the whole period is asked for.
+    """
+    return (
+        "You are Discord Bridge. Below are the daily summaries of one Discord channel over a period. "
+        "Condense them into one summary of the whole period: the main topics, decisions and open issues, "
+        f"without repeating day-by-day details. Write it in {lang.title()}.\n"
+        'Respond with JSON only: {"summary": "..."}\n\n'
+        f"{transcript}\n"
+    )
+
+
 class LLMProvider(Protocol):
     def analyze(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
         ...
+
+    async def analyze_async(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        """Async analyze; providers that subclass LLMProvider inherit this thread-backed default."""
+        return await asyncio.to_thread(self.analyze, transcript, metadata)
+
+
+async def analyze_async(
+    provider: LLMProvider, transcript: str, metadata: Optional[Dict[str, Any]] = None
+) -> LLMAnalysis:
+    """provider.analyze_async when it has one (duck-typed providers may not), else analyze in a thread."""
+    method = getattr(provider, "analyze_async", None)
+    if method is not None:
+        return await method(transcript, metadata)
+    return await asyncio.to_thread(provider.analyze, transcript, metadata)
+
+
+# Context windows (tokens) by model name prefix; the longest matching prefix wins.
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+    "o1": 128_000,
+    "o3": 200_000,
+    "gemini-1.5": 1_000_000,
+    "gemini-2": 1_000_000,
+    "gemini": 32_768,
+    "gpt-oss": 131_072,
+    "llama3.1": 131_072,
+    "llama3": 8_192,
+    "phi3": 4_096,
+    "phi4": 16_384,
+}
+# Ollama serves unknown local models with a small default num_ctx.
+DEFAULT_CONTEXT_WINDOW = 4_096
+PROMPT_OVERHEAD_TOKENS = 500  # instructions around the transcript
+
+
+def model_context_window(model: str, configured: Optional[int] = None) -> int:
+    """Context window of a model: the configured value, else a known prefix, else the default."""
+    if configured:
+        return configured
+    name = (model or "").lower().split("/")[-1]
+    for prefix in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if name.startswith(prefix):
+            return MODEL_CONTEXT_WINDOWS[prefix]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def chunk_token_budget(context_window: int) -> int:
+    """Transcript tokens per request: the context minus the prompt and room for the JSON answer."""
+    reserve = min(context_window // 4, 4_096)
+    return max(context_window - reserve - PROMPT_OVERHEAD_TOKENS, 256)
+
+
+def _dedup_key(*parts: str) -> tuple:
+    return tuple(" ".join(p.lower().split()) for p in parts)
+
+
+def merge_analyses(analyses: List[LLMAnalysis]) -> LLMAnalysis:
+    """
+    Reduce step for chunked analysis: keep the first occurrence of every FAQ, help
+    interaction and action item (compared case- and whitespace-insensitively) and join
+    the distinct chunk summaries in order.
+    """
+    summaries: List[str] = []
+    merged = LLMAnalysis(summary="", faq=[], help_interactions=[], action_items=[])
+    seen: set = set()
+    for analysis in analyses:
+        summary = analysis.summary.strip()
+        if summary and summary not in summaries:
+            summaries.append(summary)
+        for q in analysis.faq:
+            key = ("faq",) + _dedup_key(q.question, q.asker)
+            if key not in seen:
+                seen.add(key)
+                merged.faq.append(q)
+        for h in analysis.help_interactions:
+            key = ("help",) + _dedup_key(h.helper, h.recipient, h.task)
+            if key not in seen:
+                seen.add(key)
+                merged.help_interactions.append(h)
+        for a in analysis.action_items:
+            key = ("action",) + _dedup_key(a.description, a.mentioned_by)
+            if key not in seen:
+                seen.add(key)
+                merged.action_items.append(a)
+    merged.summary = "\n\n".join(summaries)
+    return merged
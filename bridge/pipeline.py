@@ -1,24 +1,117 @@
+import json
+from html import escape
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-import dateutil.parser
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 
-from bridge.llm import LLMProvider, LLMAnalysis
+from bridge.aio import async_http_available, run_async
+from bridge.concurrency import bounded_gather, bounded_map
+from bridge.compact import compact_transcript, expand_aliases
+from bridge.exports import format_hhmm
+from bridge.incremental import IncrementalState, NewMessages
+from bridge.relevance import select_relevant
+from bridge.threads import group_conversations, pack_conversations
+from bridge.llm import (
+    LLMProvider,
+    LLMAnalysis,
+    analysis_from_dict,
+    analysis_to_dict,
+    analyze_async,
+    chunk_token_budget,
+    estimate_tokens,
+    merge_analyses,
+    model_context_window,
+)
 
 
-def format_messages(messages: List[Dict[str, Any]], users: Dict[str, Any]) -> str:
-    """Turn message list into readable transcript."""
-    lines = []
+# Message fields bridge.threads.group_conversations reads.
+_THREAD_FIELDS = ("id", "ref", "uid", "ts", "mentions")
+
+
+def format_messages(messages: Iterable[Dict[str, Any]], users: Optional[Dict[str, Any]]) -> str:
+    """Turn message list into readable transcript.
+
+    ``messages`` may be a lazy iterator (``load_chat(path, stream=True)``); lines are
+    formatted as messages are read. ``users`` may be a per-file map that only covers
+    this file's participants, a channel-wide map, or the ``users.json`` sidecar
+    resolved by ``bridge.chatfile``.
+    """
+    users = users or {}
+    return "\n".join(_format_line(msg, users) for msg in messages)
+
+
+def chunk_transcript(
+    messages: Iterable[Dict[str, Any]],
+    users: Optional[Dict[str, Any]],
+    max_tokens: int,
+    lang: str = "en",
+    compact: bool = False,
+    max_total_tokens: Optional[int] = None,
+    role_weights: Optional[Dict[str, float]] = None,
+) -> List[str]:
+    """Format messages into transcripts of at most ~max_tokens estimated tokens each.
+
+    A transcript that fits the budget stays one chunk. Otherwise messages are grouped
+    into conversations (replies, mentions, same-author runs; see bridge.threads) and
+    whole conversations are packed into chunks, so related messages are analyzed
+    together. Lines keep their chronological order inside a chunk and are never
+    split; a single line above the budget becomes its own chunk.
+
+    With compact=True each chunk is rendered by bridge.compact.compact_transcript;
+    budgets are still measured on the plain lines, which compaction only shortens.
+
+    When the whole transcript exceeds max_total_tokens, only the most relevant
+    messages that fit it are kept (bridge.relevance.select_relevant), in order;
+    role_weights overrides bridge.relevance.ROLE_WEIGHTS for that scoring.
+    """
+    return [text for text, _ in _chunks(messages, users, max_tokens, lang, compact, max_total_tokens, role_weights)]
+
+
+def _chunks(
+    messages: Iterable[Dict[str, Any]],
+    users: Optional[Dict[str, Any]],
+    max_tokens: int,
+    lang: str = "en",
+    compact: bool = False,
+    max_total_tokens: Optional[int] = None,
+    role_weights: Optional[Dict[str, float]] = None,
+) -> List[Tuple[str, Dict[str, str]]]:
+    """chunk_transcript with each chunk's compact speaker handles ({handle: name}; empty when plain)."""
+    users = users or {}
+    # One lazy pass: lines are formatted as messages are read. Full message dicts are only
+    # kept when a later step needs their content (compaction, relevance selection); the
+    # conversation graph needs just the thread fields, and is built only when over budget.
+    keep_messages = compact or max_total_tokens is not None
+    records: List[Dict[str, Any]] = []
+    lines: List[str] = []
+    costs: List[int] = []
+    total = 0
     for msg in messages:
-        user = users.get(msg.get("uid"), {})
-        username = user.get("nickname") or user.get("name") or "Unknown User"
-        ts_raw = msg.get("ts")
-        try:
-            ts = dateutil.parser.parse(ts_raw).strftime("%H:%M")
-        except Exception:
-            ts = ts_raw or ""
-        content = msg.get("content", "")
-        lines.append(f"{username} ({ts}): {content}")
-    return "\n".join(lines)
+        line = _format_line(msg, users)
+        lines.append(line)
+        costs.append(estimate_tokens(line, lang))
+        total += costs[-1]
+        records.append(msg if keep_messages else {k: msg[k] for k in _THREAD_FIELDS if k in msg})
+    if max_total_tokens is not None and total > max_total_tokens:
+        keep = select_relevant(records, users, costs, max_total_tokens, role_weights)
+        records = [records[i] for i in keep]
+        lines = [lines[i] for i in keep]
+        costs = [costs[i] for i in keep]
+        total = sum(costs)
+    if total <= max_tokens:
+        packed = [list(range(len(records)))]
+    else:
+        packed = pack_conversations(group_conversations(records), costs.__getitem__, max_tokens)
+    if compact:
+        return [compact_transcript([records[i] for i in chunk], users) for chunk in packed]
+    return [("\n".join(lines[i] for i in chunk), {}) for chunk in packed]
+
+
+def _format_line(msg: Dict[str, Any], users: Dict[str, Any]) -> str:
+    user = users.get(msg.get("uid"), {})
+    username = user.get("nickname") or user.get("name") or "Unknown User"
+    ts = format_hhmm(msg.get("ts"))
+    content = msg.get("content", "")
+    return f"{username} ({ts}): {content}"
 
 
 def analysis_to_markdown(analysis: LLMAnalysis, channel_name: str, date_label: str) -> str:
@@ -43,23 +136,211 @@ def analysis_to_markdown(analysis: LLMAnalysis, channel_name: str, date_label: s
     return "\n".join(parts) + "\n"
 
 
+def analysis_to_html(analysis: LLMAnalysis, channel_name: str, date_label: str) -> str:
+    def items(lines: List[str]) -> str:
+        return "<ul>\n" + "\n".join(f"<li>{escape(line)}</li>" for line in lines or ["None"]) + "\n</ul>"
+
+    return "\n".join(
+        [
+            f"<h1>{escape(channel_name)} {escape(date_label)}</h1>",
+            "<h2>Summary</h2>",
+            "\n".join(f"<p>{escape(p)}</p>" for p in analysis.summary.split("\n\n") if p.strip()),
+            "<h2>FAQ</h2>",
+            items([f"{q.question} (asked by {q.asker})" for q in analysis.faq]),
+            "<h2>Who Helped Who</h2>",
+            items(
+                [
+                    f"{h.helper} helped {h.recipient} with {h.task} by providing {h.assistance}"
+                    for h in analysis.help_interactions
+                ]
+            ),
+            "<h2>Action Items</h2>",
+            items([f"[{a.type}] {a.description} (by {a.mentioned_by})" for a in analysis.action_items]),
+        ]
+    ) + "\n"
+
+
+# Output formats of `bridge.cli render`, by file extension.
+RENDERERS: Dict[str, Callable[[LLMAnalysis, str, str], str]] = {
+    "md": analysis_to_markdown,
+    "html": analysis_to_html,
+}
+
+SIDECAR_VERSION = 1
+
+
+def sidecar_path(markdown_path: Path) -> Path:
+    """The structured analysis saved next to a report: <name>.md -> <name>.json."""
+    return markdown_path.with_suffix(".json")
+
+
+def write_analysis_sidecar(path: Path, analysis: LLMAnalysis, channel: Dict[str, Any], date_label: str) -> None:
+    record = {
+        "version": SIDECAR_VERSION,
+        "channel": channel,
+        "date": date_label,
+        "analysis": analysis_to_dict(analysis),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(record, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def load_analysis_sidecar(path: Path) -> Dict[str, Any]:
+    """A sidecar written by run_pipeline, with ``analysis`` decoded to an LLMAnalysis."""
+    record = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(record, dict) or record.get("version") != SIDECAR_VERSION or "analysis" not in record:
+        raise ValueError(f"{path} is not an analysis sidecar")
+    record["analysis"] = analysis_from_dict(record["analysis"])
+    return record
+
+
+def _analyze_chunks(
+    chunks: List[Tuple[str, Dict[str, str]]],
+    provider: LLMProvider,
+    metadata: Dict[str, Any],
+    max_concurrency: int,
+    progress: Optional[Callable[[int, int], None]],
+) -> LLMAnalysis:
+    # Every chunk's analysis gets its own speaker handles expanded before the merge.
+    if len(chunks) == 1:
+        text, aliases = chunks[0]
+        analysis = expand_aliases(provider.analyze(text, metadata=metadata), aliases)
+        if progress:
+            progress(1, 1)
+        return analysis
+    done = 0
+
+    def on_result(index: int, _: LLMAnalysis) -> None:
+        nonlocal done
+        done += 1
+        if progress:
+            progress(done, len(chunks))
+
+    items = list(enumerate(chunks))
+
+    def chunk_metadata(index: int) -> Dict[str, Any]:
+        return {**metadata, "chunk": index + 1, "chunks": len(chunks)}
+
+    def analyze(item: Tuple[int, Tuple[str, Dict[str, str]]]) -> LLMAnalysis:
+        index, (text, aliases) = item
+        return expand_aliases(provider.analyze(text, metadata=chunk_metadata(index)), aliases)
+
+    async def analyze_on_loop(item: Tuple[int, Tuple[str, Dict[str, str]]]) -> LLMAnalysis:
+        index, (text, aliases) = item
+        return expand_aliases(await analyze_async(provider, text, chunk_metadata(index)), aliases)
+
+    if max_concurrency > 1 and async_http_available():
+        # One event loop and pooled connection set for the whole fan-out, no thread per chunk.
+        return merge_analyses(run_async(bounded_gather(analyze_on_loop, items, max_concurrency, on_result)))
+    return merge_analyses(bounded_map(analyze, items, max_concurrency, on_result))
+
+
+def _update_chunks(
+    chunks: List[Tuple[str, Dict[str, str]]],
+    provider: LLMProvider,
+    metadata: Dict[str, Any],
+    previous: LLMAnalysis,
+    progress: Optional[Callable[[int, int], None]],
+) -> LLMAnalysis:
+    """
+    Incremental counterpart of _analyze_chunks. Each chunk returns an updated summary of
+    the whole day, so chunks run in order and each one gets the analysis so far as its
+    previous_analysis. The last chunk's summary is the day's summary; new items are merged.
+    """
+    analysis = previous
+    for index, (text, aliases) in enumerate(chunks):
+        chunk_metadata = {**metadata, "previous_analysis": analysis}
+        if len(chunks) > 1:
+            chunk_metadata.update(chunk=index + 1, chunks=len(chunks))
+        update = expand_aliases(provider.analyze(text, metadata=chunk_metadata), aliases)
+        merged = merge_analyses([analysis, update])
+        merged.summary = update.summary.strip() or analysis.summary
+        analysis = merged
+        if progress:
+            progress(index + 1, len(chunks))
+    return analysis
+
+
 def run_pipeline(
     chat_data: Dict[str, Any],
     provider: LLMProvider,
     output_path: Optional[Path] = None,
     metadata: Optional[Dict[str, Any]] = None,
+    max_chunk_tokens: Optional[int] = None,
+    max_concurrency: int = 1,
+    progress: Optional[Callable[[int, int], None]] = None,
+    state: Optional[IncrementalState] = None,
+    compact: bool = False,
+    max_input_tokens: Optional[int] = None,
+    role_weights: Optional[Dict[str, float]] = None,
 ) -> str:
     """
     Core orchestration: format transcript -> LLM analyze -> markdown -> optional save.
+
+    Saving writes the Markdown to output_path and the LLMAnalysis to a JSON sidecar
+    next to it (sidecar_path), so reports can be re-rendered without the LLM.
+
+    Transcripts larger than one request are analyzed map-reduce style: they are split
+    into chunks of max_chunk_tokens estimated tokens (by default sized from the
+    provider model's context window, see bridge.llm.chunk_token_budget), each chunk is
+    analyzed on its own, and the partial analyses are merged with
+    bridge.llm.merge_analyses. Up to max_concurrency chunks are analyzed at once;
+    the merge always sees them in transcript order. progress(done, total) is called
+    after each chunk.
+
+    With a state store, the run is incremental: only messages newer than the last one
+    analyzed for this (channel, date) are sent, with the stored analysis passed to the
+    provider as ``metadata["previous_analysis"]``. The provider's summary, written for
+    the whole day, replaces the stored one; new FAQ, help and action items are merged in.
+    When the new messages span several chunks, they are sent one after another, each
+    with the analysis so far, so the day keeps a single summary.
+    A day with no new messages is rendered from the stored analysis without an LLM call.
+
+    compact=True sends transcripts in the shorter bridge.compact format, and
+    max_input_tokens caps the transcript sent per run by keeping only the most
+    relevant messages, scored with role_weights (see chunk_transcript).
     """
-    transcript = format_messages(chat_data.get("messages", []), chat_data.get("users", {}))
     base_metadata = {"channel": chat_data.get("channel"), "date": chat_data.get("date")}
     if metadata:
         base_metadata.update(metadata)
-    analysis = provider.analyze(transcript, metadata=base_metadata)
+    if max_chunk_tokens is None:
+        max_chunk_tokens = chunk_token_budget(model_context_window(getattr(provider, "model", "")))
+
+    messages = chat_data.get("messages", [])
+    previous = None
+    if state is not None:
+        channel = chat_data.get("channel") or {}
+        state_key = (str(channel.get("id") or channel.get("name") or "channel"), str(chat_data.get("date", "")))
+        entry = state.get(*state_key)
+        after = None
+        if entry is not None:
+            after, previous = entry
+        messages = NewMessages(messages, after)
+
+    chunks = _chunks(
+        messages,
+        chat_data.get("users", {}),
+        max_chunk_tokens,
+        base_metadata.get("lang", "en"),
+        compact,
+        max_input_tokens,
+        role_weights,
+    )
+    if previous is None:
+        analysis = _analyze_chunks(chunks, provider, base_metadata, max_concurrency, progress)
+    elif messages.count == 0:
+        analysis = previous
+    else:
+        analysis = _update_chunks(chunks, provider, base_metadata, previous, progress)
+    if state is not None and messages.last_id is not None:
+        state.put(*state_key, messages.last_id, analysis)
+
     markdown = analysis_to_markdown(analysis, chat_data.get("channel", {}).get("name", "Unknown"), chat_data.get("date", ""))
 
     if output_path:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         output_path.write_text(markdown, encoding="utf-8")
+        write_analysis_sidecar(
+            sidecar_path(output_path), analysis, chat_data.get("channel") or {}, chat_data.get("date", "")
+        )
     return markdown
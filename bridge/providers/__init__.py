@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Any, Dict
 
 from bridge.config import LLMConfig
 from bridge.llm import LLMProvider
@@ -19,4 +19,10 @@ def create_provider(cfg: LLMConfig) -> LLMProvider:
     provider_cls = _PROVIDERS.get(cfg.provider.lower())
     if not provider_cls:
         raise ValueError(f"Unsupported provider '{cfg.provider}'")
-    return provider_cls(model=cfg.model, api_key=cfg.api_key, base_url=cfg.base_url)
+    options: Dict[str, Any] = {}
+    if getattr(cfg, "stream", False) and getattr(provider_cls, "supports_streaming", False):
+        options["stream"] = True
+    if provider_cls is OllamaProvider:
+        options["context_window"] = getattr(cfg, "context_window", None)
+        options["keep_alive"] = getattr(cfg, "keep_alive", None)
+    return provider_cls(model=cfg.model, api_key=cfg.api_key, base_url=cfg.base_url, **options)
@@ -1,7 +1,15 @@
 import json
 from typing import Any, Dict, Optional
 
-from bridge.llm import ChatQuestion, ChatHelp, ActionItem, LLMAnalysis, LLMProvider
+from bridge.llm import (
+    ActionItem,
+    ChatHelp,
+    ChatQuestion,
+    LLMAnalysis,
+    LLMProvider,
+    previous_analysis_prompt,
+    rollup_prompt,
+)
 
 try:
     import google.generativeai as genai
@@ -10,6 +18,12 @@ except ImportError:  # pragma: no cover
 
 
 class GoogleGeminiProvider(LLMProvider):
+    """
+    Gemini through the google-generativeai SDK. analyze and analyze_async both call
+    generateContent (GenerativeModel.generate_content / generate_content_async) and read
+    the answer with the same _response_text, so results do not depend on which path ran.
+    """
+
     def __init__(self, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None):
         if genai is None:
             raise ImportError("google-generativeai package is required for GoogleGeminiProvider")
@@ -18,18 +32,47 @@ class GoogleGeminiProvider(LLMProvider):
             genai.configure(api_key=api_key)
         self.client = genai
 
+    def _prompt(self, transcript: str, metadata: Optional[Dict[str, Any]]) -> str:
+        metadata = metadata or {}
+        return self._build_prompt(
+            transcript,
+            lang=metadata.get("lang", "en"),
+            previous=metadata.get("previous_analysis"),
+            rollup=bool(metadata.get("rollup")),
+        )
+
     def analyze(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
-        lang = metadata.get("lang", "en") if metadata else "en"
-        prompt = self._build_prompt(transcript, lang=lang)
-        response = self.client.generate_text(model=self.model, prompt=prompt)
-        content = response.text
-        return self._parse_content(content)
+        model = self.client.GenerativeModel(self.model)
+        response = model.generate_content(self._prompt(transcript, metadata))
+        return self._parse_content(self._response_text(response))
+
+    async def analyze_async(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        model = self.client.GenerativeModel(self.model)
+        response = await model.generate_content_async(self._prompt(transcript, metadata))
+        return self._parse_content(self._response_text(response))
+
+    def _response_text(self, response: Any) -> str:
+        """Text of the first candidate; ValueError when the prompt or the answer was blocked."""
+        candidates = getattr(response, "candidates", None) or []
+        if not candidates:
+            feedback = getattr(response, "prompt_feedback", None)
+            raise ValueError(f"Gemini returned no answer (prompt feedback: {feedback})")
+        parts = getattr(candidates[0].content, "parts", None) or []
+        text = "".join(getattr(part, "text", "") for part in parts)
+        if not text:
+            raise ValueError(f"Gemini returned an empty answer (finish reason: {candidates[0].finish_reason})")
+        return text
 
-    def _build_prompt(self, transcript: str, lang: str = "en") -> str:
+    def _build_prompt(
+        self, transcript: str, lang: str = "en", previous: Optional[LLMAnalysis] = None, rollup: bool = False
+    ) -> str:
+        if rollup:
+            return rollup_prompt(transcript, lang)
         return (
             "You are Discord Bridge, a focused assistant that synthesizes Discord chat transcripts "
             "into concise Markdown analyses. Produce JSON with keys: summary, faq, help_interactions, "
-            "action_items.\n\nTranscript:\n"
+            "action_items.\n\n"
+            f"{previous_analysis_prompt(previous)}Transcript:\n"
             f"{transcript}"
         )
 
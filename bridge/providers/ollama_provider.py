@@ -1,42 +1,148 @@
+import asyncio
 import json
 import logging
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
 
-from bridge.llm import ActionItem, ChatHelp, ChatQuestion, LLMAnalysis, LLMProvider
+from bridge.aio import get_async_client, http_pool_config, httpx
+from bridge.streaming import MalformedStreamError, consume_stream, consume_stream_async
+from bridge.llm import (
+    ActionItem,
+    ChatHelp,
+    ChatQuestion,
+    LLMAnalysis,
+    LLMProvider,
+    estimate_tokens,
+    model_context_window,
+    previous_analysis_prompt,
+    rollup_prompt,
+)
 
 try:
     import requests
     from requests import HTTPError
+    from requests.adapters import HTTPAdapter
 except ImportError:  # pragma: no cover
     requests = None
     HTTPError = Exception  # type: ignore
+    HTTPAdapter = None  # type: ignore
 
 logger = logging.getLogger(__name__)
 
+GENERATE = "generate"
+CHAT = "chat"
+# Statuses that mean "this server has no such endpoint", as opposed to a failed request.
+_MISSING_ENDPOINT_STATUSES = {404, 405, 501}
+
+# Working endpoint per base_url, learned once per process and shared by all providers.
+_endpoints: Dict[str, str] = {}
+_endpoints_lock = threading.Lock()
+
+# The JSON answer is sized from the prompt: a quarter of its tokens, within these bounds.
+MIN_NUM_PREDICT = 512
+MAX_NUM_PREDICT = 4_096
+# Smallest num_ctx a run picks (Ollama's own default).
+MIN_NUM_CTX = 2_048
+
+
+def _remember_endpoint(base_url: str, endpoint: str) -> None:
+    with _endpoints_lock:
+        if _endpoints.get(base_url) != endpoint:
+            logger.debug("Ollama at %s: using /api/%s", base_url, endpoint)
+            _endpoints[base_url] = endpoint
+
+
+def num_predict_for(prompt_tokens: int) -> int:
+    return min(max(prompt_tokens // 4, MIN_NUM_PREDICT), MAX_NUM_PREDICT)
+
+
+def num_ctx_for(prompt_tokens: int, context_window: int) -> int:
+    """Smallest power of two (at least MIN_NUM_CTX) holding the prompt and its answer, capped at the window."""
+    needed = prompt_tokens + num_predict_for(prompt_tokens)
+    num_ctx = MIN_NUM_CTX
+    while num_ctx < needed:
+        num_ctx *= 2
+    return min(num_ctx, context_window)
+
+
+def context_options(prompt_tokens: int, num_ctx: int) -> Dict[str, int]:
+    """Options for a prompt of prompt_tokens: the run's num_ctx and an answer budget that fits it."""
+    num_predict = num_predict_for(prompt_tokens)
+    return {"num_ctx": num_ctx, "num_predict": min(num_predict, max(num_ctx - prompt_tokens, MIN_NUM_PREDICT))}
+
+
+def _new_session(pool_size: int) -> Any:
+    """A keep-alive session whose pool holds pool_size connections per host."""
+    session = requests.Session()
+    if HTTPAdapter is not None:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    return session
+
+
+def _stream_deltas(lines: Iterable[Any], endpoint: str) -> Iterator[str]:
+    """Text deltas of an Ollama NDJSON stream (/api/generate or /api/chat)."""
+    for line in lines:
+        if not line:
+            continue
+        data = json.loads(line)
+        if data.get("error"):
+            raise ValueError(f"Ollama stream error: {data['error']}")
+        yield data.get("response", "") if endpoint == GENERATE else (data.get("message") or {}).get("content", "")
+        if data.get("done"):
+            return
+
+
+async def _astream_deltas(lines: AsyncIterator[str], endpoint: str) -> AsyncIterator[str]:
+    async for line in lines:
+        for delta in _stream_deltas([line], endpoint):
+            yield delta
+
 
 class OllamaProvider(LLMProvider):
+    supports_streaming = True
+
     def __init__(
         self,
         model: str,
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
         temperature: float = 0.2,
+        stream: bool = False,
+        context_window: Optional[int] = None,
+        keep_alive: Optional[str] = None,
     ):
         if requests is None:
             raise ImportError("requests package is required for OllamaProvider")
         self.model = model
-        self.base_url = base_url or "http://127.0.0.1:11434"
+        self.base_url = (base_url or "http://127.0.0.1:11434").rstrip("/")
         self.temperature = temperature
         self.api_key = api_key
+        self.stream = stream
+        # Ollama reloads a model whenever num_ctx changes, so a run uses one num_ctx: the full
+        # window when LLM_CONTEXT_WINDOW is set, else sized from the largest prompt
+        # (size_context) and capped at the model's window, which chunks are budgeted against.
+        self.context_window = model_context_window(model, context_window)
+        self.num_ctx: Optional[int] = self.context_window if context_window else None
+        self._num_ctx_lock = threading.Lock()
+        self.keep_alive = keep_alive  # e.g. "30m" or "-1"; None leaves the server default (5m)
+        self.timeout = http_pool_config().timeout
+        self.session = _new_session(http_pool_config().max_connections)
 
-    def _build_prompt(self, transcript: str, lang: str = "en") -> str:
+    def _build_prompt(
+        self, transcript: str, lang: str = "en", previous: Optional[LLMAnalysis] = None, rollup: bool = False
+    ) -> str:
+        if rollup:
+            return rollup_prompt(transcript, lang)
         return f"""
 You are Discord Bridge, a focused assistant that synthesizes Discord chat transcripts into concise Markdown analyses in {lang.title()}.
 Return JSON with keys: summary, faq, help_interactions, action_items.
 Prioritize technical discussions, highlight decisions, and skip fluff.
 Respond with JSON only (no code fences or extra commentary).
 
-Transcript:
+{previous_analysis_prompt(previous)}Transcript:
 {transcript}
 """
 
@@ -45,8 +151,32 @@ Transcript:
             return {}
         return {"Authorization": f"Bearer {self.api_key}"}
 
-    def _post_chat(self, prompt: str) -> str:
-        payload = {
+    def size_context(self, prompt_tokens: int) -> int:
+        """
+        Pick the run's num_ctx for prompts of up to prompt_tokens (see num_ctx_for), before
+        warm_up. It only grows: a later, larger prompt raises it (and Ollama reloads the model).
+        """
+        with self._num_ctx_lock:
+            needed = num_ctx_for(prompt_tokens, self.context_window)
+            if self.num_ctx is None or needed > self.num_ctx:
+                if self.num_ctx is not None:
+                    logger.info(
+                        "Ollama: a %d-token prompt needs num_ctx %d (was %d)", prompt_tokens, needed, self.num_ctx
+                    )
+                self.num_ctx = needed
+            return self.num_ctx
+
+    def _options(self, prompt: str, lang: str = "en") -> Dict[str, int]:
+        prompt_tokens = estimate_tokens(prompt, lang)
+        return context_options(prompt_tokens, self.size_context(prompt_tokens))
+
+    def _with_keep_alive(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def _chat_payload(self, prompt: str, options: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        return self._with_keep_alive({
             "model": self.model,
             "messages": [
                 {"role": "system", "content": "You produce structured summaries from Discord transcripts"},
@@ -54,16 +184,10 @@ Transcript:
             ],
             "temperature": self.temperature,
             "stream": False,
-            "options": {"num_predict": 512},
-        }
-        response = requests.post(
-            f"{self.base_url}/api/chat",
-            json=payload,
-            headers=self._headers(),
-            timeout=120,
-        )
-        response.raise_for_status()
-        content = response.json()
+            "options": options or self._options(prompt),
+        })
+
+    def _chat_message(self, content: Dict[str, Any]) -> str:
         message = (
             content.get("message", {})
             or content.get("choices", [{}])[0].get("message", {})
@@ -72,42 +196,185 @@ Transcript:
             raise ValueError("Ollama chat response did not include message content")
         return message
 
-    def _post_generate(self, prompt: str) -> str:
-        payload = {
+    def _generate_payload(self, prompt: str, options: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        return self._with_keep_alive({
             "model": self.model,
             "prompt": prompt,
             "temperature": self.temperature,
             "stream": False,
-            "options": {"num_predict": 512},
-        }
-        response = requests.post(
-            f"{self.base_url}/api/generate",
-            json=payload,
-            headers=self._headers(),
-            timeout=120,
-        )
-        response.raise_for_status()
-        content = response.json()
+            "options": options or self._options(prompt),
+        })
+
+    def _generate_message(self, content: Dict[str, Any]) -> str:
         message = content.get("response", "")
         if not message:
             raise ValueError("Ollama generate response did not include response text")
         return message
 
+    def _post(self, endpoint: str, payload: Dict[str, Any], on_delta: Optional[Callable[[int], None]] = None) -> str:
+        url = f"{self.base_url}/api/{endpoint}"
+        if self.stream:
+            try:
+                return self._post_stream(url, endpoint, payload, on_delta)
+            except MalformedStreamError as exc:
+                logger.info("Ollama %s: %s; re-reading the completion without streaming", endpoint, exc)
+        response = self.session.post(url, json=payload, headers=self._headers(), timeout=self.timeout)
+        response.raise_for_status()
+        return (self._generate_message if endpoint == GENERATE else self._chat_message)(response.json())
+
+    def _post_stream(
+        self, url: str, endpoint: str, payload: Dict[str, Any], on_delta: Optional[Callable[[int], None]]
+    ) -> str:
+        started = time.perf_counter()
+        response = self.session.post(
+            url, json={**payload, "stream": True}, headers=self._headers(), timeout=self.timeout, stream=True
+        )
+        try:
+            response.raise_for_status()
+            text, _ = consume_stream(_stream_deltas(response.iter_lines(), endpoint), started, on_delta)
+        finally:
+            response.close()  # stops the server generating past the closing brace
+        if not text:
+            raise ValueError(f"Ollama {endpoint} stream did not include any content")
+        return text
+
+    async def _apost(
+        self,
+        client: Any,
+        endpoint: str,
+        payload: Dict[str, Any],
+        on_delta: Optional[Callable[[int], None]] = None,
+    ) -> str:
+        url = f"{self.base_url}/api/{endpoint}"
+        if self.stream:
+            try:
+                return await self._apost_stream(client, url, endpoint, payload, on_delta)
+            except MalformedStreamError as exc:
+                logger.info("Ollama %s: %s; re-reading the completion without streaming", endpoint, exc)
+        response = await client.post(url, json=payload, headers=self._headers())
+        response.raise_for_status()
+        return (self._generate_message if endpoint == GENERATE else self._chat_message)(response.json())
+
+    async def _apost_stream(
+        self,
+        client: Any,
+        url: str,
+        endpoint: str,
+        payload: Dict[str, Any],
+        on_delta: Optional[Callable[[int], None]],
+    ) -> str:
+        started = time.perf_counter()
+        async with client.stream("POST", url, json={**payload, "stream": True}, headers=self._headers()) as response:
+            response.raise_for_status()
+            text, _ = await consume_stream_async(_astream_deltas(response.aiter_lines(), endpoint), started, on_delta)
+        if not text:
+            raise ValueError(f"Ollama {endpoint} stream did not include any content")
+        return text
+
+    def _post_chat(
+        self,
+        prompt: str,
+        on_delta: Optional[Callable[[int], None]] = None,
+        options: Optional[Dict[str, int]] = None,
+    ) -> str:
+        return self._post(CHAT, self._chat_payload(prompt, options), on_delta)
+
+    def _post_generate(
+        self,
+        prompt: str,
+        on_delta: Optional[Callable[[int], None]] = None,
+        options: Optional[Dict[str, int]] = None,
+    ) -> str:
+        return self._post(GENERATE, self._generate_payload(prompt, options), on_delta)
+
+    def warm_up(self) -> threading.Thread:
+        """
+        Load the model in a background thread (an empty /api/generate request) so the
+        first analysis does not pay the load time. Uses the num_ctx and keep_alive of the
+        later requests, so they reuse the loaded model; call size_context first, else the
+        smallest num_ctx is loaded. Failures are only logged.
+        """
+        options = {"num_ctx": self.size_context(0)}
+
+        def run() -> None:
+            payload = self._with_keep_alive({"model": self.model, "prompt": "", "options": options})
+            started = time.perf_counter()
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/api/generate", json=payload, headers=self._headers(), timeout=self.timeout
+                )
+                response.raise_for_status()
+            except Exception as exc:  # warm-up is best effort; the real request reports errors
+                logger.debug("Ollama warm-up of %s failed: %s", self.model, exc)
+                return
+            logger.debug("Ollama warm-up of %s took %.1fs", self.model, time.perf_counter() - started)
+
+        thread = threading.Thread(target=run, name=f"ollama-warm-up-{self.model}", daemon=True)
+        thread.start()
+        return thread
+
     def analyze(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
         lang = metadata.get("lang", "en") if metadata else "en"
-        prompt = self._build_prompt(transcript, lang=lang)
+        prompt = self._build_prompt(
+            transcript,
+            lang=lang,
+            previous=(metadata or {}).get("previous_analysis"),
+            rollup=bool((metadata or {}).get("rollup")),
+        )
+
+        on_delta = (metadata or {}).get("on_stream")
+        options = self._options(prompt, lang)
 
         try:
-            message = self._post_generate(prompt)
-        except HTTPError as exc:
-            status = getattr(exc.response, "status_code", None)
-            logger.info("Ollama /api/generate failed with status %s; falling back to /api/chat", status)
-            message = self._post_chat(prompt)
+            if _endpoints.get(self.base_url) == CHAT:
+                return self._parse_content(self._post_chat(prompt, on_delta, options))
+            try:
+                message = self._post_generate(prompt, on_delta, options)
+                _remember_endpoint(self.base_url, GENERATE)
+            except HTTPError as exc:
+                status = getattr(exc.response, "status_code", None)
+                logger.info("Ollama /api/generate failed with status %s; falling back to /api/chat", status)
+                message = self._post_chat(prompt, on_delta, options)
+                if status in _MISSING_ENDPOINT_STATUSES:
+                    _remember_endpoint(self.base_url, CHAT)
         except requests.ConnectionError:
             logger.error("Failed to reach Ollama at %s", self.base_url)
             raise
         return self._parse_content(message)
 
+    async def analyze_async(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        client = get_async_client()
+        if client is None:
+            return await asyncio.to_thread(self.analyze, transcript, metadata)
+        lang = metadata.get("lang", "en") if metadata else "en"
+        prompt = self._build_prompt(
+            transcript,
+            lang=lang,
+            previous=(metadata or {}).get("previous_analysis"),
+            rollup=bool((metadata or {}).get("rollup")),
+        )
+
+        on_delta = (metadata or {}).get("on_stream")
+        options = self._options(prompt, lang)
+
+        try:
+            if _endpoints.get(self.base_url) == CHAT:
+                message = await self._apost(client, CHAT, self._chat_payload(prompt, options), on_delta)
+                return self._parse_content(message)
+            try:
+                message = await self._apost(client, GENERATE, self._generate_payload(prompt, options), on_delta)
+                _remember_endpoint(self.base_url, GENERATE)
+            except httpx.HTTPStatusError as exc:
+                status = exc.response.status_code
+                logger.info("Ollama /api/generate failed with status %s; falling back to /api/chat", status)
+                message = await self._apost(client, CHAT, self._chat_payload(prompt, options), on_delta)
+                if status in _MISSING_ENDPOINT_STATUSES:
+                    _remember_endpoint(self.base_url, CHAT)
+        except httpx.ConnectError:
+            logger.error("Failed to reach Ollama at %s", self.base_url)
+            raise
+        return self._parse_content(message)
+
     def _parse_content(self, content: str) -> LLMAnalysis:
         try:
             data = json.loads(self._extract_json(content))
@@ -1,16 +1,62 @@
+import asyncio
 import json
-from typing import Any, Dict, Optional
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
 
-from bridge.llm import ChatQuestion, ChatHelp, ActionItem, LLMAnalysis, LLMProvider
+from bridge.aio import get_async_client
+from bridge.streaming import MalformedStreamError, consume_stream, consume_stream_async
+from bridge.llm import (
+    ActionItem,
+    ChatHelp,
+    ChatQuestion,
+    LLMAnalysis,
+    LLMProvider,
+    previous_analysis_prompt,
+    rollup_prompt,
+)
 
 try:
     import openai
 except ImportError:  # pragma: no cover
     openai = None
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+def _chunk_deltas(chunks: Iterator[Any]) -> Iterator[str]:
+    """Content deltas of a ChatCompletion.create(stream=True) iterator."""
+    for chunk in chunks:
+        choices = chunk["choices"] if isinstance(chunk, dict) else chunk.choices
+        if choices:
+            delta = choices[0]["delta"] if isinstance(choices[0], dict) else choices[0].delta
+            yield (delta.get("content") if isinstance(delta, dict) else getattr(delta, "content", None)) or ""
+
+
+async def _sse_deltas(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Content deltas of a /chat/completions server-sent event stream."""
+    async for line in lines:
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            return
+        for delta in _chunk_deltas(iter([json.loads(data)])):
+            yield delta
+
 
 class OpenAIProvider(LLMProvider):
-    def __init__(self, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    supports_streaming = True
+
+    def __init__(
+        self,
+        model: str,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        stream: bool = False,
+    ):
         if openai is None:
             raise ImportError("openai package is required for OpenAIProvider")
         if api_key:
@@ -18,9 +64,16 @@ class OpenAIProvider(LLMProvider):
         if base_url:
             openai.api_base = base_url
         self.model = model
+        self.stream = stream
         self.client = openai
+        self.api_key = api_key or getattr(openai, "api_key", None)
+        self.base_url = (base_url or getattr(openai, "api_base", None) or DEFAULT_BASE_URL).rstrip("/")
 
-    def _build_prompt(self, transcript: str, lang: str = "en") -> str:
+    def _build_prompt(
+        self, transcript: str, lang: str = "en", previous: Optional[LLMAnalysis] = None, rollup: bool = False
+    ) -> str:
+        if rollup:
+            return rollup_prompt(transcript, lang)
         return f"""
 You are Discord Bridge, a focused assistant that synthesizes Discord chat transcripts into concise Markdown analyses.
 Produce JSON with keys: summary (string), faq (array of {{question, asker}}), help_interactions (array of {{helper, recipient, task, assistance}}), action_items (array of {{description, mentioned_by, type}}).
@@ -28,24 +81,72 @@ Prioritize technical discussions, highlight decisions, and skip fluff.
 
 Provide responses in {lang.title()}.
 
-Transcript:
+{previous_analysis_prompt(previous)}Transcript:
 {transcript}
 """
 
-    def analyze(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+    def _messages(self, transcript: str, metadata: Optional[Dict[str, Any]]) -> List[Dict[str, str]]:
         lang = metadata.get("lang", "en") if metadata else "en"
-        prompt = self._build_prompt(transcript, lang=lang)
+        prompt = self._build_prompt(
+            transcript,
+            lang=lang,
+            previous=(metadata or {}).get("previous_analysis"),
+            rollup=bool((metadata or {}).get("rollup")),
+        )
+        return [
+            {"role": "system", "content": "You turn Discord transcripts into structured summaries."},
+            {"role": "user", "content": prompt},
+        ]
+
+    def analyze(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        messages = self._messages(transcript, metadata)
+        if self.stream:
+            try:
+                return self._parse_content(self._stream(messages, (metadata or {}).get("on_stream")))
+            except MalformedStreamError as exc:
+                logger.info("OpenAI: %s; re-reading the completion without streaming", exc)
         response = self.client.ChatCompletion.create(
             model=self.model,
-            messages=[
-                {"role": "system", "content": "You turn Discord transcripts into structured summaries."},
-                {"role": "user", "content": prompt},
-            ],
+            messages=messages,
             temperature=0.2,
         )
         content = response.choices[0].message.content
         return self._parse_content(content)
 
+    def _stream(self, messages: List[Dict[str, str]], on_delta: Optional[Callable[[int], None]]) -> str:
+        started = time.perf_counter()
+        chunks = self.client.ChatCompletion.create(model=self.model, messages=messages, temperature=0.2, stream=True)
+        try:
+            content, _ = consume_stream(_chunk_deltas(chunks), started, on_delta)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()  # stop reading once the object has closed
+        return content
+
+    async def analyze_async(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        client = get_async_client()
+        if client is None:
+            return await asyncio.to_thread(self.analyze, transcript, metadata)
+        url = f"{self.base_url}/chat/completions"
+        payload = {"model": self.model, "messages": self._messages(transcript, metadata), "temperature": 0.2}
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        if self.stream:
+            started = time.perf_counter()
+            try:
+                async with client.stream("POST", url, json={**payload, "stream": True}, headers=headers) as response:
+                    response.raise_for_status()
+                    content, _ = await consume_stream_async(
+                        _sse_deltas(response.aiter_lines()), started, (metadata or {}).get("on_stream")
+                    )
+                return self._parse_content(content)
+            except MalformedStreamError as exc:
+                logger.info("OpenAI: %s; re-reading the completion without streaming", exc)
+        response = await client.post(url, json=payload, headers=headers)
+        response.raise_for_status()
+        content = response.json()["choices"][0]["message"]["content"]
+        return self._parse_content(content)
+
     def _parse_content(self, content: str) -> LLMAnalysis:
         json_payload = self._extract_json(content)
         data = json.loads(json_payload)
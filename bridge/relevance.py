@@ -0,0 +1,126 @@
+"""
+Cheap local relevance scoring, used to trim oversized days before the LLM sees them.
+
+Each message is scored from signals already in the simplified chat files: reactions,
+its depth in a reply chain and the replies it received, question marks, code, length
+and the author's roles. select_relevant keeps the best-scoring messages that fit a
+token budget and returns them in their original (chronological) order.
+"""
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+# Role name substrings (lowercase) that mark people whose messages usually matter.
+# Guild-specific roles (core team, maintainers, ...) are added with LLM_ROLE_WEIGHTS.
+ROLE_WEIGHTS: Dict[str, float] = {
+    "admin": 2.0,
+    "mod": 1.5,
+}
+QUESTION_WEIGHT = 1.5
+CODE_WEIGHT = 1.5
+DEPTH_WEIGHT = 0.75
+REPLIES_WEIGHT = 1.0
+MAX_CHAIN = 3  # depth and reply counts above this add nothing
+SHORT_MESSAGE_WORDS = 4
+SHORT_MESSAGE_PENALTY = 1.0
+BOT_PENALTY = 1.0
+
+_CODE = re.compile(r"```|`[^`\n]+`")
+
+
+def role_weights_from_env() -> Dict[str, float]:
+    """
+    LLM_ROLE_WEIGHTS: comma-separated ``substring=weight`` pairs, e.g.
+    ``admin=2,mod=1.5,core=1.5``. Replaces the defaults; unset keeps ROLE_WEIGHTS.
+    """
+    raw = os.environ.get("LLM_ROLE_WEIGHTS", "").strip()
+    if not raw:
+        return dict(ROLE_WEIGHTS)
+    weights: Dict[str, float] = {}
+    for pair in raw.split(","):
+        if not pair.strip():
+            continue
+        name, sep, value = pair.partition("=")
+        try:
+            if not sep or not name.strip():
+                raise ValueError
+            weights[name.strip().lower()] = float(value)
+        except ValueError:
+            raise ValueError(f"LLM_ROLE_WEIGHTS entries must look like role=weight; got '{pair.strip()}'")
+    return weights
+
+
+def role_weight(roles: Sequence[str], weights: Optional[Dict[str, float]] = None) -> float:
+    """Best weight among the author's roles (matched by lowercase substring)."""
+    weights = ROLE_WEIGHTS if weights is None else weights
+    best = 0.0
+    for role in roles:
+        name = role.lower()
+        for key, weight in weights.items():
+            if key in name and weight > best:
+                best = weight
+    return best
+
+
+def score_messages(
+    messages: Sequence[Dict[str, Any]],
+    users: Optional[Dict[str, Any]],
+    role_weights: Optional[Dict[str, float]] = None,
+) -> List[float]:
+    """Relevance score of every message (messages in chronological order)."""
+    users = users or {}
+    index_by_id = {str(m["id"]): i for i, m in enumerate(messages) if m.get("id") is not None}
+    depth = [0] * len(messages)
+    replies = [0] * len(messages)
+    for i, msg in enumerate(messages):
+        parent = index_by_id.get(str(msg.get("ref")))
+        if parent is not None and parent < i:
+            depth[i] = depth[parent] + 1
+            replies[parent] += 1
+
+    role_cache: Dict[Any, float] = {}
+    scores: List[float] = []
+    for i, msg in enumerate(messages):
+        content = msg.get("content", "")
+        uid = msg.get("uid")
+        user = users.get(uid, {})
+        if uid not in role_cache:
+            role_cache[uid] = role_weight(user.get("roles", []), role_weights)
+        words = len(content.split())
+        score = math.log1p(sum(r.get("count", 0) for r in msg.get("reactions", [])))
+        score += DEPTH_WEIGHT * min(depth[i], MAX_CHAIN) + REPLIES_WEIGHT * min(replies[i], MAX_CHAIN)
+        if "?" in content:
+            score += QUESTION_WEIGHT
+        elif words < SHORT_MESSAGE_WORDS:
+            score -= SHORT_MESSAGE_PENALTY
+        if _CODE.search(content):
+            score += CODE_WEIGHT
+        score += role_cache[uid] + min(words / 20, 1.0)
+        if user.get("isBot"):
+            score -= BOT_PENALTY
+        scores.append(score)
+    return scores
+
+
+def select_relevant(
+    messages: Sequence[Dict[str, Any]],
+    users: Optional[Dict[str, Any]],
+    costs: Sequence[int],
+    max_tokens: int,
+    role_weights: Optional[Dict[str, float]] = None,
+) -> List[int]:
+    """
+    Indexes of the highest-scoring messages whose total cost fits max_tokens, ascending.
+
+    Ties keep the earlier message. A message that does not fit is skipped and cheaper
+    ones are still considered, so the budget is filled as far as possible.
+    """
+    scores = score_messages(messages, users, role_weights)
+    keep: List[int] = []
+    used = 0
+    for i in sorted(range(len(messages)), key=lambda i: -scores[i]):
+        if used + costs[i] <= max_tokens:
+            keep.append(i)
+            used += costs[i]
+    return sorted(keep)
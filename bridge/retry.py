@@ -0,0 +1,237 @@
+"""
+Shared retry and throttling for LLM providers.
+
+ThrottledProvider wraps any provider (like bridge.cache.CachedProvider does). Before
+each request it takes one request and the estimated prompt tokens from the token
+buckets of its (provider, model). Those buckets are shared by every wrapper in the
+process, so threads and asyncio tasks fanning out chunks settle at the configured rate
+instead of tripping the provider's limit. Rate limiting (429), overload and server
+errors (5xx), timeouts and dropped connections are retried with exponential backoff and
+full jitter, waiting at least as long as the server's Retry-After, until the attempts or
+the total retry time run out. Other errors (bad requests, unparsable answers) are raised
+immediately.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from bridge.llm import PROMPT_OVERHEAD_TOKENS, LLMAnalysis, LLMProvider, analyze_async, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+# Exception class names (anywhere in the MRO) of transient transport errors in requests,
+# httpx, openai and google-api-core, which this module does not import.
+TRANSIENT_ERRORS = {
+    "ConnectionError",
+    "Timeout",
+    "TimeoutError",
+    "TimeoutException",
+    "TransportError",
+    "APIConnectionError",
+    "APITimeoutError",
+    "ServiceUnavailable",
+    "ServiceUnavailableError",
+    "DeadlineExceeded",
+}
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 6  # including the first request
+    base_delay: float = 1.0  # seconds before the first retry; doubles per attempt
+    max_delay: float = 60.0  # cap of a single backoff (Retry-After may ask for more)
+    max_total: float = 300.0  # seconds of retrying per request before giving up
+
+
+@dataclass
+class RateLimit:
+    requests_per_minute: Optional[float] = None  # None = unlimited
+    tokens_per_minute: Optional[float] = None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at rate per second up to capacity.
+
+    reserve() never blocks: it takes the amount immediately (the level may go negative)
+    and returns how long the caller must wait before using it, so the same bucket serves
+    time.sleep in threads and asyncio.sleep on an event loop.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate * 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            self.level -= min(amount, self.capacity)  # oversized requests wait for a full bucket only
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+
+class RateLimiter:
+    """Request and token buckets of one provider/model."""
+
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+        self.requests = TokenBucket(limit.requests_per_minute / 60) if limit.requests_per_minute else None
+        self.tokens = TokenBucket(limit.tokens_per_minute / 60) if limit.tokens_per_minute else None
+
+    def reserve(self, tokens: int) -> float:
+        """Seconds to wait before sending a request of about tokens tokens."""
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return delay
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter(provider_name: str, model: str, limit: RateLimit) -> RateLimiter:
+    """The process-wide limiter of (provider_name, model), created with limit on first use."""
+    key = (provider_name.lower(), model)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None or limiter.limit != limit:
+            limiter = _limiters[key] = RateLimiter(limit)
+        return limiter
+
+
+def error_status(exc: BaseException) -> Optional[int]:
+    """HTTP status of a provider error (requests, httpx, openai or google-api-core), if any."""
+    for attr in ("status_code", "http_status", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    value = getattr(getattr(exc, "response", None), "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms headers), if any."""
+    headers = getattr(exc, "headers", None) or getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms") or headers.get("Retry-After-Ms")
+        if value:
+            return max(float(value) / 1000, 0.0)
+        value = headers.get("retry-after") or headers.get("Retry-After")
+    except AttributeError:
+        return None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = error_status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+
+def backoff_delay(policy: RetryPolicy, attempt: int, exc: BaseException) -> float:
+    """Full-jitter exponential backoff for retry number attempt (1-based), at least Retry-After."""
+    delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** (attempt - 1)))
+    server = retry_after(exc)
+    return max(delay, server) if server is not None else delay
+
+
+class ThrottledProvider(LLMProvider):
+    """LLMProvider wrapper that rate-limits requests and retries transient failures (see module docstring)."""
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        provider_name: Optional[str] = None,
+        limit: Optional[RateLimit] = None,
+        policy: Optional[RetryPolicy] = None,
+    ):
+        self.provider = provider
+        self.provider_name = provider_name or type(provider).__name__
+        self.model = getattr(provider, "model", "")
+        self.limiter = rate_limiter(self.provider_name, self.model, limit or RateLimit())
+        self.policy = policy or RetryPolicy()
+
+    def _tokens(self, transcript: str, metadata: Optional[Dict[str, Any]]) -> int:
+        return estimate_tokens(transcript, (metadata or {}).get("lang", "en")) + PROMPT_OVERHEAD_TOKENS
+
+    def _next_delay(self, attempt: int, started: float, exc: BaseException) -> Optional[float]:
+        """Delay before retry number attempt, or None when exc must be raised."""
+        if attempt >= self.policy.max_attempts or not is_retryable(exc):
+            return None
+        delay = backoff_delay(self.policy, attempt, exc)
+        if time.monotonic() - started + delay > self.policy.max_total:
+            logger.warning("%s: giving up after %d attempt(s); retry budget exhausted", self.provider_name, attempt)
+            return None
+        logger.info(
+            "%s request failed (%s, status %s); retry %d/%d in %.1fs",
+            self.provider_name,
+            type(exc).__name__,
+            error_status(exc),
+            attempt,
+            self.policy.max_attempts - 1,
+            delay,
+        )
+        return delay
+
+    def analyze(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        tokens = self._tokens(transcript, metadata)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = self.limiter.reserve(tokens)
+            if wait:
+                time.sleep(wait)
+            try:
+                return self.provider.analyze(transcript, metadata=metadata)
+            except Exception as exc:
+                delay = self._next_delay(attempt, started, exc)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    async def analyze_async(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        tokens = self._tokens(transcript, metadata)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = self.limiter.reserve(tokens)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                return await analyze_async(self.provider, transcript, metadata)
+            except Exception as exc:
+                delay = self._next_delay(attempt, started, exc)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
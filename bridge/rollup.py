@@ -0,0 +1,78 @@
+"""
+Weekly/monthly rollups reduced from the daily analysis sidecars that run_pipeline saves.
+
+FAQ, help interactions and action items are merged locally (bridge.llm.merge_analyses);
+only the daily summaries go to the LLM, in one small request, to be condensed into the
+rollup summary. No raw transcript is read again.
+"""
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bridge.llm import LLMAnalysis, LLMProvider, merge_analyses
+from bridge.pipeline import load_analysis_sidecar
+
+logger = logging.getLogger(__name__)
+
+
+def collect_daily_analyses(
+    directory: Path,
+    first: date,
+    last: date,
+    channels: Iterable[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Daily sidecars in directory dated first..last (inclusive), grouped per channel.
+
+    Returns ``{"channel": ..., "days": [(date_label, LLMAnalysis), ...]}`` per channel,
+    days in date order. Sidecars of multi-day reports (rollups) are ignored. channels
+    restricts the result to the given channel ids or names.
+    """
+    wanted = set(channels)
+    groups: Dict[str, Dict[str, Any]] = {}
+    for path in sorted(directory.glob("*.json")):
+        try:
+            record = load_analysis_sidecar(path)
+            day = date.fromisoformat(record.get("date", ""))
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+        if not first <= day <= last:
+            continue
+        channel = record.get("channel") or {}
+        key = str(channel.get("id") or channel.get("name") or "")
+        if wanted and key not in wanted and channel.get("name") not in wanted:
+            continue
+        group = groups.setdefault(key, {"channel": channel, "days": []})
+        group["days"].append((day.isoformat(), record["analysis"]))
+    for group in groups.values():
+        group["days"].sort(key=lambda item: item[0])
+    return sorted(groups.values(), key=lambda g: (g["channel"].get("name") or "", str(g["channel"].get("id", ""))))
+
+
+def rollup_transcript(channel_name: str, days: List[Tuple[str, LLMAnalysis]]) -> str:
+    """The LLM input of a rollup: one line per day with that day's summary."""
+    lines = [f"Daily summaries of {channel_name}, {days[0][0]} to {days[-1][0]}:"]
+    lines.extend(f"{label}: {' '.join(analysis.summary.split())}" for label, analysis in days if analysis.summary.strip())
+    return "\n".join(lines)
+
+
+def rollup_analyses(
+    days: List[Tuple[str, LLMAnalysis]],
+    provider: Optional[LLMProvider],
+    channel_name: str,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> LLMAnalysis:
+    """
+    Reduce daily analyses to one: items are deduplicated locally and the summary comes
+    from a single provider call over the daily summaries. Without a provider the daily
+    summaries are joined as they are.
+    """
+    merged = merge_analyses([analysis for _, analysis in days])
+    if provider is None or len(days) < 2:
+        return merged
+    meta = {**(metadata or {}), "rollup": True, "date": f"{days[0][0]}_{days[-1][0]}"}
+    summary = provider.analyze(rollup_transcript(channel_name, days), metadata=meta).summary.strip()
+    if summary:
+        merged.summary = summary
+    return merged
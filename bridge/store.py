@@ -0,0 +1,189 @@
+import json
+import sqlite3
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+from bridge.chatfile import load_chat
+from bridge.exports import clean_message, extract_channel_info, iter_export, utc_time_ms
+
+BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    topic TEXT,
+    category TEXT
+);
+CREATE TABLE IF NOT EXISTS users (
+    channel_id TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (channel_id, uid)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    channel_id TEXT NOT NULL,
+    ts_ms INTEGER NOT NULL,
+    uid TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_channel_ts ON messages (channel_id, ts_ms);
+CREATE INDEX IF NOT EXISTS idx_messages_uid ON messages (uid);
+"""
+
+
+def date_range_ms(first: date, last: date, timezone: str) -> Tuple[int, int]:
+    """UTC ms bounds [start, end) covering the local dates first..last (inclusive)."""
+    tz = ZoneInfo(timezone)
+    start = datetime.combine(first, time.min, tzinfo=tz)
+    end = datetime.combine(last + timedelta(days=1), time.min, tzinfo=tz)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _is_raw_export(path: Path) -> bool:
+    """DiscordChatExporter files start with ``guild``; simplified chat files with ``channel``."""
+    if path.suffix != ".json":
+        return False
+    for key, _ in iter_export(path):
+        return key == "guild"
+    return False
+
+
+class MessageStore:
+    """
+    SQLite store of simplified messages, indexed by (channel_id, ts) and uid.
+
+    Messages keep their simplified form (see preprocess.clean_message) as JSON, keyed by
+    message id, so ingesting overlapping daily/hourly files or re-exports is idempotent.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "MessageStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def ingest_file(self, path: Path) -> int:
+        """Load a raw export or a preprocessed chat file; returns the number of messages stored."""
+        if _is_raw_export(path):
+            channel, users, messages = self._read_raw_export(path)
+        else:
+            chat_data = load_chat(path, stream=True)
+            channel = chat_data.get("channel")
+            users = chat_data["users"]
+            messages = chat_data["messages"]
+        if not isinstance(channel, dict) or not channel.get("id"):
+            raise ValueError(f"{path} is neither a chat file nor a DiscordChatExporter export")
+
+        channel_id = str(channel["id"])
+        count = 0
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO channels (id, name, topic, category) VALUES (?, ?, ?, ?)",
+                (channel_id, channel.get("name"), channel.get("topic"), channel.get("category")),
+            )
+            batch: List[Tuple[str, str, int, str, str]] = []
+            for msg in messages:
+                batch.append((str(msg["id"]), channel_id, utc_time_ms(msg["id"], msg["ts"]), msg["uid"], _dumps(msg)))
+                if len(batch) >= BATCH_SIZE:
+                    count += self._insert_messages(batch)
+            count += self._insert_messages(batch)
+            # Raw exports only know their users once every message has been cleaned.
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO users (channel_id, uid, data) VALUES (?, ?, ?)",
+                [(channel_id, uid, _dumps(data)) for uid, data in users.items()],
+            )
+        return count
+
+    def _insert_messages(self, batch: List[Tuple[str, str, int, str, str]]) -> int:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO messages (id, channel_id, ts_ms, uid, data) VALUES (?, ?, ?, ?, ?)",
+            batch,
+        )
+        count = len(batch)
+        batch.clear()
+        return count
+
+    @staticmethod
+    def _read_raw_export(path: Path) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any], Iterator[Dict[str, Any]]]:
+        events = iter_export(path)
+        channel = None
+        for key, value in events:
+            if key == "channel":
+                channel = extract_channel_info(value)
+                break
+        users: Dict[str, Any] = {}
+
+        def messages() -> Iterator[Dict[str, Any]]:
+            for key, value in events:
+                if key == "message" and value.get("content"):  # same filter as preprocess.py
+                    yield clean_message(value, users)
+
+        return channel, users, messages()
+
+    def channels(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("SELECT id, name, topic, category FROM channels ORDER BY id")
+        return [
+            {k: v for k, v in zip(("id", "name", "topic", "category"), row) if v}
+            for row in rows
+        ]
+
+    def resolve_channels(self, names_or_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Channels matching the given ids or names (all channels when none are given)."""
+        wanted = set(names_or_ids)
+        known = self.channels()
+        if not wanted:
+            return known
+        matched = [c for c in known if c["id"] in wanted or c.get("name") in wanted]
+        missing = wanted - {c["id"] for c in matched} - {c.get("name") for c in matched}
+        if missing:
+            raise ValueError(f"Unknown channel(s) in store: {', '.join(sorted(missing))}")
+        return matched
+
+    def count_messages(self, channel_id: str, start_ms: int, end_ms: int) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE channel_id = ? AND ts_ms >= ? AND ts_ms < ?",
+            (channel_id, start_ms, end_ms),
+        ).fetchone()[0]
+
+    def iter_messages(self, channel_id: str, start_ms: int, end_ms: int) -> Iterator[Dict[str, Any]]:
+        """Messages of one channel with start_ms <= ts < end_ms (UTC), oldest first."""
+        rows = self.conn.execute(
+            "SELECT data FROM messages WHERE channel_id = ? AND ts_ms >= ? AND ts_ms < ? ORDER BY ts_ms, id",
+            (channel_id, start_ms, end_ms),
+        )
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def load_chat(self, channel: Dict[str, Any], start_ms: int, end_ms: int, date_label: str) -> Dict[str, Any]:
+        """
+        A chat dict shaped like bridge.chatfile.load_chat(stream=True) for one channel and
+        time window; ``users`` covers the window's authors and ``messages`` is lazy.
+        """
+        rows = self.conn.execute(
+            "SELECT uid, data FROM users WHERE channel_id = ? AND uid IN "
+            "(SELECT DISTINCT uid FROM messages WHERE channel_id = ? AND ts_ms >= ? AND ts_ms < ?)",
+            (channel["id"], channel["id"], start_ms, end_ms),
+        )
+        return {
+            "channel": channel,
+            "date": date_label,
+            "users": {uid: json.loads(data) for uid, data in rows},
+            "messages": self.iter_messages(channel["id"], start_ms, end_ms),
+        }
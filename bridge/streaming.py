@@ -0,0 +1,208 @@
+"""
+Incremental consumption of streamed LLM completions.
+
+Providers in streaming mode feed token deltas to a JSONStreamParser, which tracks
+string/escape state and brace depth so the request can stop the moment the top-level
+JSON object closes (trailing chatter is never waited for), and gives up early when the
+completion does not start like a JSON object. Each stream records time-to-first-token
+in a StreamMetrics, collected process-wide in STREAM_STATS for the CLI to report.
+"""
+import logging
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterable, Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Characters allowed before the opening brace: whitespace, a ```json fence and the usual
+# "Sure! Here is the JSON ..." lead-in. Providers re-read a completion without streaming
+# when it goes past this, so a reply that is not JSON still reaches the parse fallback.
+MAX_PREAMBLE_CHARS = 256
+
+
+class MalformedStreamError(ValueError):
+    """The completion did not start with a JSON object; raised before reading the rest."""
+
+
+class JSONStreamParser:
+    """Finds the end of the first top-level JSON object in text that arrives in pieces."""
+
+    def __init__(self, max_preamble: int = MAX_PREAMBLE_CHARS):
+        self.max_preamble = max_preamble
+        self.preamble = ""
+        self.parts: List[str] = []
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.complete = False
+
+    @property
+    def text(self) -> str:
+        """The JSON object so far (from its opening brace)."""
+        return "".join(self.parts)
+
+    def feed(self, delta: str) -> bool:
+        """Consume a delta; True once the top-level object has closed (later input is ignored)."""
+        if self.complete:
+            return True
+        start = 0
+        if self.depth == 0:
+            brace = delta.find("{")
+            if brace < 0:
+                self.preamble += delta
+                self._check_preamble()
+                return False
+            self.preamble += delta[:brace]
+            self._check_preamble()
+            start = brace
+        for pos in range(start, len(delta)):
+            ch = delta[pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{" or ch == "[":
+                self.depth += 1
+            elif ch == "}" or ch == "]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.parts.append(delta[start : pos + 1])
+                    self.complete = True
+                    return True
+        self.parts.append(delta[start:])
+        return False
+
+    def _check_preamble(self) -> None:
+        if len(self.preamble) > self.max_preamble:
+            raise MalformedStreamError(f"Streamed completion does not start with JSON: {self.preamble[:40]!r}")
+
+
+@dataclass
+class StreamMetrics:
+    ttft: Optional[float] = None  # seconds from request start to the first non-empty delta
+    total: float = 0.0  # seconds until the object closed or the stream ended
+    deltas: int = 0
+    chars: int = 0
+    closed_early: bool = False  # stopped at the closing brace, before the server finished
+
+
+class StreamProgress:
+    """
+    on_delta callback for live progress: sums the characters received by all streams of
+    a label and calls report(label, total_chars) each time another `step` have arrived.
+    """
+
+    def __init__(self, label: str, report: Callable[[str, int], None], step: int = 2_000):
+        self.label = label
+        self.report = report
+        self.step = step
+        self.chars = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, chars: int) -> None:
+        with self._lock:
+            before = self.chars
+            self.chars += chars
+            crossed = self.chars // self.step > before // self.step
+            total = self.chars
+        if crossed:
+            self.report(self.label, total)
+
+
+class StreamStats:
+    """Thread-safe collector of StreamMetrics for a run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.metrics: List[StreamMetrics] = []
+
+    def record(self, metrics: StreamMetrics) -> None:
+        with self._lock:
+            self.metrics.append(metrics)
+
+    def summary(self) -> Optional[str]:
+        with self._lock:
+            ttfts = [m.ttft for m in self.metrics if m.ttft is not None]
+            if not ttfts:
+                return None
+            totals = [m.total for m in self.metrics]
+            early = sum(m.closed_early for m in self.metrics)
+        return (
+            f"{len(totals)} streamed request(s): TTFT median {statistics.median(ttfts):.2f}s, "
+            f"max {max(ttfts):.2f}s; total median {statistics.median(totals):.2f}s; {early} closed early"
+        )
+
+
+STREAM_STATS = StreamStats()
+
+
+class _Consumer:
+    def __init__(self, started: float, on_delta: Optional[Callable[[int], None]]):
+        self.parser = JSONStreamParser()
+        self.metrics = StreamMetrics()
+        self.started = started
+        self.on_delta = on_delta
+
+    def feed(self, delta: str) -> bool:
+        if not delta:
+            return False
+        if self.metrics.ttft is None:
+            self.metrics.ttft = time.perf_counter() - self.started
+        self.metrics.deltas += 1
+        self.metrics.chars += len(delta)
+        if self.on_delta:
+            self.on_delta(len(delta))
+        return self.parser.feed(delta)
+
+    def finish(self, closed_early: bool) -> Tuple[str, StreamMetrics]:
+        self.metrics.total = time.perf_counter() - self.started
+        self.metrics.closed_early = closed_early
+        STREAM_STATS.record(self.metrics)
+        logger.debug(
+            "Stream: TTFT %.2fs, %d chars in %.2fs%s",
+            self.metrics.ttft or 0.0,
+            self.metrics.chars,
+            self.metrics.total,
+            " (closed early)" if closed_early else "",
+        )
+        return self.parser.text if self.parser.parts else self.parser.preamble, self.metrics
+
+
+def consume_stream(
+    deltas: Iterable[str],
+    started: float,
+    on_delta: Optional[Callable[[int], None]] = None,
+) -> Tuple[str, StreamMetrics]:
+    """
+    Read deltas until the top-level JSON object closes; returns (object text, metrics).
+
+    started is the time.perf_counter() value taken before the request was sent.
+    on_delta(chars) is called with the size of every delta, for live progress (one
+    callback may be shared by concurrent streams and sum them up). Raises
+    MalformedStreamError as soon as the preamble shows the completion is not JSON.
+    """
+    consumer = _Consumer(started, on_delta)
+    for delta in deltas:
+        if consumer.feed(delta):
+            return consumer.finish(closed_early=True)
+    return consumer.finish(closed_early=False)
+
+
+async def consume_stream_async(
+    deltas: AsyncIterable[str],
+    started: float,
+    on_delta: Optional[Callable[[int], None]] = None,
+) -> Tuple[str, StreamMetrics]:
+    """consume_stream for async delta iterators."""
+    consumer = _Consumer(started, on_delta)
+    async for delta in deltas:
+        if consumer.feed(delta):
+            return consumer.finish(closed_early=True)
+    return consumer.finish(closed_early=False)
@@ -0,0 +1,130 @@
+"""
+Conversation threading for chunked analysis.
+
+Messages are clustered into conversations with a union-find over three kinds of links:
+replies (``ref``), mentions (a message mentioning a user joins that user's most recent
+message within MENTION_WINDOW_MS), and consecutive messages from the same author.
+Conversations are then packed whole into budgeted chunks, so a chunk boundary never
+cuts a thread unless the thread alone exceeds the budget.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from bridge.exports import utc_time_ms
+
+MENTION_WINDOW_MS = 30 * 60 * 1000
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # The earlier message stays the root, so roots order conversations.
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+
+def _message_ms(msg: Dict[str, Any]) -> Optional[int]:
+    if not msg.get("ts"):
+        return None
+    try:
+        return utc_time_ms(msg.get("id", ""), msg["ts"])
+    except (TypeError, ValueError):
+        return None
+
+
+def group_conversations(messages: Sequence[Dict[str, Any]]) -> List[List[int]]:
+    """
+    Cluster messages (in chronological order) into conversations.
+
+    Returns lists of message indexes, each list ascending, ordered by each
+    conversation's first message.
+    """
+    uf = _UnionFind(len(messages))
+    by_id: Dict[str, int] = {}
+    last_by_user: Dict[str, int] = {}
+    previous_uid = None
+    for i, msg in enumerate(messages):
+        uid = msg.get("uid")
+        if uid is not None and uid == previous_uid:
+            uf.union(i - 1, i)
+        ref = msg.get("ref")
+        if ref is not None and str(ref) in by_id:
+            uf.union(by_id[str(ref)], i)
+        mentions = msg.get("mentions") or []
+        if mentions:
+            now = _message_ms(msg)
+            for mentioned in mentions:
+                j = last_by_user.get(mentioned)
+                if j is None or mentioned == uid:
+                    continue
+                then = _message_ms(messages[j])
+                if now is None or then is None or now - then <= MENTION_WINDOW_MS:
+                    uf.union(j, i)
+        if msg.get("id") is not None:
+            by_id[str(msg["id"])] = i
+        if uid is not None:
+            last_by_user[uid] = i
+        previous_uid = uid
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(messages)):
+        groups.setdefault(uf.find(i), []).append(i)
+    return [groups[root] for root in sorted(groups)]
+
+
+def pack_conversations(
+    conversations: List[List[int]],
+    cost: Callable[[int], int],
+    max_cost: int,
+) -> List[List[int]]:
+    """
+    First-fit packing of conversations into chunks of at most max_cost.
+
+    A conversation larger than max_cost is split into contiguous pieces of its own.
+    Each chunk's indexes are returned in ascending (chronological) order.
+    """
+    chunks: List[List[int]] = []
+    totals: List[int] = []
+    for conversation in conversations:
+        size = sum(cost(i) for i in conversation)
+        if size > max_cost:
+            piece: List[int] = []
+            piece_cost = 0
+            for i in conversation:
+                c = cost(i)
+                if piece and piece_cost + c > max_cost:
+                    chunks.append(piece)
+                    totals.append(piece_cost)
+                    piece, piece_cost = [], 0
+                piece.append(i)
+                piece_cost += c
+            chunks.append(piece)
+            totals.append(piece_cost)
+            continue
+        for k, total in enumerate(totals):
+            if total + size <= max_cost:
+                chunks[k].extend(conversation)
+                totals[k] += size
+                break
+        else:
+            chunks.append(list(conversation))
+            totals.append(size)
+    return [sorted(chunk) for chunk in chunks]
+
+
+def thread_chunks(messages: Sequence[Dict[str, Any]], max_messages: int) -> List[List[Dict[str, Any]]]:
+    """Message-count variant used by the summarize scripts: conversations packed into chunks of max_messages."""
+    packed = pack_conversations(group_conversations(messages), lambda _: 1, max_messages)
+    return [[messages[i] for i in chunk] for chunk in packed]
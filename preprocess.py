@@ -1,137 +1,477 @@
 import json
-from datetime import datetime
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 from pathlib import Path
-from collections import defaultdict
 import argparse
 
-def parse_timestamp(timestamp_str):
-    """Parse timestamp with variable precision in fractional seconds."""
-    try:
-        # First try standard ISO format
-        return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-    except ValueError:
-        try:
-            # Handle variable precision in fractional seconds
-            date_part, tz_part = timestamp_str.rsplit('-', 1)
-            # Ensure consistent precision for fractional seconds
-            if '.' in date_part:
-                base, frac = date_part.rsplit('.', 1)
-                # Pad to 6 digits (microseconds)
-                frac = frac.ljust(6, '0')
-                date_part = f"{base}.{frac}"
-            # Reassemble with timezone
-            normalized_timestamp = f"{date_part}-{tz_part}"
-            return datetime.fromisoformat(normalized_timestamp)
-        except Exception as e:
-            print(f"Error parsing timestamp '{timestamp_str}': {e}")
-            raise
-
-def clean_message(message, user_map):
-    """Create minimal message format, omitting null/empty fields."""
-    user_id = message['author']['id']
-    
-    # Add user to map if not exists, only including non-empty fields
-    if user_id not in user_map:
-        user_data = {}
-        if name := message['author'].get('name'):
-            user_data['name'] = name
-        if nickname := message['author'].get('nickname'):
-            user_data['nickname'] = nickname
-        if roles := [r['name'] for r in message['author'].get('roles', []) if r.get('name')]:
-            user_data['roles'] = roles
-        if message['author'].get('isBot'):
-            user_data['isBot'] = True
-            
-        user_map[user_id] = user_data
-    
-    # Build message dict only with non-null values
-    msg = {
-        'id': message['id'],
-        'ts': message['timestamp'],
-        'uid': user_id,
-        'content': message['content']
-    }
-    
-    # Only add optional fields if they have values
-    if message_type := message.get('type'):
-        if message_type != 'Default':  # Don't include if it's Default
-            msg['type'] = message_type
-            
-    if edited := message.get('timestampEdited'):
-        msg['edited'] = edited
-        
-    if mentions := [m['id'] for m in message.get('mentions', []) if m.get('id')]:
-        msg['mentions'] = mentions
-        
-    if ref := message.get('reference', {}).get('messageId'):
-        msg['ref'] = ref
-        
-    if reactions := message.get('reactions'):
-        cleaned_reactions = [{'emoji': r['emoji'].get('name'), 'count': r['count']} 
-                           for r in reactions]
-        if cleaned_reactions:
-            msg['reactions'] = cleaned_reactions
-            
-    return msg
-
-def simplify_chat_export(input_file, output_dir='simplified_chats'):
-    """Process Discord chat export into simplified daily files with user mapping."""
-    # Load the input file
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Extract channel info and ID
-    channel_info = {'id': data['channel']['id']}
-    if name := data['channel'].get('name'):
-        channel_info['name'] = name
-    if topic := data['channel'].get('topic'):
-        channel_info['topic'] = topic
-    if category := data['channel'].get('category'):
-        channel_info['category'] = category
-    
-    channel_id = channel_info['id']
-    
-    # Create a subdirectory based on the channel ID
-    channel_output_path = Path(output_dir) / str(channel_id)
-    channel_output_path.mkdir(parents=True, exist_ok=True)
-    
-    user_map = {}
-    daily_messages = defaultdict(list)
-    
-    for message in data.get('messages', []):
-        ts = parse_timestamp(message['timestamp'])
-        day = ts.strftime('%Y-%m-%d')
-        
-        cleaned_msg = clean_message(message, user_map)
-        if cleaned_msg['content']:  # Only keep messages with content
-            daily_messages[day].append(cleaned_msg)
-    
-    # Write daily files
-    for day, messages in daily_messages.items():
-        output_file = channel_output_path / f'chat_{day}.json'
-        
-        output_data = {
-            'channel': channel_info,
-            'date': day,
-            'users': user_map,
-            'messages': messages
+from bridge.chatfile import load_chat, write_chat
+from bridge.export_index import INDEX_SUFFIX, iter_export_days
+from bridge.llm import estimate_tokens
+from bridge.exports import (  # noqa: F401 (re-exported for existing callers)
+    DAY_MS,
+    HOUR_MS,
+    clean_message,
+    day_label,
+    extract_channel_info,
+    iter_export,
+    local_time_ms,
+    parse_timestamp,
+    read_export_channel,
+    timestamp_offset_ms,
+)
+
+def write_chat_file(output_file, output_data):
+    # Indented JSON or compact JSON Lines, picked from the file suffix
+    write_chat(Path(output_file), output_data)
+
+class BucketWriter:
+    """
+    Hold messages for the currently open buckets and flush finished ones to disk.
+
+    Exports are chronological, so once a message for a later bucket arrives every
+    earlier bucket is complete and can be written and released. A late message for
+    an already flushed bucket is merged into the file that was written for it; with
+    merge_existing, the same happens for files left by a previous run.
+    """
+
+    def __init__(self, render, merge_existing=False):
+        # render(key, messages) -> (output_file, output_data)
+        self.render = render
+        self.merge_existing = merge_existing
+        self.open_buckets = {}
+        self.flushed = set()
+
+    def add(self, key, message):
+        bucket = self.open_buckets.get(key)
+        if bucket is None:
+            for done in sorted(k for k in self.open_buckets if k < key):
+                self._flush(done)
+            bucket = self.open_buckets[key] = []
+        bucket.append(message)
+
+    def _flush(self, key):
+        messages = self.open_buckets.pop(key)
+        output_file, output_data = self.render(key, messages)
+        if key in self.flushed or (self.merge_existing and output_file.exists()):
+            previous = load_chat(output_file)
+            seen = {m['id'] for m in previous['messages']}
+            if 'users' in output_data:
+                output_data['users'] = {**previous.get('users', {}), **output_data['users']}
+            output_data['messages'] = previous['messages'] + [m for m in messages if m['id'] not in seen]
+        write_chat_file(output_file, output_data)
+        self.flushed.add(key)
+
+    def close(self):
+        for key in sorted(self.open_buckets):
+            self._flush(key)
+        return len(self.flushed)
+
+STATE_FILE = '.preprocess_state.json'
+USERS_SIDECAR = 'users.json'
+USER_TABLE_MODES = ('bucket', 'sidecar')
+
+def bucket_users(messages, user_map):
+    """User records for the authors and mentioned users of one bucket."""
+    users = {}
+    for msg in messages:
+        for uid in (msg['uid'], *msg.get('mentions', ())):
+            if uid not in users and uid in user_map:
+                users[uid] = user_map[uid]
+    return users
+
+def write_users_sidecar(directory, user_map):
+    """Merge user_map into <directory>/users.json (shared by every chat file there)."""
+    sidecar = directory / USERS_SIDECAR
+    users = {}
+    if sidecar.exists():
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            users = json.load(f)
+    users.update(user_map)
+    with open(sidecar, 'w', encoding='utf-8') as f:
+        json.dump(users, f, indent=2, ensure_ascii=False)
+
+def state_key(sink):
+    return f"{sink.name}@{sink.subdir or '.'}"
+
+def load_state(channel_output_path):
+    """High-water marks (last processed message id per sink) saved by an incremental run."""
+    state_file = channel_output_path / STATE_FILE
+    if not state_file.exists():
+        return {}
+    with open(state_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get('highWaterMarks', {})
+
+def save_state(channel_output_path, channel_id, high_water_marks):
+    state_file = channel_output_path / STATE_FILE
+    tmp_file = state_file.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'channel': channel_id, 'highWaterMarks': high_water_marks}, f, indent=2)
+    tmp_file.replace(state_file)
+
+FILE_FORMATS = ('json', 'jsonl')
+COMPRESSIONS = ('gzip', 'zstd')
+
+def chat_file_suffix(file_format='json', compress=None):
+    """File suffix for --format/--compress: .json, .jsonl, .jsonl.gz or .jsonl.zst."""
+    if file_format == 'json':
+        if compress:
+            raise ValueError('Compression is only supported for the jsonl format')
+        return '.json'
+    return '.jsonl' + {None: '', 'gzip': '.gz', 'zstd': '.zst'}[compress]
+
+class DailySink:
+    """Granularity that writes one chat_YYYY-MM-DD.json per day."""
+
+    def __init__(self, subdir='', suffix='.json'):
+        self.name = 'daily'
+        self.subdir = subdir
+        self.suffix = suffix
+
+    def reset(self):
+        pass
+
+    def key(self, local_ms, message=None):
+        return local_ms // DAY_MS
+
+    def file_name(self, key):
+        return f'chat_{day_label(key)}{self.suffix}'
+
+    def metadata(self, key):
+        return {'date': day_label(key)}
+
+class HourlySink:
+    """Granularity that writes one chat_YYYY-MM-DD_HHMM.json per N-hour window of a day."""
+
+    def __init__(self, bucket_size_hours=4, subdir='', suffix='.json'):
+        self.name = f'{bucket_size_hours}h'
+        self.bucket_size_hours = bucket_size_hours
+        self.subdir = subdir
+        self.suffix = suffix
+
+    def reset(self):
+        pass
+
+    def key(self, local_ms, message=None):
+        return time_bucket_key(local_ms, self.bucket_size_hours)
+
+    def file_name(self, key):
+        day, hour = key
+        return f'chat_{day_label(day)}_{hour:02d}00{self.suffix}'
+
+    def metadata(self, key):
+        day, hour = key
+        return {
+            'date': day_label(day),
+            'timeBlock': f"{hour:02d}:00-{(hour + self.bucket_size_hours) % 24:02d}:00",
         }
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
-            
-    return len(daily_messages)
+
+LINE_OVERHEAD_TOKENS = 6  # the "nickname (HH:MM): " prefix of each transcript line
+
+class TokenBudgetSink:
+    """Granularity that closes a chunk once its estimated tokens reach a budget.
+
+    A chunk starts at its first message and ends when the next message would push it
+    past max_tokens, when it would span more than bucket_size_hours, or at midnight.
+    Quiet stretches therefore share one chunk and busy hours are split into several,
+    so every chunk fits the model context. Files are named after the chunk's start
+    (chat_YYYY-MM-DD_HHMM.json) and carry the usual date/timeBlock metadata.
+    """
+
+    def __init__(self, max_tokens, bucket_size_hours=4, lang='en', chars_per_token=None, subdir='', suffix='.json'):
+        self.name = f'{bucket_size_hours}h-{max_tokens}tok'
+        self.max_tokens = max_tokens
+        self.bucket_size_hours = bucket_size_hours
+        self.lang = lang
+        self.chars_per_token = chars_per_token
+        self.subdir = subdir
+        self.suffix = suffix
+        self.reset()
+
+    def reset(self):
+        # Chunk state belongs to one export run.
+        self.current = None
+        self.start_ms = 0
+        self.tokens = 0
+        self.last_ms = {}
+
+    def key(self, local_ms, message=None):
+        tokens = LINE_OVERHEAD_TOKENS
+        if message is not None:
+            tokens += estimate_tokens(message.get('content', ''), self.lang, self.chars_per_token)
+        current = self.current
+        if (
+            current is None
+            or local_ms // DAY_MS != current[0]
+            or local_ms - self.start_ms >= self.bucket_size_hours * HOUR_MS
+            or (self.tokens and self.tokens + tokens > self.max_tokens)
+        ):
+            day, ms_of_day = divmod(local_ms, DAY_MS)
+            minute = ms_of_day // 60_000
+            seq = current[2] + 1 if current is not None and current[:2] == (day, minute) else 0
+            current = self.current = (day, minute, seq)
+            self.start_ms = local_ms
+            self.tokens = 0
+        self.tokens += tokens
+        self.last_ms[current] = max(local_ms, self.last_ms.get(current, local_ms))
+        return current
+
+    def file_name(self, key):
+        day, minute, seq = key
+        part = f'-{seq}' if seq else ''
+        return f'chat_{day_label(day)}_{minute // 60:02d}{minute % 60:02d}{part}{self.suffix}'
+
+    def metadata(self, key):
+        day, minute, _ = key
+        end = self.last_ms.get(key, day * DAY_MS + minute * 60_000) % DAY_MS // 60_000
+        return {
+            'date': day_label(day),
+            'timeBlock': f'{minute // 60:02d}:{minute % 60:02d}-{end // 60:02d}:{end % 60:02d}',
+        }
+
+def time_bucket_key(local_ms, bucket_size_hours=4):
+    """(day index, bucket start hour) for a local_time_ms value.
+
+    Buckets restart at midnight. HourlySink keys every message with it; there is
+    no second datetime-based rule to keep in sync.
+    """
+    day, ms_of_day = divmod(local_ms, DAY_MS)
+    return day, (ms_of_day // HOUR_MS) // bucket_size_hours * bucket_size_hours
+
+def preprocess_export(input_file, output_dir, sinks, incremental=False, users='bucket', dates=None):
+    """Parse an export once and write every requested granularity in the same pass.
+
+    Each message is cleaned and bucketed once, then handed to every sink. Files go
+    to <output_dir>/<channel id>/<sink.subdir>/. Returns a summary with the channel
+    info, the number of messages kept and {sink.name: files written}.
+
+    With incremental=True the last processed message id of each sink is kept in
+    <output_dir>/<channel id>/.preprocess_state.json. Later runs only pass newer
+    messages to a sink and append them to the affected files; every other file is
+    left untouched. Edits to already processed messages are not picked up.
+
+    users selects the user table layout: 'bucket' embeds only the users that appear
+    in each file, 'sidecar' leaves it out of the chat files and writes one users.json
+    per output directory (bridge.chatfile.load_chat resolves both).
+
+    dates limits the run to the given local days: only their byte ranges are read,
+    using the offset index next to the export (<export>.idx.json, built on first use
+    by bridge.export_index), and the files of those days are rewritten from scratch.
+    """
+    if users not in USER_TABLE_MODES:
+        raise ValueError(f"users must be one of {', '.join(USER_TABLE_MODES)}; got '{users}'")
+    channel_info = None
+    channel_output_path = None
+    user_map = {}
+    writers = []
+    kept = 0
+    newest = None
+
+    def make_render(sink, sink_path):
+        def render(key, messages):
+            output_data = {'channel': channel_info, **sink.metadata(key)}
+            if users == 'bucket':
+                output_data['users'] = bucket_users(messages, user_map)
+            output_data['messages'] = messages
+            return sink_path / sink.file_name(key), output_data
+        return render
+
+    events = iter_export(input_file) if dates is None else iter_export_days(input_file, dates)
+    for key, value in events:
+        if key == 'channel':
+            # Extract channel info and ID
+            channel_info = extract_channel_info(value)
+            # Create a subdirectory based on the channel ID
+            channel_output_path = Path(output_dir) / str(channel_info['id'])
+            saved = load_state(channel_output_path) if incremental else {}
+            writers = []
+            for sink in sinks:
+                sink.reset()
+                sink_path = channel_output_path / sink.subdir
+                sink_path.mkdir(parents=True, exist_ok=True)
+                writer = BucketWriter(make_render(sink, sink_path), merge_existing=incremental)
+                mark = saved.get(state_key(sink))
+                writers.append((sink, writer, int(mark) if mark else -1))
+        elif key == 'message':
+            if channel_info is None:
+                raise ValueError('Export must contain channel info before messages')
+            msg_id = int(value['id'])
+            if newest is None or msg_id > newest:
+                newest = msg_id
+            if not value.get('content'):  # Only keep messages with content
+                continue
+            targets = [(sink, writer) for sink, writer, mark in writers if msg_id > mark]
+            if not targets:
+                continue
+            kept += 1
+            cleaned_msg = clean_message(value, user_map)
+            local_ms = local_time_ms(value['id'], value['timestamp'])
+            for sink, writer in targets:
+                writer.add(sink.key(local_ms, cleaned_msg), cleaned_msg)
+
+    counts = {sink.name: writer.close() for sink, writer, _ in writers}
+    if users == 'sidecar' and user_map:
+        for sink_path in dict.fromkeys(channel_output_path / sink.subdir for sink in sinks):
+            write_users_sidecar(sink_path, user_map)
+    if incremental and channel_output_path is not None:
+        saved = load_state(channel_output_path)
+        for sink, _, mark in writers:
+            saved[state_key(sink)] = str(max(mark, newest if newest is not None else -1))
+        save_state(channel_output_path, channel_info['id'], saved)
+    return {'channel': channel_info, 'messages': kept, 'files': counts}
+
+def expand_inputs(patterns):
+    """Resolve files, directories (their *.json) and glob patterns into export paths."""
+    inputs = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            inputs.extend(sorted(path.glob('*.json')))
+        elif glob.has_magic(pattern):
+            inputs.extend(Path(p) for p in sorted(glob.glob(pattern, recursive=True)))
+        else:
+            inputs.append(path)
+    # Offset indexes (<export>.idx.json) sit next to their exports
+    return list(dict.fromkeys(p for p in inputs if not p.name.endswith(INDEX_SUFFIX)))
+
+def _preprocess_channel(input_files, output_dir, sinks, incremental, users, dates):
+    # Exports of one channel share output files, so they run in order in one worker.
+    return [
+        {'input': str(input_file), **preprocess_export(input_file, output_dir, sinks, incremental, users, dates)}
+        for input_file in input_files
+    ]
+
+def preprocess_many(input_files, output_dir, sinks, workers=None, incremental=False, users='bucket', dates=None):
+    """Preprocess many exports across a process pool and write preprocess_summary.json.
+
+    Exports are grouped by channel id (read from each file's header) so that two
+    workers never write the same channel directory. Returns the summary, keyed by
+    channel id, with the message and file totals of every export of that channel.
+    """
+    by_channel = {}
+    for input_file in input_files:
+        channel = read_export_channel(input_file) or {}
+        by_channel.setdefault(str(channel.get('id', input_file)), []).append(input_file)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(by_channel)))
+    if workers == 1:
+        results = [_preprocess_channel(files, output_dir, sinks, incremental, users, dates) for files in by_channel.values()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_preprocess_channel, files, output_dir, sinks, incremental, users, dates)
+                for files in by_channel.values()
+            ]
+            results = [future.result() for future in futures]
+
+    channels = {}
+    for result in results:
+        for run in result:
+            if run['channel'] is None:
+                continue
+            entry = channels.setdefault(str(run['channel']['id']), {
+                'name': run['channel'].get('name'),
+                'inputs': [],
+                'messages': 0,
+                'files': {},
+            })
+            entry['inputs'].append(run['input'])
+            entry['messages'] += run['messages']
+            for name, count in run['files'].items():
+                entry['files'][name] = entry['files'].get(name, 0) + count
+
+    summary = {
+        'channels': channels,
+        'totals': {
+            'inputs': len(input_files),
+            'channels': len(channels),
+            'messages': sum(c['messages'] for c in channels.values()),
+        },
+    }
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    with open(Path(output_dir) / 'preprocess_summary.json', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+def simplify_chat_export(input_file, output_dir='simplified_chats', incremental=False, users='bucket'):
+    """Process Discord chat export into simplified daily files with user mapping.
+
+    The export is streamed message by message, so peak memory depends on the size of
+    a day rather than the size of the export. Each daily file carries only the users
+    of that day, or none with users='sidecar' (see preprocess_export).
+    """
+    return preprocess_export(input_file, output_dir, [DailySink()], incremental, users)['files'].get('daily', 0)
 
 
 def main():
     parser = argparse.ArgumentParser(description='Simplify Discord chat export')
-    parser.add_argument('input_file', help='Input JSON file path')
+    parser.add_argument('inputs', nargs='+', help='Input JSON file(s), directories or glob patterns')
     parser.add_argument('output_dir', help='Output directory for simplified files')
+    parser.add_argument('--bucket-size', type=int, action='append', default=[],
+                        help='Also write N-hour buckets into <channel>/<N>h/ in the same pass (repeatable)')
+    parser.add_argument('--no-daily', action='store_true', help='Skip daily files (only write --bucket-size outputs)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only append messages newer than the last run (state kept in <channel>/.preprocess_state.json)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes when several exports are given (default: CPU count)')
+    parser.add_argument('--users', choices=USER_TABLE_MODES, default='bucket',
+                        help="User table layout: per-file participants ('bucket') or a shared users.json ('sidecar')")
+    add_format_arguments(parser)
+    add_date_argument(parser)
     
     args = parser.parse_args()
-    
-    num_files = simplify_chat_export(args.input_file, args.output_dir)
-    print(f'Successfully created {num_files} simplified daily files')
+
+    suffix = format_suffix(parser, args)
+    sinks = [] if args.no_daily else [DailySink(suffix=suffix)]
+    sinks.extend(HourlySink(size, subdir=f'{size}h', suffix=suffix) for size in dict.fromkeys(args.bucket_size))
+    if not sinks:
+        parser.error('Nothing to write: drop --no-daily or add --bucket-size')
+
+    run_inputs(args.inputs, args.output_dir, sinks, args.workers, args.incremental, args.users, 'simplified {name}',
+               selected_dates(parser, args))
+
+def add_format_arguments(parser):
+    parser.add_argument('--format', choices=FILE_FORMATS, default='json',
+                        help="Output format: indented JSON or compact JSON Lines (header line + one message per line)")
+    parser.add_argument('--compress', choices=COMPRESSIONS, default=None, help='Compress jsonl output')
+
+def add_date_argument(parser):
+    parser.add_argument('--date', action='append', default=[], metavar='YYYY-MM-DD',
+                        help='Only (re)write these local days, reading just their byte ranges via <export>.idx.json '
+                             '(built on first use; repeatable)')
+
+def selected_dates(parser, args):
+    if not args.date:
+        return None
+    if args.incremental:
+        parser.error('--date rewrites whole days and cannot be combined with --incremental')
+    try:
+        return [date.fromisoformat(d) for d in args.date]
+    except ValueError as exc:
+        parser.error(f'--date: {exc}')
+
+def format_suffix(parser, args):
+    try:
+        return chat_file_suffix(args.format, args.compress)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+def run_inputs(patterns, output_dir, sinks, workers, incremental, users, label, dates=None):
+    """Shared CLI body: one export in-process, several across the pool with a summary file."""
+    inputs = expand_inputs(patterns)
+    if len(inputs) == 1 and not Path(patterns[0]).is_dir() and not glob.has_magic(patterns[0]):
+        counts = preprocess_export(inputs[0], output_dir, sinks, incremental, users, dates)['files']
+        for name, num_files in counts.items():
+            print(f'Successfully created {num_files} {label.format(name=name)} files')
+        return
+    summary = preprocess_many(inputs, output_dir, sinks, workers, incremental, users, dates)
+    for channel_id, entry in summary['channels'].items():
+        files = ', '.join(f'{n} {label.format(name=name)}' for name, n in entry['files'].items())
+        print(f"{entry['name'] or channel_id}: {entry['messages']} messages -> {files} files")
+    totals = summary['totals']
+    print(f"Processed {totals['inputs']} exports across {totals['channels']} channels "
+          f"({totals['messages']} messages); summary in {Path(output_dir) / 'preprocess_summary.json'}")
 
 if __name__ == '__main__':
     main()
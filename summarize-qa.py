@@ -1,6 +1,5 @@
 from langchain_ollama import ChatOllama
 from langchain_openai import ChatOpenAI
-import dateutil.parser
 from typing import Dict, List, Any, Optional
 import signal
 import sys
@@ -12,9 +11,16 @@ from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
 from datetime import datetime
+from pathlib import Path
 from pydantic import BaseModel
 from openai import OpenAI
 
+from bridge.chatfile import load_chat
+from bridge.concurrency import bounded_map
+from bridge.config import max_concurrency_from_env
+from bridge.exports import format_hhmm
+from bridge.threads import thread_chunks
+
 # Initialize console and logging
 console = Console()
 logging.basicConfig(level=logging.INFO)
@@ -38,9 +44,9 @@ class ChatAnalysis(BaseModel):
 
 class DiscordChatAnalyzer:
     def __init__(self, model_name='phi4-chat', model_provider='ollama', 
-                 openrouter_model="openai/gpt-3.5-turbo"):
-        self._timestamp_cache = {}
+                 openrouter_model="openai/gpt-3.5-turbo", max_concurrency=None):
         self._user_cache = {}
+        self.max_concurrency = max_concurrency or max_concurrency_from_env()
         self.model_provider = model_provider
         self.openrouter_model = openrouter_model
         
@@ -73,9 +79,7 @@ class DiscordChatAnalyzer:
             raise
 
     def _parse_timestamp(self, ts: str) -> str:
-        if ts not in self._timestamp_cache:
-            self._timestamp_cache[ts] = dateutil.parser.parse(ts).strftime("%H:%M")
-        return self._timestamp_cache[ts]
+        return format_hhmm(ts)
 
     def _get_user_display_name(self, uid: str) -> str:
         if uid not in self._user_cache:
@@ -84,8 +88,8 @@ class DiscordChatAnalyzer:
         return self._user_cache[uid]
 
     def _chunk_messages(self, messages: List[Dict], chunk_size: int = 15) -> List[List[Dict]]:
-        """Simple chunking of messages"""
-        return [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        """Chunking of messages that keeps reply/mention threads together"""
+        return thread_chunks(messages, chunk_size)
 
     def format_messages(self, messages: List[Dict]) -> str:
         """Format messages for analysis"""
@@ -114,19 +118,29 @@ class DiscordChatAnalyzer:
             return "# No messages to analyze"
         
         chunks = self._chunk_messages(messages)
-        analyses = []
         
+        def analyze(chunk):
+            try:
+                return self._analyze_chunk(chunk)
+            except Exception as e:
+                logger.error(f"Chunk analysis failed: {e}")
+                return None
+
         with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
             task = progress.add_task("[cyan]Analyzing chat...", total=len(chunks))
-            
-            for chunk in chunks:
-                try:
-                    analysis = self._analyze_chunk(chunk)
-                    analyses.append(analysis)
+
+            def on_result(_, analysis):
+                if analysis is not None:
                     progress.advance(task)
-                except Exception as e:
-                    logger.error(f"Chunk analysis failed: {e}")
-                    continue
+
+            # Chunks run in parallel up to max_concurrency; results keep chunk order for merging
+            results = bounded_map(
+                analyze,
+                chunks,
+                self.max_concurrency,
+                on_result,
+            )
+            analyses = [analysis for analysis in results if analysis is not None]
         
         merged_analysis = self._merge_analyses(analyses)
         return self._format_markdown(merged_analysis, chat_data['channel']['name'], chat_data['date'])
@@ -244,14 +258,17 @@ def main():
     parser.add_argument("--openrouter-model", type=str,
                        default="openai/gpt-3.5-turbo",
                        help="OpenRouter model name")
+    parser.add_argument("--concurrency", type=int, default=None,
+                       help="Chunks analyzed in parallel (default: LLM_MAX_CONCURRENCY or 4)")
 
     args = parser.parse_args()
 
     try:
-        chat_data = json.load(open(args.input, 'rb'))
+        chat_data = load_chat(Path(args.input))
         analyzer = DiscordChatAnalyzer(
             model_provider=args.model,
-            openrouter_model=args.openrouter_model
+            openrouter_model=args.openrouter_model,
+            max_concurrency=args.concurrency
         )
         analysis = analyzer.analyze_chat(chat_data)
 
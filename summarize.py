@@ -1,10 +1,8 @@
 from langchain_ollama import ChatOllama
-import dateutil.parser
 from typing import Dict, List, Any, Literal
 import signal
 import sys
 import argparse
-import json
 import os
 from collections import defaultdict
 import logging
@@ -13,8 +11,15 @@ from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskPr
 from rich.panel import Panel
 from rich.table import Table
 from datetime import datetime
+from pathlib import Path
 from pydantic import BaseModel, Field
 
+from bridge.chatfile import load_chat
+from bridge.concurrency import bounded_map
+from bridge.config import max_concurrency_from_env
+from bridge.exports import format_hhmm
+from bridge.threads import thread_chunks
+
 # Initialize rich console
 console = Console()
 logging.basicConfig(level=logging.INFO)
@@ -99,7 +104,8 @@ def _chunk_messages(self, messages: List[Dict[str, Any]], chunk_size: int = 5) -
     return [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
 
 class DiscordChatAnalyzer:
-    def __init__(self, model_name='phi3-chat'):
+    def __init__(self, model_name='phi3-chat', max_concurrency=None):
+        self.max_concurrency = max_concurrency or max_concurrency_from_env()
         console.print(Panel.fit("[bold cyan]Initializing Discord Chat Analyzer[/]"))
         try:
             self.model = ChatOllama(
@@ -182,17 +188,14 @@ Return the analysis in the specified structured format. Be specific about techni
         for msg in messages:
             user = users.get(msg['uid'], {})
             username = user.get('nickname') or user.get('name', 'Unknown User')
-            try:
-                timestamp = dateutil.parser.parse(msg['ts']).strftime("%H:%M")
-            except Exception:
-                timestamp = msg['ts']
+            timestamp = format_hhmm(msg['ts'])
             content = msg.get('content', '')
             formatted.append(f"{username} ({timestamp}): {content}")
         return "\n".join(formatted)
 
     def _chunk_messages(self, messages: List[Dict[str, Any]], chunk_size: int = 20) -> List[List[Dict[str, Any]]]:
-        """Split messages into chunks of specified size"""
-        return [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        """Split messages into chunks of at most chunk_size, keeping reply/mention threads together"""
+        return thread_chunks(messages, chunk_size)
 
     def _merge_analyses(self, analyses: List[ChatAnalysis]) -> ChatAnalysis:
         """Merge multiple chunk analyses while enforcing strict limits"""
@@ -280,7 +283,6 @@ Return the analysis in the specified structured format. Be specific about techni
         
         # Split into chunks and analyze
         chunks = self._chunk_messages(messages)
-        analyses = []
         
         with Progress(
             SpinnerColumn(),
@@ -292,9 +294,12 @@ Return the analysis in the specified structured format. Be specific about techni
         ) as progress:
             task = progress.add_task("[cyan]Analyzing chat...", total=len(chunks))
             
-            for chunk in chunks:
-                analysis = self._analyze_chunk(chunk, users, progress, task)
-                analyses.append(analysis)
+            # Chunks run in parallel up to max_concurrency; results keep chunk order for merging
+            analyses = bounded_map(
+                lambda chunk: self._analyze_chunk(chunk, users, progress, task),
+                chunks,
+                self.max_concurrency,
+            )
         
         # Merge and format results
         merged_analysis = self._merge_analyses(analyses)
@@ -320,14 +325,15 @@ def main():
     parser.add_argument("-i", "--input", type=str, required=True,
                        help="Path to Discord chat export JSON file")
     parser.add_argument("-o", "--output", type=str, help="Path to save the output file")
+    parser.add_argument("--concurrency", type=int, default=None,
+                       help="Chunks analyzed in parallel (default: LLM_MAX_CONCURRENCY or 4)")
 
     args = parser.parse_args()
 
     logger.info(f"Reading chat data from {args.input}")
-    with open(args.input, 'r', encoding='utf-8') as f:
-        chat_data = json.load(f)
+    chat_data = load_chat(Path(args.input))
 
-    analyzer = DiscordChatAnalyzer()
+    analyzer = DiscordChatAnalyzer(max_concurrency=args.concurrency)
     analysis = analyzer.analyze_chat(chat_data)
 
     if args.output:
@@ -0,0 +1,89 @@
+import os
+import time
+
+from bridge.cache import AnalysisCache, CachedProvider, cache_key
+from bridge.llm import ActionItem, ChatQuestion, LLMAnalysis
+
+
+class CountingProvider:
+    model = "gpt-4o-mini"
+
+    def __init__(self):
+        self.calls = 0
+
+    def analyze(self, transcript, metadata=None):
+        self.calls += 1
+        return LLMAnalysis(
+            summary=f"summary of {len(transcript)} chars",
+            faq=[ChatQuestion(question="q", asker="a")],
+            help_interactions=[],
+            action_items=[ActionItem(description="d", mentioned_by="m", type="Feature Requests")],
+        )
+
+
+def test_cached_provider_skips_repeated_requests(tmp_path):
+    inner = CountingProvider()
+    provider = CachedProvider(inner, AnalysisCache(tmp_path), provider_name="openai")
+
+    first = provider.analyze("Alice (10:00): hi\r\nBob (10:01): hey", {"lang": "en"})
+    again = provider.analyze("Alice (10:00): hi  \nBob (10:01): hey\n", {"lang": "en"})
+    provider.analyze("Alice (10:00): hi\nBob (10:01): hey", {"lang": "ko"})
+
+    assert inner.calls == 2
+    assert again == first
+    assert provider.model == "gpt-4o-mini"
+    assert provider.cache.hits == 1
+
+
+def test_rollup_requests_do_not_share_entries_with_transcripts(tmp_path):
+    inner = CountingProvider()
+    provider = CachedProvider(inner, AnalysisCache(tmp_path), provider_name="ollama")
+
+    provider.analyze("2024-11-11: quiet day", {"lang": "en"})
+    provider.analyze("2024-11-11: quiet day", {"lang": "en", "rollup": True})
+    provider.analyze("2024-11-11: quiet day", {"lang": "en", "rollup": True})
+
+    assert inner.calls == 2
+    assert provider.cache.hits == 1
+
+
+def test_foreign_or_partial_entries_are_misses(tmp_path):
+    cache = AnalysisCache(tmp_path)
+    for key, text in [("aa01", '{"result": {}}'), ("aa02", '{"analysis": ["x"]}'), ("aa03", '{"analysis": {"faq": [{"x": 1}]}}')]:
+        (tmp_path / "aa").mkdir(exist_ok=True)
+        (tmp_path / "aa" / f"{key}.json").write_text(text, encoding="utf-8")
+        assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_cache_key_covers_provider_model_prompt_and_lang():
+    base = cache_key("t", "openai", "gpt-4o", "en")
+    assert base == cache_key("t", "OpenAI", "gpt-4o", "en")
+    assert len({
+        base,
+        cache_key("t", "ollama", "gpt-4o", "en"),
+        cache_key("t", "openai", "gpt-4o-mini", "en"),
+        cache_key("t", "openai", "gpt-4o", "ko"),
+        cache_key("t", "openai", "gpt-4o", "en", prompt_version="0"),
+        cache_key("u", "openai", "gpt-4o", "en"),
+    }) == 6
+
+
+def test_cache_evicts_by_age_and_size(tmp_path):
+    cache = AnalysisCache(tmp_path, max_bytes=None, max_age_days=1)
+    analysis = CountingProvider().analyze("x")
+    for key in ("aa01", "aa02", "bb03"):
+        cache.put(key, analysis)
+    stale = tmp_path / "aa" / "aa01.json"
+    old = time.time() - 3 * 86400
+    os.utime(stale, (old, old))
+
+    assert cache.prune() == 1
+    assert cache.get("aa01") is None
+
+    entry_size = (tmp_path / "bb" / "bb03.json").stat().st_size
+    os.utime(tmp_path / "aa" / "aa02.json", (old + 86400 * 2.5, old + 86400 * 2.5))  # least recently used
+    cache.max_bytes = entry_size
+    assert cache.prune() == 1
+    assert cache.get("aa02") is None
+    assert cache.get("bb03") == analysis
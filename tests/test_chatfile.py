@@ -0,0 +1,57 @@
+import json
+import types
+
+import pytest
+
+from bridge.chatfile import load_chat, write_chat
+
+
+def test_load_chat_keeps_embedded_users(tmp_path):
+    path = tmp_path / "chat_2024-11-13.json"
+    path.write_text(json.dumps({"date": "2024-11-13", "users": {"u1": {"name": "A"}}, "messages": []}), encoding="utf-8")
+    (tmp_path / "users.json").write_text(json.dumps({"u2": {"name": "B"}}), encoding="utf-8")
+
+    assert load_chat(path)["users"] == {"u1": {"name": "A"}}
+
+
+def test_load_chat_resolves_users_sidecar(tmp_path):
+    path = tmp_path / "chat_2024-11-13.json"
+    path.write_text(json.dumps({"date": "2024-11-13", "messages": [{"uid": "u2"}]}), encoding="utf-8")
+    (tmp_path / "users.json").write_text(json.dumps({"u2": {"name": "B"}}), encoding="utf-8")
+
+    assert load_chat(path)["users"] == {"u2": {"name": "B"}}
+
+
+def test_load_chat_without_any_user_table(tmp_path):
+    path = tmp_path / "chat_2024-11-13.json"
+    path.write_text(json.dumps({"date": "2024-11-13", "messages": []}), encoding="utf-8")
+
+    assert load_chat(path)["users"] == {}
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl", ".jsonl.gz", ".jsonl.zst"])
+def test_write_and_stream_chat_formats(tmp_path, suffix):
+    if suffix.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    chat = {
+        "channel": {"id": "c1", "name": "일반"},
+        "date": "2024-11-13",
+        "users": {"u1": {"name": "A"}},
+        "messages": [{"id": str(i), "uid": "u1", "content": f"줄 {i}"} for i in range(3)],
+    }
+    path = tmp_path / f"chat_2024-11-13{suffix}"
+    write_chat(path, chat)
+
+    assert load_chat(path) == chat
+    streamed = load_chat(path, stream=True)
+    assert isinstance(streamed["messages"], types.GeneratorType)
+    assert streamed["channel"] == chat["channel"]
+    assert list(streamed["messages"]) == chat["messages"]
+
+
+def test_jsonl_header_is_one_compact_line(tmp_path):
+    path = tmp_path / "chat_2024-11-13.jsonl"
+    write_chat(path, {"channel": {"id": "c1"}, "date": "2024-11-13", "messages": [{"id": "1"}]})
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines == ['{"channel":{"id":"c1"},"date":"2024-11-13"}', '{"id":"1"}']
@@ -19,12 +19,7 @@ class RecordingProvider:
         )
 
 
-def test_cli_dry_run(tmp_path, monkeypatch):
-    in_dir = tmp_path / "in"
-    out_dir = tmp_path / "out"
-    in_dir.mkdir()
-    out_dir.mkdir()
-    monkeypatch.delenv("LANG", raising=False)  # allow .env LANG to be applied
+def write_env(tmp_path, in_dir, out_dir, monkeypatch):
     env = tmp_path / ".env"
     env.write_text(
         f"""\
@@ -52,6 +47,18 @@ SMTP_USE_TLS=true
 """,
         encoding="utf-8",
     )
+    # allow .env values (LANG, and paths left behind by earlier tests) to be applied
+    for line in env.read_text(encoding="utf-8").splitlines():
+        monkeypatch.delenv(line.split("=", 1)[0], raising=False)
+    return env
+
+
+def test_cli_dry_run(tmp_path, monkeypatch):
+    in_dir = tmp_path / "in"
+    out_dir = tmp_path / "out"
+    in_dir.mkdir()
+    out_dir.mkdir()
+    env = write_env(tmp_path, in_dir, out_dir, monkeypatch)
 
     chat = {
         "channel": {"name": "general"},
@@ -74,3 +81,173 @@ SMTP_USE_TLS=true
     cli_module.main()
 
     assert provider.called
+
+
+def test_cli_sizes_context_before_warm_up(tmp_path, monkeypatch):
+    in_dir = tmp_path / "in"
+    out_dir = tmp_path / "out"
+    in_dir.mkdir()
+    out_dir.mkdir()
+    env = write_env(tmp_path, in_dir, out_dir, monkeypatch)
+    for day, words in [("2024-11-13", 10), ("2024-11-14", 400)]:
+        chat = {
+            "channel": {"name": "general"},
+            "date": day,
+            "users": {"u1": {"name": "A"}},
+            "messages": [{"uid": "u1", "ts": f"{day}T00:00:00Z", "content": "word " * words}],
+        }
+        (in_dir / f"chat_{day}.json").write_text(json.dumps(chat), encoding="utf-8")
+
+    import importlib
+    import bridge.cli as cli_module
+    cli_module = importlib.reload(cli_module)
+
+    events = []
+
+    class SizedProvider(RecordingProvider):
+        num_ctx = None
+
+        def size_context(self, prompt_tokens):
+            events.append(("size", prompt_tokens))
+
+        def warm_up(self):
+            events.append(("warm_up",))
+
+    monkeypatch.setattr(cli_module, "create_provider", lambda cfg: SizedProvider())
+    monkeypatch.setattr("sys.argv", ["bridge.cli", "-i", str(in_dir), "--config", str(env), "--dry-run"])
+    cli_module.main()
+
+    (size, tokens), warm = events
+    assert size == "size" and warm == ("warm_up",)
+    assert 500 + 1_000 < tokens < 500 + 2_000  # the bigger day's transcript plus the prompt overhead (ko)
+
+
+def test_collect_inputs_skips_hidden_sidecars(tmp_path):
+    from bridge.cli import collect_inputs
+
+    (tmp_path / "chat_2024-11-13.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "chat_2024-11-14.jsonl.gz").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("", encoding="utf-8")
+    (tmp_path / ".preprocess_state.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "users.json").write_text("{}", encoding="utf-8")
+
+    assert [p.name for p in collect_inputs(tmp_path)] == ["chat_2024-11-13.json", "chat_2024-11-14.jsonl.gz"]
+
+
+def test_cli_reads_channel_window_from_store(tmp_path, monkeypatch):
+    from bridge.store import MessageStore
+    from test_preprocess import raw_message, write_raw_export
+
+    in_dir = tmp_path / "in"
+    out_dir = tmp_path / "out"
+    in_dir.mkdir()
+    out_dir.mkdir()
+    env = write_env(tmp_path, in_dir, out_dir, monkeypatch)
+    export = write_raw_export(
+        tmp_path,
+        [
+            raw_message("1", "2024-11-12T23:00:00+09:00", content="before"),
+            raw_message("2", "2024-11-13T08:00:00+09:00", content="inside"),
+            raw_message("3", "2024-11-14T00:30:00+09:00", content="also inside"),
+            raw_message("4", "2024-11-15T00:00:00+09:00", content="after"),
+        ],
+    )
+
+    import bridge.cli as cli_module
+
+    cli_module.main(["ingest", str(tmp_path), "--db", str(tmp_path / "chat.db")])
+    with MessageStore(tmp_path / "chat.db") as store:
+        assert [c["id"] for c in store.channels()] == ["c1"]
+
+    transcripts = []
+
+    class CapturingProvider(RecordingProvider):
+        def analyze(self, transcript, metadata=None):
+            transcripts.append((transcript, metadata["date"]))
+            return super().analyze(transcript, metadata)
+
+    monkeypatch.setattr(cli_module, "create_provider", lambda cfg: CapturingProvider())
+    cli_module.main(
+        [
+            "--db", str(tmp_path / "chat.db"), "--channel", "general",
+            "--since", "2024-11-13", "--until", "2024-11-14",
+            "--config", str(env), "--no-email",
+        ]
+    )
+
+    assert len(transcripts) == 1
+    transcript, label = transcripts[0]
+    assert "inside" in transcript and "also inside" in transcript
+    assert "before" not in transcript and "after" not in transcript
+    assert label == "2024-11-13_2024-11-14"
+    assert (out_dir / "general_2024-11-13_2024-11-14.md").exists()
+
+
+def test_cli_reuses_cached_analyses(tmp_path, monkeypatch):
+    in_dir = tmp_path / "in"
+    out_dir = tmp_path / "out"
+    in_dir.mkdir()
+    out_dir.mkdir()
+    env = write_env(tmp_path, in_dir, out_dir, monkeypatch)
+    chat = {
+        "channel": {"name": "general"},
+        "date": "2024-11-13",
+        "users": {"u1": {"name": "A"}},
+        "messages": [{"uid": "u1", "ts": "2024-11-13T00:00:00Z", "content": "hi"}],
+    }
+    (in_dir / "chat_2024-11-13.json").write_text(json.dumps(chat), encoding="utf-8")
+
+    import bridge.cli as cli_module
+
+    calls = []
+
+    class CountingProvider(RecordingProvider):
+        def analyze(self, transcript, metadata=None):
+            calls.append(transcript)
+            return super().analyze(transcript, metadata)
+
+    monkeypatch.setattr(cli_module, "create_provider", lambda cfg: CountingProvider())
+    argv = ["-i", str(in_dir), "--config", str(env), "--no-email"]
+    cli_module.main(argv)
+    first = (out_dir / "general_2024-11-13.md").read_text(encoding="utf-8")
+    cli_module.main(argv)
+    assert len(calls) == 1
+    assert (out_dir / "general_2024-11-13.md").read_text(encoding="utf-8") == first
+    assert list((out_dir / ".llm_cache").glob("*/*.json"))
+
+    cli_module.main(argv + ["--no-cache"])
+    assert len(calls) == 2
+
+
+def test_cli_render_rebuilds_reports_from_sidecars(tmp_path, monkeypatch):
+    in_dir = tmp_path / "in"
+    out_dir = tmp_path / "out"
+    in_dir.mkdir()
+    out_dir.mkdir()
+    env = write_env(tmp_path, in_dir, out_dir, monkeypatch)
+    chat = {
+        "channel": {"id": "c1", "name": "general"},
+        "date": "2024-11-13",
+        "users": {"u1": {"name": "A"}},
+        "messages": [{"uid": "u1", "ts": "2024-11-13T00:00:00Z", "content": "hi"}],
+    }
+    (in_dir / "chat_2024-11-13.json").write_text(json.dumps(chat), encoding="utf-8")
+
+    import bridge.cli as cli_module
+
+    monkeypatch.setattr(cli_module, "create_provider", lambda cfg: RecordingProvider())
+    cli_module.main(["-i", str(in_dir), "--config", str(env), "--no-email"])
+    report = out_dir / "general_2024-11-13.md"
+    sidecar = json.loads((out_dir / "general_2024-11-13.json").read_text(encoding="utf-8"))
+    assert sidecar["channel"]["name"] == "general" and sidecar["date"] == "2024-11-13"
+    assert sidecar["analysis"]["summary"]
+
+    original = report.read_text(encoding="utf-8")
+    report.unlink()
+    monkeypatch.setattr(cli_module, "create_provider", None)  # render must not need a provider
+    cli_module.main(["render", str(out_dir)])
+    assert report.read_text(encoding="utf-8") == original
+
+    cli_module.main(["render", str(out_dir / "*.json"), "--format", "html", "--out-dir", str(tmp_path / "html")])
+    html = (tmp_path / "html" / "general_2024-11-13.html").read_text(encoding="utf-8")
+    assert html.startswith("<h1>general 2024-11-13</h1>")
@@ -0,0 +1,87 @@
+from bridge import pipeline
+from bridge.compact import compact_content, compact_transcript, is_emoji_only
+from bridge.llm import ChatHelp, ChatQuestion, LLMAnalysis
+
+
+def test_compact_transcript_merges_turns_and_aliases_long_names():
+    users = {"u1": {"nickname": "Alexandria the Great"}, "u2": {"name": "Bob"}}
+    messages = [
+        {"uid": "u1", "ts": "2024-11-13T10:00:10Z", "content": "build fails"},
+        {"uid": "u1", "ts": "2024-11-13T10:00:40Z", "content": "on main"},
+        {"uid": "u2", "ts": "2024-11-13T10:00:50Z", "content": "which compiler?"},
+        {"uid": "u2", "ts": "2024-11-13T10:01:00Z", "content": "👍"},
+        {"uid": "u1", "ts": "2024-11-13T10:02:00Z", "content": "gcc 13"},
+        {"uid": "u2", "ts": "2024-11-13T10:02:30Z", "content": "ok"},
+        {"uid": "u1", "ts": "2024-11-13T10:03:00Z", "content": "thanks"},
+    ]
+
+    text, aliases = compact_transcript(messages, users)
+    assert aliases == {"U1": "Alexandria the Great"}
+    assert text == "\n".join(
+        [
+            "Speakers: U1=Alexandria the Great",
+            "10:00 U1: build fails",
+            "  on main",
+            "Bob: which compiler?",
+            "10:02 U1: gcc 13",
+            "Bob: ok",
+            "10:03 U1: thanks",
+        ]
+    )
+
+
+def test_compact_content_placeholders():
+    url = "https://github.com/example/project/pull/1234/files#diff-abcdef"
+    assert compact_content(f"see {url}") == "see <url:github.com>"
+    assert compact_content("see https://x.io/a") == "see https://x.io/a"
+    assert compact_content("log:\n```bash\nline1\nline2\n```\ndone") == "log:\n  <code: 2 lines>\n  done"
+    assert compact_content("hi <:pepe:123456>") == "hi :pepe:"
+    assert is_emoji_only("🔥 <a:party:42> 👍🏽")
+    assert not is_emoji_only("ok 👍")
+
+
+def test_chunk_transcript_compact_is_shorter():
+    chat = {
+        "users": {"u1": {"name": "A very long display name"}},
+        "messages": [{"uid": "u1", "ts": f"2024-11-13T10:00:{i:02d}Z", "content": f"m{i}"} for i in range(10)],
+    }
+    plain = pipeline.chunk_transcript(chat["messages"], chat["users"], 10_000)
+    compact = pipeline.chunk_transcript(chat["messages"], chat["users"], 10_000, compact=True)
+    assert len(compact) == 1 and len(compact[0]) < len(plain[0]) / 3
+
+
+def test_pipeline_expands_each_chunks_handles_before_merging():
+    users = {"u1": {"name": "Alexandria the Great"}, "u2": {"name": "Bartholomew Jones"}}
+    turns = [("u1", "u2"), ("u2", "u1")]  # U1 is Alexandria in the first chunk, Bartholomew in the second
+    messages = []
+    for hour, order in enumerate(turns):
+        for i in range(6):
+            messages.append(
+                {"id": f"{hour}{i}", "uid": order[i % 2], "ts": f"2024-11-13T1{hour}:0{i}:00Z", "content": "x" * 40}
+            )
+    seen = []
+
+    class HandleProvider:
+        model = "m"
+
+        def analyze(self, transcript, metadata=None):
+            seen.append(transcript.splitlines()[0])
+            return LLMAnalysis(
+                summary="U1 asked U2 about the build.",
+                faq=[ChatQuestion(question="How do I build?", asker="U1")],
+                help_interactions=[ChatHelp(helper="U2", recipient="U1", task="build", assistance="steps")],
+                action_items=[],
+            )
+
+    chat = {"channel": {"name": "general"}, "date": "2024-11-13", "users": users, "messages": messages}
+    markdown = pipeline.run_pipeline(chat, HandleProvider(), max_chunk_tokens=150, compact=True)
+
+    assert seen == [
+        "Speakers: U1=Alexandria the Great, U2=Bartholomew Jones",
+        "Speakers: U1=Bartholomew Jones, U2=Alexandria the Great",
+    ]
+    assert "U1" not in markdown and "U2" not in markdown
+    assert "- How do I build? (asked by Alexandria the Great)" in markdown
+    assert "- How do I build? (asked by Bartholomew Jones)" in markdown  # not merged away as a duplicate
+    assert "Alexandria the Great asked Bartholomew Jones about the build." in markdown
+    assert "Bartholomew Jones asked Alexandria the Great about the build." in markdown
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from bridge.concurrency import bounded_map
+from bridge.config import max_concurrency_from_env
+
+
+def test_bounded_map_keeps_input_order_and_limit():
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    finished = []
+
+    def work(item):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02 * (5 - item))  # later items finish first
+        with lock:
+            active -= 1
+        return item * 10
+
+    results = bounded_map(work, list(range(6)), max_concurrency=3, on_result=lambda i, _: finished.append(i))
+
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert peak == 3
+    assert sorted(finished) == list(range(6))
+    assert finished != list(range(6))  # completion order differs from input order
+
+
+def test_bounded_map_reraises_errors():
+    def work(item):
+        if item == 2:
+            raise RuntimeError("boom")
+        return item
+
+    with pytest.raises(RuntimeError):
+        bounded_map(work, [1, 2, 3], max_concurrency=2)
+
+
+def test_max_concurrency_from_env(monkeypatch):
+    monkeypatch.delenv("LLM_MAX_CONCURRENCY", raising=False)
+    assert max_concurrency_from_env() == 4
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "8")
+    assert max_concurrency_from_env() == 8
+    for raw in ("0", "2.5"):
+        monkeypatch.setenv("LLM_MAX_CONCURRENCY", raw)
+        with pytest.raises(ValueError):
+            max_concurrency_from_env()
+
+
+def test_bounded_gather_keeps_order_and_limit_without_threads():
+    import asyncio
+
+    from bridge.concurrency import bounded_gather
+
+    active = 0
+    peak = 0
+    threads = set()
+
+    async def work(item):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        threads.add(threading.get_ident())
+        await asyncio.sleep(0.01 * (5 - item))
+        active -= 1
+        return item * 10
+
+    results = asyncio.run(bounded_gather(work, list(range(6)), max_concurrency=3))
+
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert peak == 3
+    assert threads == {threading.get_ident()}
@@ -321,6 +321,10 @@ TIMEZONE=Asia/Seoul
     load_env_file(env_path)
     cfg = load_config()
     assert cfg.llm.api_key == "sk-test"
+    assert cfg.llm.cache_dir == tmp_path / "out" / ".llm_cache"
+
+    monkeypatch.setenv("LLM_CACHE_DIR", "off")
+    assert load_config().llm.cache_dir is None
 
 
 def test_invalid_lang_raises(tmp_path, monkeypatch):
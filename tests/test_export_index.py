@@ -0,0 +1,72 @@
+import json
+from datetime import date
+
+import preprocess
+from bridge.export_index import (
+    index_path,
+    iter_export_days,
+    load_export_index,
+    write_export_index,
+)
+from bridge.exports import iter_export
+from test_preprocess import raw_message, write_raw_export
+
+
+def seed_messages():
+    return [
+        raw_message("1", "2024-11-12T23:59:00-08:00", content='tricky "messages": [{"id": "9"}] \\ }'),
+        raw_message("2", "2024-11-13T00:01:00-08:00", author_id="u2", content="second"),
+        raw_message("3", "2024-11-13T00:30:00-08:00", content="still midnight hour"),
+        raw_message("4", "2024-11-13T05:00:00-08:00", content="dawn"),
+        raw_message("5", "2024-11-14T02:00:00-08:00", content="next day"),
+    ]
+
+
+def test_index_records_hour_runs_and_extracts_days(tmp_path):
+    export = write_raw_export(tmp_path, seed_messages())
+
+    index = write_export_index(export)
+
+    assert index["channel"]["id"] == "c1"
+    assert len(index["hours"]) == 4  # messages 2 and 3 share one hour run
+    events = list(iter_export_days(export, [date(2024, 11, 13)]))
+    assert events[0] == ("channel", index["channel"])
+    assert [m["id"] for _, m in events[1:]] == ["2", "3", "4"]
+    first = [m for k, m in iter_export_days(export, [date(2024, 11, 12)]) if k == "message"]
+    assert first == [m for k, m in iter_export(export) if k == "message" and m["id"] == "1"]
+
+
+def test_index_handles_compact_exports(tmp_path):
+    export = write_raw_export(tmp_path, seed_messages())
+    export.write_text(json.dumps(json.loads(export.read_text(encoding="utf-8"))), encoding="utf-8")
+
+    days = list(iter_export_days(export, [date(2024, 11, 14)]))
+
+    assert [m["id"] for k, m in days if k == "message"] == ["5"]
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    export = write_raw_export(tmp_path, seed_messages())
+    write_export_index(export)
+    write_raw_export(tmp_path, seed_messages() + [raw_message("6", "2024-11-14T03:00:00-08:00", content="new")])
+
+    assert load_export_index(export, build=False) is None
+    assert [m["id"] for k, m in iter_export_days(export, [date(2024, 11, 14)]) if k == "message"] == ["5", "6"]
+    assert index_path(export).exists()
+
+
+def test_preprocess_dates_rewrites_only_selected_days(tmp_path):
+    export = write_raw_export(tmp_path, seed_messages())
+    out = tmp_path / "out"
+    preprocess.preprocess_export(export, out, [preprocess.DailySink()])
+    day12 = (out / "c1" / "chat_2024-11-12.json").read_bytes()
+    (out / "c1" / "chat_2024-11-13.json").unlink()
+
+    result = preprocess.preprocess_export(export, out, [preprocess.DailySink()], dates=[date(2024, 11, 13)])
+
+    assert result["messages"] == 3
+    assert result["files"] == {"daily": 1}
+    rebuilt = json.loads((out / "c1" / "chat_2024-11-13.json").read_text(encoding="utf-8"))
+    assert [m["id"] for m in rebuilt["messages"]] == ["2", "3", "4"]
+    assert (out / "c1" / "chat_2024-11-12.json").read_bytes() == day12
+    assert preprocess.expand_inputs([str(tmp_path)]) == [export]
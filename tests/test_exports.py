@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from bridge.exports import iter_export, snowflake_to_ms
+
+
+def write_export(tmp_path, payload, indent=2):
+    path = tmp_path / "export.json"
+    path.write_text(json.dumps(payload, indent=indent, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def test_iter_export_streams_messages_across_chunk_boundaries(tmp_path):
+    messages = [{"id": str(i), "content": f"메시지 {i} " + "x" * i} for i in range(50)]
+    path = write_export(
+        tmp_path,
+        {"guild": {"id": "g"}, "channel": {"id": "c"}, "messages": messages, "messageCount": 12345},
+    )
+
+    events = list(iter_export(path, chunk_size=7))
+
+    assert events[0] == ("guild", {"id": "g"})
+    assert events[1] == ("channel", {"id": "c"})
+    assert [v for k, v in events if k == "message"] == messages
+    assert events[-1] == ("messageCount", 12345)
+
+
+def test_iter_export_handles_empty_messages(tmp_path):
+    path = write_export(tmp_path, {"channel": {"id": "c"}, "messages": []}, indent=None)
+    assert list(iter_export(path, chunk_size=3)) == [("channel", {"id": "c"})]
+
+
+def test_iter_export_rejects_truncated_file(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text('{"channel": {"id": "c"}, "messages": [{"id": "1"}, {"id": ', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_export(path, chunk_size=4))
+
+
+def test_snowflake_to_ms():
+    # 2024-11-13T08:00:12.965Z
+    assert snowflake_to_ms("1306166717956751413") == 1731484812965
@@ -1,7 +1,7 @@
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-from bridge import pipeline
+from bridge import llm, pipeline
 from bridge.llm import LLMAnalysis, ChatQuestion, ChatHelp, ActionItem, LLMProvider
 
 
@@ -67,3 +67,210 @@ def test_pipeline_forward_lang_metadata(tmp_path):
     chat = sample_chat()
     pipeline.run_pipeline(chat, provider, metadata={"lang": "ko"})
     assert provider.last_metadata["lang"] == "ko"
+
+
+def test_format_hhmm_matches_dateutil():
+    import dateutil.parser
+
+    samples = [
+        "2024-11-13T00:01:00.123-08:00",
+        "2024-11-13T23:59:59+09:00",
+        "2024-11-13 07:05:00Z",
+        "2024-11-13T07:05",
+        "Nov 13 2024 7:05 PM",
+    ]
+    for ts in samples:
+        assert pipeline.format_hhmm(ts) == dateutil.parser.parse(ts).strftime("%H:%M")
+    assert pipeline.format_hhmm("not a time") == "not a time"
+    assert pipeline.format_hhmm(None) == ""
+
+
+class ChunkProvider(LLMProvider):
+    model = "phi3-chat"
+
+    def __init__(self):
+        self.calls = []
+
+    def analyze(self, transcript: str, metadata: Optional[Dict[str, Any]] = None) -> LLMAnalysis:
+        self.calls.append((transcript, metadata))
+        n = len(self.calls)
+        return LLMAnalysis(
+            summary=f"Part {n}",
+            faq=[ChatQuestion(question="How to build?", asker="Alice"), ChatQuestion(question=f"Q{n}", asker="Bob")],
+            help_interactions=[ChatHelp(helper="Bob", recipient="Alice", task="Build", assistance="steps")],
+            action_items=[ActionItem(description=" Fix  CI ", mentioned_by="Dana", type="Technical Tasks")],
+        )
+
+
+def long_chat(num_messages=40):
+    chat = sample_chat()
+    chat["messages"] = [
+        {"uid": "u1", "ts": f"2024-11-13T00:{i:02d}:00Z", "content": f"message {i} " + "word " * 40}
+        for i in range(num_messages)
+    ]
+    return chat
+
+
+def test_pipeline_map_reduces_large_transcripts():
+    provider = ChunkProvider()
+
+    markdown = pipeline.run_pipeline(long_chat(), provider, max_chunk_tokens=200)
+
+    assert len(provider.calls) > 1
+    transcripts = [t for t, _ in provider.calls]
+    assert "\n".join(transcripts) == pipeline.format_messages(long_chat()["messages"], sample_chat()["users"])
+    assert [m["chunk"] for _, m in provider.calls] == list(range(1, len(provider.calls) + 1))
+    assert markdown.count("How to build?") == 1
+    assert markdown.count("Fix  CI") == 1
+    assert "Part 1" in markdown and f"Part {len(provider.calls)}" in markdown
+
+
+def test_pipeline_sizes_chunks_from_model_context():
+    provider = ChunkProvider()  # phi3: 4k context
+
+    pipeline.run_pipeline(long_chat(400), provider)
+
+    budget = llm.chunk_token_budget(llm.model_context_window("phi3-chat"))
+    assert len(provider.calls) > 1
+    assert all(llm.estimate_tokens(t) <= budget + 50 for t, _ in provider.calls)
+
+
+def test_model_context_window_lookup():
+    assert llm.model_context_window("gpt-4o-mini") == 128_000
+    assert llm.model_context_window("gpt-4") == 8_192
+    assert llm.model_context_window("openai/gpt-3.5-turbo") == 16_385
+    assert llm.model_context_window("unknown-local") == llm.DEFAULT_CONTEXT_WINDOW
+    assert llm.model_context_window("gpt-4o", configured=32_000) == 32_000
+
+
+def test_pipeline_concurrent_chunks_merge_in_order():
+    import random
+    import time
+
+    class SlowProvider(LLMProvider):
+        model = "phi3-chat"
+
+        def analyze(self, transcript, metadata=None):
+            time.sleep(random.uniform(0, 0.02))
+            return LLMAnalysis(summary=f"Part {metadata['chunk']}", faq=[], help_interactions=[], action_items=[])
+
+    provider = SlowProvider()
+    progress = []
+    markdown = pipeline.run_pipeline(
+        long_chat(), provider, max_chunk_tokens=200, max_concurrency=4, progress=lambda d, t: progress.append((d, t))
+    )
+
+    total = progress[-1][1]
+    assert total > 4
+    parts = [line for line in markdown.splitlines() if line.startswith("Part ")]
+    assert parts == [f"Part {i}" for i in range(1, total + 1)]
+    assert [d for d, _ in progress] == list(range(1, total + 1))
+
+
+def test_pipeline_incremental_sends_only_new_messages(tmp_path):
+    from bridge.incremental import IncrementalState
+
+    state = IncrementalState(tmp_path / "state")
+    chat = sample_chat()
+    chat["channel"]["id"] = "c1"
+    for i, msg in enumerate(chat["messages"]):
+        msg["id"] = str(1000 + i)
+    provider = ChunkProvider()
+
+    first = pipeline.run_pipeline(chat, provider, state=state)
+    assert len(provider.calls) == 1
+    assert "previous_analysis" not in provider.calls[0][1]
+
+    # Nothing new: rendered from the stored analysis without a call.
+    assert pipeline.run_pipeline(chat, provider, state=state) == first
+    assert len(provider.calls) == 1
+
+    chat["messages"].append({"id": "1002", "uid": "u1", "ts": "2024-11-13T01:00:00Z", "content": "Later"})
+    markdown = pipeline.run_pipeline(chat, provider, state=state)
+
+    transcript, metadata = provider.calls[1]
+    assert transcript == "Alice (01:00): Later"
+    assert metadata["previous_analysis"].summary == "Part 1"
+    assert "Part 2" in markdown and "Part 1" not in markdown  # the updated summary replaces the old one
+    assert markdown.count("How to build?") == 1
+    assert "- Q1 (asked by Bob)" in markdown and "- Q2 (asked by Bob)" in markdown
+    assert state.get("c1", "2024-11-13")[0] == 1002
+
+
+def test_pipeline_incremental_summary_does_not_grow(tmp_path):
+    from bridge.incremental import IncrementalState
+
+    state = IncrementalState(tmp_path / "state")
+    chat = sample_chat()
+    chat["channel"]["id"] = "c1"
+    for i, msg in enumerate(chat["messages"]):
+        msg["id"] = str(1000 + i)
+    provider = ChunkProvider()
+
+    summaries = []
+    for run in range(3):
+        chat["messages"].append({"id": str(2000 + run), "uid": "u1", "ts": "2024-11-13T01:00:00Z", "content": "more"})
+        pipeline.run_pipeline(chat, provider, state=state)
+        summaries.append(state.get("c1", "2024-11-13")[1].summary)
+
+    assert summaries == ["Part 1", "Part 2", "Part 3"]
+    assert [q.question for q in state.get("c1", "2024-11-13")[1].faq] == ["How to build?", "Q1", "Q2", "Q3"]
+
+
+def test_pipeline_incremental_update_spanning_chunks_keeps_one_summary(tmp_path):
+    from bridge.incremental import IncrementalState
+
+    state = IncrementalState(tmp_path / "state")
+    chat = long_chat(10)
+    chat["channel"]["id"] = "c1"
+    for i, msg in enumerate(chat["messages"]):
+        msg["id"] = str(1000 + i)
+    provider = ChunkProvider()
+    pipeline.run_pipeline(chat, provider, state=state)
+
+    chat["messages"].extend(
+        {"id": str(2000 + i), "uid": "u2", "ts": f"2024-11-13T01:{i:02d}:00Z", "content": "later " + "word " * 40}
+        for i in range(30)
+    )
+    provider.calls.clear()
+    pipeline.run_pipeline(chat, provider, state=state, max_chunk_tokens=200)
+
+    assert len(provider.calls) > 1
+    previous = [metadata["previous_analysis"].summary for _, metadata in provider.calls]
+    assert previous == ["Part 1"] + [f"Part {n}" for n in range(1, len(provider.calls))]
+    assert state.get("c1", "2024-11-13")[1].summary == f"Part {len(provider.calls)}"
+
+
+def test_previous_analysis_is_part_of_prompt_and_cache_key():
+    from bridge.cache import cache_key
+    from bridge.providers.ollama_provider import OllamaProvider
+
+    previous = LLMAnalysis(summary="Earlier", faq=[], help_interactions=[], action_items=[])
+    prompt = OllamaProvider(model="m")._build_prompt("Alice (01:00): Later", previous=previous)
+    assert "Earlier" in prompt
+    assert prompt.index("Earlier") < prompt.index("Alice (01:00): Later")
+    assert "Previous analysis" not in OllamaProvider(model="m")._build_prompt("x")
+    assert cache_key("x", "ollama", "m", "en") != cache_key("x", "ollama", "m", "en", context="Earlier")
+
+
+def test_pipeline_fans_out_chunks_on_event_loop(monkeypatch):
+    import threading
+
+    threads = set()
+
+    class AsyncProvider(LLMProvider):
+        model = "phi3-chat"
+
+        def analyze(self, transcript, metadata=None):
+            raise AssertionError("sync path should not be used")
+
+        async def analyze_async(self, transcript, metadata=None):
+            threads.add(threading.get_ident())
+            return LLMAnalysis(summary=f"Part {metadata['chunk']}", faq=[], help_interactions=[], action_items=[])
+
+    monkeypatch.setattr(pipeline, "async_http_available", lambda: True)
+    markdown = pipeline.run_pipeline(long_chat(), AsyncProvider(), max_chunk_tokens=200, max_concurrency=4)
+
+    parts = [line for line in markdown.splitlines() if line.startswith("Part ")]
+    assert len(parts) > 4 and parts == [f"Part {i}" for i in range(1, len(parts) + 1)]
+    assert len(threads) == 1
@@ -0,0 +1,281 @@
+import json
+from datetime import datetime, timedelta
+
+import preprocess
+import preprocess_hourly
+
+
+def raw_message(msg_id, timestamp, author_id="u1", content="hello", **extra):
+    message = {
+        "id": msg_id,
+        "type": "Default",
+        "timestamp": timestamp,
+        "timestampEdited": None,
+        "content": content,
+        "author": {"id": author_id, "name": f"name-{author_id}", "nickname": f"nick-{author_id}", "roles": []},
+        "mentions": [],
+        "reactions": [],
+    }
+    message.update(extra)
+    return message
+
+
+def write_raw_export(tmp_path, messages, channel_id="c1", name="export.json"):
+    payload = {
+        "guild": {"id": "g1", "name": "Guild"},
+        "channel": {"id": channel_id, "name": "general", "topic": None, "category": "Dev"},
+        "dateRange": {"after": None, "before": None},
+        "messages": messages,
+        "messageCount": len(messages),
+    }
+    path = tmp_path / name
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return path
+
+
+def test_simplify_chat_export_writes_daily_files(tmp_path):
+    export = write_raw_export(
+        tmp_path,
+        [
+            raw_message("1", "2024-11-12T23:59:00.123-08:00"),
+            raw_message("2", "2024-11-13T00:01:00-08:00", author_id="u2", content="second"),
+            raw_message("3", "2024-11-13T01:00:00-08:00", content=""),
+            raw_message("4", "2024-11-13T02:00:00-08:00", content="third", reference={"messageId": "2"}),
+        ],
+    )
+
+    count = preprocess.simplify_chat_export(export, tmp_path / "out")
+
+    assert count == 2
+    day1 = json.loads((tmp_path / "out" / "c1" / "chat_2024-11-12.json").read_text(encoding="utf-8"))
+    day2 = json.loads((tmp_path / "out" / "c1" / "chat_2024-11-13.json").read_text(encoding="utf-8"))
+    assert day1["channel"] == {"id": "c1", "name": "general", "category": "Dev"}
+    assert [m["id"] for m in day1["messages"]] == ["1"]
+    assert [m["id"] for m in day2["messages"]] == ["2", "4"]
+    assert day2["messages"][1]["ref"] == "2"
+    assert set(day2["users"]) == {"u1", "u2"}
+
+
+def test_bucket_writer_merges_late_messages(tmp_path):
+    export = write_raw_export(
+        tmp_path,
+        [
+            raw_message("1", "2024-11-12T10:00:00-08:00", content="a"),
+            raw_message("2", "2024-11-13T10:00:00-08:00", content="b"),
+            raw_message("3", "2024-11-12T11:00:00-08:00", content="late"),
+        ],
+    )
+
+    preprocess.simplify_chat_export(export, tmp_path / "out")
+
+    day1 = json.loads((tmp_path / "out" / "c1" / "chat_2024-11-12.json").read_text(encoding="utf-8"))
+    assert [m["content"] for m in day1["messages"]] == ["a", "late"]
+
+
+def test_chunk_chat_export_writes_hour_buckets(tmp_path):
+    export = write_raw_export(
+        tmp_path,
+        [
+            raw_message("1", "2024-11-13T01:00:00-08:00"),
+            raw_message("2", "2024-11-13T03:59:00-08:00"),
+            raw_message("3", "2024-11-13T04:00:00-08:00"),
+        ],
+    )
+
+    count = preprocess_hourly.chunk_chat_export(export, tmp_path / "out", bucket_size_hours=4)
+
+    assert count == 2
+    first = json.loads((tmp_path / "out" / "c1" / "chat_2024-11-13_0000.json").read_text(encoding="utf-8"))
+    assert first["timeBlock"] == "00:00-04:00"
+    assert [m["id"] for m in first["messages"]] == ["1", "2"]
+    assert (tmp_path / "out" / "c1" / "chat_2024-11-13_0400.json").exists()
+
+
+def test_token_budget_chunks_split_busy_and_merge_quiet_windows(tmp_path):
+    long_text = "x" * 400  # ~100 tokens in English
+    export = write_raw_export(
+        tmp_path,
+        [
+            raw_message("1", "2024-11-13T01:00:00-08:00", content="quiet"),
+            raw_message("2", "2024-11-13T06:30:00-08:00", content="still quiet"),
+            raw_message("3", "2024-11-13T09:00:00-08:00", content=long_text),
+            raw_message("4", "2024-11-13T09:00:30-08:00", content=long_text),
+            raw_message("5", "2024-11-13T09:01:00-08:00", content=long_text),
+            raw_message("6", "2024-11-14T00:10:00-08:00", content="next day"),
+        ],
+    )
+
+    count = preprocess_hourly.chunk_chat_export(export, tmp_path / "out", bucket_size_hours=8, max_tokens=250)
+
+    out = tmp_path / "out" / "c1"
+    chunks = {p.name: json.loads(p.read_text(encoding="utf-8")) for p in sorted(out.glob("chat_*.json"))}
+    assert count == 4
+    assert {name: [m["id"] for m in c["messages"]] for name, c in chunks.items()} == {
+        "chat_2024-11-13_0100.json": ["1", "2"],  # 5.5h of quiet chat in one chunk
+        "chat_2024-11-13_0900.json": ["3", "4"],  # budget reached
+        "chat_2024-11-13_0901.json": ["5"],
+        "chat_2024-11-14_0010.json": ["6"],  # chunks never cross midnight
+    }
+    assert chunks["chat_2024-11-13_0100.json"]["timeBlock"] == "01:00-06:30"
+    assert chunks["chat_2024-11-13_0100.json"]["date"] == "2024-11-13"
+
+
+def test_hourly_token_budget_reads_lang_from_locale(tmp_path, monkeypatch):
+    captured = []
+    monkeypatch.setattr(preprocess_hourly, "run_inputs", lambda inputs, out, sinks, *rest: captured.extend(sinks))
+    monkeypatch.setenv("LANG", "ko_KR.UTF-8")
+    argv = ["preprocess_hourly.py", "in.json", str(tmp_path), "--token-budget", "500", "--config", str(tmp_path / ".env")]
+    monkeypatch.setattr("sys.argv", argv)
+
+    preprocess_hourly.main()
+    assert captured[0].lang == "ko"
+
+
+def test_local_time_ms_matches_iso_parse():
+    # Snowflake 1306166717956751413 was created at 2024-11-13T08:00:12.965Z
+    ts = "2024-11-13T00:00:12.965-08:00"
+    parsed = preprocess.parse_timestamp(ts).replace(tzinfo=None)
+    expected = (parsed - datetime(1970, 1, 1)) // timedelta(milliseconds=1)
+
+    assert preprocess.local_time_ms("1306166717956751413", ts) == expected
+    assert preprocess.local_time_ms("1306166717956751413", "2024-11-13T08:00:12.965Z") == expected + 8 * preprocess.HOUR_MS
+    # Non-snowflake ids fall back to the ISO timestamp
+    assert preprocess.local_time_ms("42", ts) == expected
+
+
+def test_time_bucket_key_uses_local_wall_clock():
+    ts = "2024-11-13T22:30:00+09:00"
+    local_ms = preprocess.local_time_ms("not-a-snowflake", ts)
+    assert preprocess.time_bucket_key(local_ms, 5) == preprocess.time_bucket_key(local_ms + preprocess.HOUR_MS, 5)
+    day, hour = preprocess.time_bucket_key(local_ms, 5)
+    assert (preprocess.day_label(day), hour) == ("2024-11-13", 20)
+
+
+def test_preprocess_export_writes_all_granularities_in_one_pass(tmp_path, monkeypatch):
+    export = write_raw_export(
+        tmp_path,
+        [
+            raw_message("1", "2024-11-13T01:00:00-08:00"),
+            raw_message("2", "2024-11-13T05:00:00-08:00"),
+            raw_message("3", "2024-11-14T09:00:00-08:00"),
+        ],
+    )
+    parsed = []
+    original_iter = preprocess.iter_export
+    monkeypatch.setattr(preprocess, "iter_export", lambda path: (parsed.append(path), original_iter(path))[1])
+
+    summary = preprocess.preprocess_export(
+        export,
+        tmp_path / "out",
+        [preprocess.DailySink(), preprocess.HourlySink(4, subdir="4h"), preprocess.HourlySink(12, subdir="12h")],
+    )
+
+    assert len(parsed) == 1
+    assert summary["messages"] == 3
+    assert summary["files"] == {"daily": 2, "4h": 3, "12h": 2}
+    channel_dir = tmp_path / "out" / "c1"
+    assert sorted(p.name for p in channel_dir.glob("*.json")) == ["chat_2024-11-13.json", "chat_2024-11-14.json"]
+    assert (channel_dir / "4h" / "chat_2024-11-13_0400.json").exists()
+    half_day = json.loads((channel_dir / "12h" / "chat_2024-11-13_0000.json").read_text(encoding="utf-8"))
+    assert half_day["timeBlock"] == "00:00-12:00"
+    assert [m["id"] for m in half_day["messages"]] == ["1", "2"]
+
+
+def test_incremental_run_only_touches_affected_files(tmp_path):
+    first = [
+        raw_message("10", "2024-11-12T10:00:00-08:00", content="old day"),
+        raw_message("20", "2024-11-13T10:00:00-08:00", content="today 1"),
+    ]
+    export = write_raw_export(tmp_path, first)
+    out = tmp_path / "out"
+    sinks = lambda: [preprocess.DailySink(), preprocess.HourlySink(4, subdir="4h")]  # noqa: E731
+    preprocess.preprocess_export(export, out, sinks(), incremental=True)
+
+    old_day = out / "c1" / "chat_2024-11-12.json"
+    old_bytes, old_mtime = old_day.read_bytes(), old_day.stat().st_mtime_ns
+    state = json.loads((out / "c1" / preprocess.STATE_FILE).read_text(encoding="utf-8"))
+    assert state["highWaterMarks"] == {"daily@.": "20", "4h@4h": "20"}
+
+    export = write_raw_export(
+        tmp_path,
+        first + [raw_message("30", "2024-11-13T11:00:00-08:00", author_id="u2", content="today 2")],
+    )
+    summary = preprocess.preprocess_export(export, out, sinks(), incremental=True)
+
+    assert summary["files"] == {"daily": 1, "4h": 1}
+    assert old_day.read_bytes() == old_bytes
+    assert old_day.stat().st_mtime_ns == old_mtime
+    today = json.loads((out / "c1" / "chat_2024-11-13.json").read_text(encoding="utf-8"))
+    assert [m["id"] for m in today["messages"]] == ["20", "30"]
+    assert set(today["users"]) == {"u1", "u2"}
+    hour = json.loads((out / "c1" / "4h" / "chat_2024-11-13_0800.json").read_text(encoding="utf-8"))
+    assert [m["id"] for m in hour["messages"]] == ["20", "30"]
+
+    # Nothing new: no files are rewritten
+    assert preprocess.preprocess_export(export, out, sinks(), incremental=True)["files"] == {"daily": 0, "4h": 0}
+
+
+def test_preprocess_many_aggregates_per_channel(tmp_path):
+    exports = tmp_path / "exports"
+    exports.mkdir()
+    write_raw_export(exports, [raw_message("1", "2024-11-13T01:00:00-08:00")], channel_id="c1", name="a.json")
+    write_raw_export(exports, [raw_message("2", "2024-11-14T01:00:00-08:00")], channel_id="c1", name="b.json")
+    write_raw_export(
+        exports,
+        [raw_message("3", "2024-11-13T01:00:00-08:00"), raw_message("4", "2024-11-13T02:00:00-08:00")],
+        channel_id="c2",
+        name="c.json",
+    )
+
+    inputs = preprocess.expand_inputs([str(exports)])
+    summary = preprocess.preprocess_many(inputs, tmp_path / "out", [preprocess.DailySink()], workers=2)
+
+    assert [p.name for p in inputs] == ["a.json", "b.json", "c.json"]
+    assert summary["channels"]["c1"]["messages"] == 2
+    assert summary["channels"]["c1"]["files"] == {"daily": 2}
+    assert summary["channels"]["c2"]["messages"] == 2
+    assert summary["totals"] == {"inputs": 3, "channels": 2, "messages": 4}
+    saved = json.loads((tmp_path / "out" / "preprocess_summary.json").read_text(encoding="utf-8"))
+    assert saved == summary
+    assert sorted(p.name for p in (tmp_path / "out" / "c1").glob("*.json")) == ["chat_2024-11-13.json", "chat_2024-11-14.json"]
+
+
+def test_user_table_layouts(tmp_path):
+    export = write_raw_export(
+        tmp_path,
+        [
+            raw_message("1", "2024-11-12T10:00:00-08:00", author_id="u1"),
+            raw_message("2", "2024-11-13T10:00:00-08:00", author_id="u2"),
+        ],
+    )
+
+    preprocess.simplify_chat_export(export, tmp_path / "bucket")
+    day2 = json.loads((tmp_path / "bucket" / "c1" / "chat_2024-11-13.json").read_text(encoding="utf-8"))
+    assert list(day2["users"]) == ["u2"]
+
+    preprocess.simplify_chat_export(export, tmp_path / "sidecar", users="sidecar")
+    channel_dir = tmp_path / "sidecar" / "c1"
+    day2 = json.loads((channel_dir / "chat_2024-11-13.json").read_text(encoding="utf-8"))
+    assert "users" not in day2
+    sidecar = json.loads((channel_dir / "users.json").read_text(encoding="utf-8"))
+    assert set(sidecar) == {"u1", "u2"}
+
+    from bridge.chatfile import load_chat
+
+    assert set(load_chat(channel_dir / "chat_2024-11-13.json")["users"]) == {"u1", "u2"}
+
+
+def test_preprocess_writes_compressed_jsonl(tmp_path):
+    export = write_raw_export(
+        tmp_path,
+        [raw_message("1", "2024-11-13T01:00:00-08:00"), raw_message("2", "2024-11-13T02:00:00-08:00")],
+    )
+    suffix = preprocess.chat_file_suffix("jsonl", "gzip")
+
+    preprocess.preprocess_export(export, tmp_path / "out", [preprocess.DailySink(suffix=suffix)])
+
+    from bridge.chatfile import load_chat
+
+    chat = load_chat(tmp_path / "out" / "c1" / "chat_2024-11-13.jsonl.gz")
+    assert chat["date"] == "2024-11-13"
+    assert [m["id"] for m in chat["messages"]] == ["1", "2"]
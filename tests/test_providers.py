@@ -1,3 +1,4 @@
+import asyncio
 from types import SimpleNamespace
 
 import pytest
@@ -48,15 +49,20 @@ def fake_genai_module():
 
     fake.configure = configure
 
-    class Response:
-        def __init__(self):
-            self.text = '{"summary":"GO","faq":[],"help_interactions":[],"action_items":[]}'
+    text = '{"summary":"GO","faq":[],"help_interactions":[],"action_items":[]}'
+    fake.answers = [SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))])]
 
-    class Gen:
-        def generate_text(self, model, prompt):
-            return Response()
+    class GenerativeModel:
+        def __init__(self, model):
+            self.model = model
+
+        def generate_content(self, prompt):
+            return fake.answers.pop(0)
+
+        async def generate_content_async(self, prompt):
+            return fake.answers.pop(0)
 
-    fake.generate_text = Gen().generate_text
+    fake.GenerativeModel = GenerativeModel
     return fake
 
 
@@ -69,6 +75,18 @@ def test_google_provider_parses(monkeypatch):
     assert analysis.faq == []
 
 
+def test_google_provider_sync_and_async_share_api_and_parsing(monkeypatch):
+    fake = fake_genai_module()
+    fake.answers = fake.answers * 2
+    monkeypatch.setattr("bridge.providers.google_provider.genai", fake, raising=False)
+    provider = GoogleGeminiProvider(model="gemini-pro", api_key="key")
+
+    assert asyncio.run(provider.analyze_async("transcript")) == provider.analyze("transcript")
+    fake.answers = [SimpleNamespace(candidates=[], prompt_feedback="block_reason: SAFETY")]
+    with pytest.raises(ValueError, match="SAFETY"):
+        asyncio.run(provider.analyze_async("transcript"))
+
+
 def test_create_provider_openai(monkeypatch):
     cfg = SimpleNamespace(provider="openai", model="gpt-4o-mini", api_key="key", base_url=None)
     fake = fake_openai_module()
@@ -99,11 +117,17 @@ def fake_requests_module():
         def raise_for_status(self):
             return
 
-    class Requests:
-        @staticmethod
-        def post(*args, **kwargs):
+    class FakeSession:
+        def mount(self, prefix, adapter):
+            return
+
+        def post(self, *args, **kwargs):
             return Response()
 
+    class Requests:
+        ConnectionError = Exception
+        Session = FakeSession
+
     return Requests()
 
 
@@ -142,17 +166,159 @@ def test_ollama_fallback_to_chat(monkeypatch):
             return Generate404Response()
         return ChatResponse()
 
-    class FakeRequests:
-        ConnectionError = Exception
+    class FakeSession:
+        def mount(self, prefix, adapter):
+            return
 
-        @staticmethod
-        def post(url, **kwargs):
+        def post(self, url, **kwargs):
             return post(url, **kwargs)
 
+    class FakeRequests:
+        ConnectionError = Exception
+        Session = FakeSession
+
     monkeypatch.setattr("bridge.providers.ollama_provider.requests", FakeRequests(), raising=False)
+    monkeypatch.setattr("bridge.providers.ollama_provider._endpoints", {})
     provider = OllamaProvider(model="gpt-oss:20b", base_url="http://dummy")
     analysis = provider.analyze("hi")
 
     assert calls[0].endswith("/api/generate")
     assert calls[1].endswith("/api/chat")
     assert analysis.summary == "OK"
+
+    # The missing endpoint is remembered for the base_url: later calls (from any provider) go straight to chat.
+    OllamaProvider(model="gpt-oss:20b", base_url="http://dummy/").analyze("again")
+    assert [c.rsplit("/", 1)[-1] for c in calls] == ["generate", "chat", "chat"]
+
+
+def test_ollama_context_options_sized_from_prompt():
+    from bridge.providers.ollama_provider import context_options
+
+    assert context_options(100, 16_384) == {"num_ctx": 16_384, "num_predict": 512}
+    assert context_options(10_000, 16_384) == {"num_ctx": 16_384, "num_predict": 2_500}
+    assert context_options(7_000, 8_192) == {"num_ctx": 8_192, "num_predict": 1_192}
+
+
+def test_ollama_warm_up_loads_the_num_ctx_requests_use(monkeypatch):
+    payloads = []
+
+    class FakeSession:
+        def mount(self, prefix, adapter):
+            return
+
+        def post(self, url, **kwargs):
+            payloads.append((url.rsplit("/", 1)[-1], kwargs["json"]))
+            return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"response": '{"summary": "OK"}'})
+
+    class FakeRequests:
+        ConnectionError = Exception
+        Session = FakeSession
+
+    monkeypatch.setattr("bridge.providers.ollama_provider.requests", FakeRequests(), raising=False)
+    monkeypatch.setattr("bridge.providers.ollama_provider._endpoints", {})
+    provider = OllamaProvider(model="gpt-oss:20b", base_url="http://dummy", keep_alive="30m", context_window=16_384)
+
+    provider.warm_up().join(timeout=5)
+    provider.analyze("x" * 40_000)
+    provider.analyze("short")
+
+    warm, big, small = (payload for _, payload in payloads)
+    assert warm == {"model": "gpt-oss:20b", "prompt": "", "options": {"num_ctx": 16_384}, "keep_alive": "30m"}
+    # Same num_ctx as the warm-up for every request, so Ollama never reloads the model.
+    assert big["keep_alive"] == "30m" and big["options"]["num_ctx"] == 16_384
+    assert big["options"]["num_predict"] > 2_500  # a quarter of the prompt
+    assert small["options"] == {"num_ctx": 16_384, "num_predict": 512}
+
+
+def test_ollama_sizes_one_num_ctx_per_run_from_the_largest_prompt(monkeypatch):
+    from bridge.providers.ollama_provider import num_ctx_for
+
+    assert num_ctx_for(200, 131_072) == 2_048
+    assert num_ctx_for(5_000, 131_072) == 8_192  # prompt + a quarter of it for the answer
+    assert num_ctx_for(200_000, 131_072) == 131_072
+
+    payloads = []
+
+    class FakeSession:
+        def mount(self, prefix, adapter):
+            return
+
+        def post(self, url, **kwargs):
+            payloads.append(kwargs["json"]["options"]["num_ctx"])
+            return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"response": '{"summary": "OK"}'})
+
+    monkeypatch.setattr(
+        "bridge.providers.ollama_provider.requests",
+        SimpleNamespace(ConnectionError=Exception, Session=FakeSession),
+        raising=False,
+    )
+    monkeypatch.setattr("bridge.providers.ollama_provider._endpoints", {})
+    provider = OllamaProvider(model="gpt-oss:20b", base_url="http://dummy")  # 128k window, not configured
+
+    assert provider.size_context(3_000) == 4_096
+    provider.warm_up().join(timeout=5)
+    provider.analyze("short")
+    provider.analyze("x" * 8_000)
+    assert payloads == [4_096, 4_096, 4_096]  # never the model's full 131072 window
+    provider.analyze("x" * 40_000)  # larger than the run was sized for: grows once
+    assert payloads[-1] == 16_384
+
+
+def test_ollama_analyze_async_uses_pooled_client(monkeypatch):
+    import asyncio
+
+    posts = []
+
+    class Response:
+        def raise_for_status(self):
+            return
+
+        def json(self):
+            return {"response": '{"summary":"async OK","faq":[],"help_interactions":[],"action_items":[]}'}
+
+    class FakeClient:
+        async def post(self, url, **kwargs):
+            posts.append((url, kwargs["json"]["model"]))
+            return Response()
+
+    client = FakeClient()
+    monkeypatch.setattr("bridge.providers.ollama_provider.requests", fake_requests_module(), raising=False)
+    monkeypatch.setattr("bridge.providers.ollama_provider._endpoints", {})
+    monkeypatch.setattr("bridge.providers.ollama_provider.get_async_client", lambda: client)
+    provider = OllamaProvider(model="gpt-oss:20b", base_url="http://dummy")
+
+    async def fan_out():
+        return await asyncio.gather(*(provider.analyze_async(f"t{i}") for i in range(5)))
+
+    analyses = asyncio.run(fan_out())
+    assert [a.summary for a in analyses] == ["async OK"] * 5
+    assert posts == [("http://dummy/api/generate", "gpt-oss:20b")] * 5
+
+
+def test_analyze_async_falls_back_to_thread_without_httpx(monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr("bridge.providers.ollama_provider.requests", fake_requests_module(), raising=False)
+    monkeypatch.setattr("bridge.providers.ollama_provider.get_async_client", lambda: None)
+    monkeypatch.setattr(OllamaProvider, "_post_generate", lambda self, prompt, on_delta=None, options=None: '{"summary":"sync OK"}')
+    provider = OllamaProvider(model="gpt-oss:20b", base_url="http://dummy")
+
+    assert asyncio.run(provider.analyze_async("hi")).summary == "sync OK"
+
+
+def test_missing_httpx_warns_once(monkeypatch, caplog):
+    import asyncio
+
+    from bridge import aio
+
+    monkeypatch.setattr(aio, "httpx", None)
+    monkeypatch.setattr(aio, "_warned_missing_httpx", False)
+
+    async def clients():
+        return [aio.get_async_client(), aio.get_async_client()]
+
+    with caplog.at_level("WARNING", logger="bridge.aio"):
+        assert asyncio.run(clients()) == [None, None]
+    assert [r.message for r in caplog.records].count(
+        "httpx is not installed; async LLM requests fall back to one thread per call"
+    ) == 1
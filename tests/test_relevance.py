@@ -0,0 +1,55 @@
+from bridge import pipeline
+import pytest
+
+from bridge.relevance import ROLE_WEIGHTS, role_weight, role_weights_from_env, score_messages, select_relevant
+
+
+def test_score_messages_rewards_questions_code_threads_and_roles():
+    users = {"mod": {"name": "M", "roles": ["Moderator"]}, "u": {"name": "U"}, "bot": {"name": "B", "isBot": True}}
+    messages = [
+        {"id": "1", "uid": "u", "content": "lol"},
+        {"id": "2", "uid": "u", "content": "how do I configure the twitter client?"},
+        {"id": "3", "uid": "mod", "content": "set `TWITTER_2FA` in .env", "ref": "2"},
+        {"id": "4", "uid": "u", "content": "thanks that worked", "ref": "3", "reactions": [{"emoji": "🔥", "count": 5}]},
+        {"id": "5", "uid": "bot", "content": "gm"},
+    ]
+    scores = score_messages(messages, users)
+    assert scores[1] > scores[0] and scores[2] > scores[0] and scores[3] > scores[0]
+    assert scores[4] < scores[0]
+    assert role_weight(["Verified", "Moderatoor"]) == 1.5 and role_weight(["Verified"]) == 0
+
+
+def test_select_relevant_fits_budget_in_chronological_order():
+    messages = [
+        {"id": "1", "uid": "u", "content": "gm"},
+        {"id": "2", "uid": "u", "content": "why does pnpm build fail?"},
+        {"id": "3", "uid": "u", "content": "ok"},
+        {"id": "4", "uid": "u", "content": "try ```pnpm clean```", "ref": "2"},
+    ]
+    assert select_relevant(messages, {}, [5, 5, 5, 5], 10) == [1, 3]
+    assert select_relevant(messages, {}, [5, 5, 5, 5], 100) == [0, 1, 2, 3]
+
+
+def test_chunk_transcript_preselects_oversized_days():
+    users = {"u": {"name": "U"}}
+    messages = [{"id": str(i), "uid": "u", "ts": "2024-11-13T10:00:00Z", "content": "gm"} for i in range(50)]
+    messages[30]["content"] = "how do I reset the database?"
+    chunks = pipeline.chunk_transcript(messages, users, 10_000, max_total_tokens=20)
+    assert len(chunks) == 1
+    assert "how do I reset the database?" in chunks[0]
+    assert chunks[0].count("\n") < 10
+
+
+def test_role_weights_from_env(monkeypatch):
+    monkeypatch.delenv("LLM_ROLE_WEIGHTS", raising=False)
+    assert role_weights_from_env() == ROLE_WEIGHTS
+    assert role_weight(["Core Team"]) == 0
+
+    monkeypatch.setenv("LLM_ROLE_WEIGHTS", "Core=1.5, team=1,")
+    weights = role_weights_from_env()
+    assert weights == {"core": 1.5, "team": 1.0}
+    assert role_weight(["Core Team"], weights) == 1.5
+
+    monkeypatch.setenv("LLM_ROLE_WEIGHTS", "core")
+    with pytest.raises(ValueError):
+        role_weights_from_env()
@@ -0,0 +1,102 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bridge import retry as retry_module
+from bridge.llm import LLMAnalysis
+from bridge.retry import RateLimit, RetryPolicy, ThrottledProvider, TokenBucket, is_retryable, retry_after
+
+
+class HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status, headers=headers or {})
+
+
+class FlakyProvider:
+    model = "m"
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def analyze(self, transcript, metadata=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return LLMAnalysis(summary="ok", faq=[], help_interactions=[], action_items=[])
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(retry_module.time, "sleep", slept.append)
+    monkeypatch.setattr(retry_module, "_limiters", {})
+    return slept
+
+
+def test_retries_transient_errors_honoring_retry_after(sleeps):
+    provider = FlakyProvider([HTTPError(429, {"Retry-After": "7"}), HTTPError(503)])
+    throttled = ThrottledProvider(provider, "openai", policy=RetryPolicy(base_delay=0.5))
+
+    assert throttled.analyze("hi").summary == "ok"
+    assert provider.calls == 3
+    assert sleeps[0] == 7.0  # the server's Retry-After beats the jittered backoff
+    assert 0 <= sleeps[1] <= 1.0
+
+
+def test_gives_up_on_client_errors_and_exhausted_budgets(sleeps):
+    provider = FlakyProvider([HTTPError(400)])
+    with pytest.raises(HTTPError):
+        ThrottledProvider(provider, "openai").analyze("hi")
+    assert provider.calls == 1 and sleeps == []
+
+    provider = FlakyProvider([HTTPError(500)] * 10)
+    with pytest.raises(HTTPError):
+        ThrottledProvider(provider, "openai", policy=RetryPolicy(max_attempts=3, base_delay=0.01)).analyze("hi")
+    assert provider.calls == 3
+
+    provider = FlakyProvider([HTTPError(429, {"retry-after-ms": "120000"})])
+    with pytest.raises(HTTPError):
+        ThrottledProvider(provider, "openai", policy=RetryPolicy(max_total=60)).analyze("hi")
+    assert provider.calls == 1
+
+
+def test_retryable_classification():
+    class ConnectionError(OSError):  # like requests.ConnectionError, not the builtin
+        pass
+
+    assert is_retryable(ConnectionError("refused"))
+    assert is_retryable(HTTPError(502))
+    assert not is_retryable(ValueError("no JSON"))
+    assert retry_after(HTTPError(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+
+
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve(5) == pytest.approx(3.0, abs=0.05)  # capped at the capacity
+
+
+def test_limits_are_shared_per_provider_and_model(sleeps, monkeypatch):
+    async_sleeps = []
+
+    async def fake_sleep(delay):
+        async_sleeps.append(delay)
+
+    monkeypatch.setattr(retry_module.asyncio, "sleep", fake_sleep)
+    limit = RateLimit(requests_per_minute=60, tokens_per_minute=1_200)
+    first = ThrottledProvider(FlakyProvider([]), "gemini", limit=limit)
+    second = ThrottledProvider(FlakyProvider([]), "gemini", limit=limit)
+    assert first.limiter is second.limiter
+
+    async def fan_out():
+        await asyncio.gather(*(second.analyze_async("x" * 396) for _ in range(2)))
+
+    first.analyze("x" * 396)  # 600 tokens with the prompt overhead: half the minute's budget
+    assert sleeps == []
+    asyncio.run(fan_out())
+    assert async_sleeps == [pytest.approx(30.0, abs=0.5)]  # only the third request waits for the refill
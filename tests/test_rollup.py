@@ -0,0 +1,100 @@
+from datetime import date
+
+from bridge.llm import ActionItem, ChatQuestion, LLMAnalysis
+from bridge.pipeline import write_analysis_sidecar
+from bridge.rollup import collect_daily_analyses, rollup_analyses
+from test_cli import write_env
+
+
+def daily(summary, question):
+    return LLMAnalysis(
+        summary=summary,
+        faq=[ChatQuestion(question=question, asker="a"), ChatQuestion(question="How to build?", asker="b")],
+        help_interactions=[],
+        action_items=[ActionItem(description="Fix CI", mentioned_by="c", type="Technical Tasks")],
+    )
+
+
+def write_days(out_dir):
+    channel = {"id": "c1", "name": "general"}
+    for day in range(11, 16):
+        label = f"2024-11-{day}"
+        write_analysis_sidecar(out_dir / f"general_{label}.json", daily(f"Day {day} talk", f"Q{day}?"), channel, label)
+    write_analysis_sidecar(out_dir / "random_2024-11-12.json", daily("Other", "Q?"), {"id": "c2", "name": "random"}, "2024-11-12")
+
+
+class SummaryProvider:
+    def __init__(self):
+        self.calls = []
+
+    def analyze(self, transcript, metadata=None):
+        self.calls.append((transcript, metadata))
+        return LLMAnalysis(summary="Week in review", faq=[], help_interactions=[], action_items=[])
+
+
+def test_rollup_dedups_items_and_summarizes_daily_summaries(tmp_path):
+    write_days(tmp_path)
+    groups = collect_daily_analyses(tmp_path, date(2024, 11, 12), date(2024, 11, 14), ["general"])
+    assert [label for label, _ in groups[0]["days"]] == ["2024-11-12", "2024-11-13", "2024-11-14"]
+
+    provider = SummaryProvider()
+    analysis = rollup_analyses(groups[0]["days"], provider, "general")
+
+    assert len(provider.calls) == 1
+    transcript, metadata = provider.calls[0]
+    assert transcript.splitlines()[1:] == ["2024-11-12: Day 12 talk", "2024-11-13: Day 13 talk", "2024-11-14: Day 14 talk"]
+    assert metadata["rollup"] is True
+    assert analysis.summary == "Week in review"
+    assert [q.question for q in analysis.faq] == ["Q12?", "How to build?", "Q13?", "Q14?"]
+    assert len(analysis.action_items) == 1
+
+
+def test_cli_rollup_writes_window_report(tmp_path, monkeypatch):
+    in_dir = tmp_path / "in"
+    out_dir = tmp_path / "out"
+    in_dir.mkdir()
+    out_dir.mkdir()
+    env = write_env(tmp_path, in_dir, out_dir, monkeypatch)
+    write_days(out_dir)
+
+    import bridge.cli as cli_module
+
+    provider = SummaryProvider()
+    monkeypatch.setattr(cli_module, "create_provider", lambda cfg: provider)
+    cli_module.main(["rollup", "--since", "2024-11-11", "--until", "2024-11-17", "--config", str(env), "--no-email", "--no-cache"])
+
+    assert len(provider.calls) == 1  # random has a single day, which needs no summary call
+    general = (out_dir / "general_2024-11-11_2024-11-17.md").read_text(encoding="utf-8")
+    assert "Week in review" in general and general.count("How to build?") == 1
+    assert (out_dir / "general_2024-11-11_2024-11-17.json").exists()
+    assert (out_dir / "random_2024-11-11_2024-11-17.md").exists()
+
+    # Rollup sidecars are not picked up as daily input by later rollups.
+    groups = collect_daily_analyses(out_dir, date(2024, 11, 11), date(2024, 11, 17), ["general"])
+    assert len(groups[0]["days"]) == 5
+
+
+def test_rollup_sends_a_summary_only_prompt(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    from bridge.providers.ollama_provider import OllamaProvider
+
+    prompts = []
+
+    class FakeSession:
+        def mount(self, prefix, adapter):
+            return
+
+        def post(self, url, **kwargs):
+            prompts.append(kwargs["json"]["prompt"])
+            return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"response": '{"summary": "Busy week"}'})
+
+    monkeypatch.setattr("bridge.providers.ollama_provider.requests", SimpleNamespace(Session=FakeSession), raising=False)
+    monkeypatch.setattr("bridge.providers.ollama_provider._endpoints", {})
+    write_days(tmp_path)
+    days = collect_daily_analyses(tmp_path, date(2024, 11, 11), date(2024, 11, 15), ["general"])[0]["days"]
+
+    analysis = rollup_analyses(days, OllamaProvider(model="gpt-oss:20b", base_url="http://dummy"), "general")
+
+    assert analysis.summary == "Busy week"
+    assert "daily summaries" in prompts[0] and "help_interactions" not in prompts[0]
@@ -0,0 +1,80 @@
+import json
+from datetime import date, datetime, timezone
+
+import pytest
+
+import preprocess
+from bridge.config import schedule_window
+from bridge.store import MessageStore, date_range_ms
+from test_preprocess import raw_message, write_raw_export
+
+
+def seed_export(tmp_path):
+    return write_raw_export(
+        tmp_path,
+        [
+            raw_message("1", "2024-11-12T23:59:00-08:00"),
+            raw_message("2", "2024-11-13T00:01:00-08:00", author_id="u2", content="second"),
+            raw_message("3", "2024-11-13T01:00:00-08:00", content=""),
+            raw_message("4", "2024-11-14T02:00:00-08:00", content="third"),
+        ],
+    )
+
+
+def test_ingest_raw_export_and_query_by_local_dates(tmp_path):
+    export = seed_export(tmp_path)
+
+    with MessageStore(tmp_path / "chat.db") as store:
+        assert store.ingest_file(export) == 3
+        assert store.ingest_file(export) == 3  # re-ingest upserts by message id
+        channel = store.resolve_channels(["general"])[0]
+        start_ms, end_ms = date_range_ms(date(2024, 11, 13), date(2024, 11, 13), "America/Los_Angeles")
+        chat = store.load_chat(channel, start_ms, end_ms, "2024-11-13")
+
+        assert channel == {"id": "c1", "name": "general", "category": "Dev"}
+        assert chat["users"] == {"u2": {"name": "name-u2", "nickname": "nick-u2"}}
+        assert [m["id"] for m in chat["messages"]] == ["2"]
+        assert store.count_messages("c1", *date_range_ms(date(2024, 11, 12), date(2024, 11, 14), "America/Los_Angeles")) == 3
+
+
+def test_ingest_preprocessed_files_matches_raw(tmp_path):
+    export = seed_export(tmp_path)
+    preprocess.preprocess_export(export, tmp_path / "out", [preprocess.DailySink()], users="sidecar")
+
+    with MessageStore(tmp_path / "raw.db") as raw, MessageStore(tmp_path / "files.db") as files:
+        raw.ingest_file(export)
+        for path in sorted((tmp_path / "out" / "c1").glob("chat_*.json")):
+            files.ingest_file(path)
+        window = date_range_ms(date(2024, 11, 1), date(2024, 11, 30), "UTC")
+        assert list(files.iter_messages("c1", *window)) == list(raw.iter_messages("c1", *window))
+        assert files.load_chat({"id": "c1"}, *window, "")["users"]["u1"] == {"name": "name-u1", "nickname": "nick-u1"}
+
+
+def test_ingest_rejects_non_chat_files(tmp_path):
+    path = tmp_path / "preprocess_summary.json"
+    path.write_text(json.dumps({"channels": {}, "totals": {}}), encoding="utf-8")
+
+    with MessageStore(tmp_path / "chat.db") as store:
+        with pytest.raises(ValueError):
+            store.ingest_file(path)
+        with pytest.raises(ValueError):
+            store.resolve_channels(["missing"])
+
+
+@pytest.mark.parametrize(
+    "schedule_type,expected",
+    [
+        ("daily", (date(2024, 3, 4), date(2024, 3, 4))),
+        ("weekly", (date(2024, 2, 27), date(2024, 3, 4))),
+        ("monthly", (date(2024, 2, 1), date(2024, 2, 29))),
+    ],
+)
+def test_schedule_window(schedule_type, expected):
+    # 2024-03-04 23:30 UTC is already 2024-03-05 in Seoul.
+    now = datetime(2024, 3, 4, 23, 30, tzinfo=timezone.utc)
+    assert schedule_window(schedule_type, "Asia/Seoul", now) == expected
+
+
+def test_schedule_window_custom_needs_dates():
+    with pytest.raises(ValueError):
+        schedule_window("custom", "UTC")
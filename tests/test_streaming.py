@@ -0,0 +1,154 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from bridge.providers.ollama_provider import OllamaProvider
+from bridge.providers.openai_provider import OpenAIProvider
+from bridge.streaming import JSONStreamParser, MalformedStreamError, StreamProgress, consume_stream
+
+
+def test_parser_closes_at_top_level_brace():
+    parser = JSONStreamParser()
+    assert not parser.feed('{"summary": "a')
+    assert not parser.feed(' {nested} \\"}\\" [1]", "faq": [{"q": 1}]')
+    assert parser.feed('} trailing chatter {')
+    assert json.loads(parser.text) == {"summary": 'a {nested} "}" [1]', "faq": [{"q": 1}]}
+    assert parser.feed("more")  # ignored once complete
+
+
+def test_parser_accepts_fence_preamble_and_rejects_prose():
+    parser = JSONStreamParser()
+    assert parser.feed('```json\n{"summary": "ok"}')
+    assert parser.preamble == "```json\n"
+
+    parser = JSONStreamParser(max_preamble=16)
+    with pytest.raises(MalformedStreamError):
+        parser.feed("I'm sorry, but I cannot summarize this transcript.")
+
+
+def test_consume_stream_stops_reading_after_close():
+    read = []
+
+    def deltas():
+        for delta in ['{"summary":', ' "x"}', "ignored", "never read"]:
+            read.append(delta)
+            yield delta
+
+    progress = []
+    text, metrics = consume_stream(deltas(), started=0.0, on_delta=progress.append)
+    assert text == '{"summary": "x"}'
+    assert read == ['{"summary":', ' "x"}']
+    assert metrics.closed_early and metrics.deltas == 2 and metrics.ttft is not None
+    assert progress == [11, 5]
+
+
+def test_stream_progress_sums_concurrent_streams():
+    reports = []
+    progress = StreamProgress("day", lambda label, chars: reports.append((label, chars)), step=10)
+    for chars in [4, 4, 4, 9, 1]:
+        progress(chars)
+    assert reports == [("day", 12), ("day", 21)]
+
+
+def ollama_stream_session(monkeypatch, chunks, plain_response):
+    """A fake requests module whose stream=True posts yield chunks as NDJSON, others plain_response."""
+    calls = []
+
+    class StreamResponse:
+        def raise_for_status(self):
+            return
+
+        def iter_lines(self):
+            return iter(json.dumps({"response": c, "done": False}).encode() for c in chunks)
+
+        def close(self):
+            return
+
+    class FakeSession:
+        def mount(self, prefix, adapter):
+            return
+
+        def post(self, url, **kwargs):
+            calls.append(bool(kwargs.get("stream")))
+            if kwargs.get("stream"):
+                return StreamResponse()
+            return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"response": plain_response})
+
+    monkeypatch.setattr("bridge.providers.ollama_provider.requests", SimpleNamespace(Session=FakeSession), raising=False)
+    monkeypatch.setattr("bridge.providers.ollama_provider._endpoints", {})
+    return calls
+
+
+def test_ollama_stream_accepts_chatty_opener(monkeypatch):
+    opener = "Sure! Here is the structured JSON analysis of the Discord transcript you provided:\n\n```json\n"
+    calls = ollama_stream_session(monkeypatch, [opener, '{"summary": "chatty"}', "\n```"], "")
+    provider = OllamaProvider(model="gpt-oss:20b", base_url="http://dummy", stream=True)
+
+    assert provider.analyze("hi").summary == "chatty"
+    assert calls == [True]
+
+
+def test_ollama_stream_falls_back_when_completion_is_not_json(monkeypatch):
+    prose = "I cannot produce JSON for this transcript. " * 10
+    calls = ollama_stream_session(monkeypatch, [prose], prose)
+    provider = OllamaProvider(model="gpt-oss:20b", base_url="http://dummy", stream=True)
+
+    analysis = provider.analyze("hi")  # no MalformedStreamError escapes
+    assert calls == [True, False]
+    assert analysis.summary == prose.strip()
+
+
+def test_ollama_streams_ndjson(monkeypatch):
+    chunks = ['{"summary": "str', 'eamed", "faq": []}', "\nextra"]
+    lines = [json.dumps({"response": c, "done": False}).encode() for c in chunks] + [b'{"done": true}']
+    calls = []
+
+    class StreamResponse:
+        closed = False
+
+        def raise_for_status(self):
+            return
+
+        def iter_lines(self):
+            return iter(lines)
+
+        def close(self):
+            StreamResponse.closed = True
+
+    class FakeSession:
+        def mount(self, prefix, adapter):
+            return
+
+        def post(self, url, **kwargs):
+            calls.append((url, kwargs["json"]["stream"], kwargs.get("stream")))
+            return StreamResponse()
+
+    class Requests:
+        ConnectionError = Exception
+        Session = FakeSession
+
+    monkeypatch.setattr("bridge.providers.ollama_provider.requests", Requests(), raising=False)
+    monkeypatch.setattr("bridge.providers.ollama_provider._endpoints", {})
+    provider = OllamaProvider(model="gpt-oss:20b", base_url="http://dummy", stream=True)
+
+    assert provider.analyze("hi").summary == "streamed"
+    assert calls == [("http://dummy/api/generate", True, True)]
+    assert StreamResponse.closed
+
+
+def test_openai_streams_chunks(monkeypatch):
+    def chunk(content):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+    class ChatCompletion:
+        @staticmethod
+        def create(**kwargs):
+            assert kwargs["stream"] is True
+            return iter([chunk(None), chunk('{"summary"'), chunk(': "OK"}'), chunk(" done")])
+
+    fake = SimpleNamespace(api_key=None, api_base=None, ChatCompletion=ChatCompletion)
+    monkeypatch.setattr("bridge.providers.openai_provider.openai", fake, raising=False)
+    provider = OpenAIProvider(model="gpt-4o-mini", api_key="k", stream=True)
+
+    assert provider.analyze("hi").summary == "OK"
@@ -0,0 +1,56 @@
+from bridge import pipeline
+from bridge.threads import group_conversations, pack_conversations, thread_chunks
+
+
+def msg(mid, uid, minute, content="", **extra):
+    return {"id": str(mid), "uid": uid, "ts": f"2024-11-13T10:{minute:02d}:00Z", "content": content, **extra}
+
+
+def interleaved_chat():
+    # Two conversations interleaved in time: a build question (a/b) and a release one (c/d).
+    return [
+        msg(1, "a", 0, "build fails on main"),
+        msg(2, "c", 1, "when is the release?"),
+        msg(3, "b", 2, "which compiler?", ref="1"),
+        msg(4, "d", 3, "friday", ref="2"),
+        msg(5, "a", 4, "gcc 13", mentions=["b"]),
+        msg(6, "c", 5, "thanks", mentions=["d"]),
+    ]
+
+
+def test_group_conversations_follows_replies_and_mentions():
+    assert group_conversations(interleaved_chat()) == [[0, 2, 4], [1, 3, 5]]
+
+
+def test_group_conversations_joins_same_author_runs_and_ignores_stale_mentions():
+    messages = [msg(1, "a", 0), msg(2, "a", 1), msg(3, "b", 2), msg(4, "c", 50, mentions=["b"])]
+    assert group_conversations(messages) == [[0, 1], [2], [3]]
+
+
+def test_pack_conversations_first_fit_and_split():
+    packed = pack_conversations([[0, 1], [2, 3, 4, 5], [6]], lambda _: 1, 3)
+    assert packed == [[0, 1, 6], [2, 3, 4], [5]]
+
+
+def test_thread_chunks_keep_conversations_whole():
+    chunks = thread_chunks(interleaved_chat(), 3)
+    assert [[m["id"] for m in chunk] for chunk in chunks] == [["1", "3", "5"], ["2", "4", "6"]]
+
+
+def test_chunk_transcript_packs_threads_when_over_budget():
+    users = {u: {"name": u.upper()} for u in "abcd"}
+    messages = interleaved_chat()
+    whole = pipeline.chunk_transcript(iter(messages), users, 10_000)  # a lazy stream, read once
+    assert whole == [pipeline.format_messages(messages, users)]
+
+    chunks = pipeline.chunk_transcript(messages, users, 25)
+    assert len(chunks) == 2
+    assert "build fails" in chunks[0] and "gcc 13" in chunks[0] and "release" not in chunks[0]
+
+
+def test_chunk_transcript_builds_no_graph_under_budget(monkeypatch):
+    def fail(_):
+        raise AssertionError("conversation graph built for a transcript that fits")
+
+    monkeypatch.setattr(pipeline, "group_conversations", fail)
+    assert len(pipeline.chunk_transcript(iter(interleaved_chat()), {}, 10_000)) == 1